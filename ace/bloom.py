@@ -0,0 +1,69 @@
+import hashlib
+import math
+from typing import Iterable, List
+
+class BloomFilter:
+    """
+    A space-efficient probabilistic set of strings.
+
+    A Bloom filter can answer "definitely not present" or "possibly present"
+    for a key. It never produces false negatives for keys that were added,
+    but may produce false positives at a rate controlled by its size. This
+    makes it useful as a cheap in-memory prefilter in front of a more
+    expensive exact lookup, such as a database query.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initializes an empty Bloom filter.
+
+        The number of bits and hash functions are derived from the expected
+        number of keys and the target false positive rate.
+
+        Args:
+            capacity: The number of keys the filter is sized for. Adding more
+                      keys than this increases the false positive rate.
+            error_rate: The target false positive rate at full capacity.
+        """
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Derive all bit positions from one digest using double hashing.
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str):
+        """
+        Adds a key to the filter.
+
+        Args:
+            key: The key to add.
+        """
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[str]):
+        """
+        Adds several keys to the filter.
+
+        Args:
+            keys: The keys to add.
+        """
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def is_saturated(self) -> bool:
+        """Whether more keys have been added than the filter was sized for."""
+        return self.count > self.capacity
@@ -0,0 +1,109 @@
+import collections
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """
+    A bounded, in-memory, least-recently-used cache.
+
+    When the cache holds `maxsize` items, adding another evicts the item that
+    was least recently read or written. The cache also counts its hits and
+    misses so that its effectiveness can be reported.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Initializes an empty cache.
+
+        Args:
+            maxsize: The maximum number of items to keep.
+        """
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self._items: "collections.OrderedDict[Hashable, Any]" = collections.OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key, marking it as recently used.
+
+        Args:
+            key: The key to look up.
+            default: The value to return if the key is not cached.
+
+        Returns:
+            The cached value, or `default` on a miss.
+        """
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Caches a value, evicting the least recently used item if full.
+
+        Args:
+            key: The key to cache the value under.
+            value: The value to cache.
+        """
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Removes a key from the cache.
+
+        Args:
+            key: The key to remove.
+            default: The value to return if the key is not cached.
+
+        Returns:
+            The removed value, or `default`.
+        """
+        return self._items.pop(key, default)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """
+        Removes every item for which `predicate(key, value)` is true.
+
+        Args:
+            predicate: A function that selects the items to remove.
+        """
+        for key in [k for k, v in self._items.items() if predicate(k, v)]:
+            del self._items[key]
+
+    def clear(self):
+        """Removes every item from the cache."""
+        self._items.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The fraction of lookups that were hits, or None before any lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache's size and hit/miss counters.
+
+        Returns:
+            A dictionary with `size`, `maxsize`, `hits`, `misses`, and
+            `hit_rate` keys.
+        """
+        return {
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -9,10 +9,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from ace.config import settings
 from ace.core.models import Playbook
 from ace.core.generator import Generator
+from ace.core.retriever import create_retriever
+from ace.core.context_packer import create_context_packer
 from ace.core.reflector import Reflector
-from ace.core.curator import Curator
+from ace.core.reflection_cache import get_reflection_cache
+from ace.core.curation_actor import get_curation_actor
 from ace.llm import get_language_model
-from ace import database
+from ace.storage import PlaybookStore, get_playbook_store
 from ace.plugins.manager import plugin_manager
 from ace.cluster_manager import ClusterManager
 
@@ -21,15 +24,28 @@ async def main():
     The main asynchronous function for the ACE Command-Line Interface.
 
     This function orchestrates the command-line operations of the ACE framework.
-    It initializes the database, parses command-line arguments, and then
+    It initializes the playbook store, parses command-line arguments, and then
     executes the appropriate logic based on the user's commands.
 
     The CLI supports two main commands:
     - `run`: Executes the full ACE pipeline for a given task.
     - `cluster`: Manages the clustering and summarization of playbook entries.
     """
-    await database.initialize_database()
+    store = get_playbook_store(settings)
+    await store.initialize()
+    await store.open(settings)
+    try:
+        await run_command(store)
+    finally:
+        await store.close()
+
+async def run_command(store: PlaybookStore):
+    """
+    Parses the command-line arguments and executes the requested command.
 
+    Args:
+        store: The playbook store to run the command against.
+    """
     parser = argparse.ArgumentParser(description="ACE Framework Command-Line Interface")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -42,6 +58,9 @@ async def main():
         default=settings.get('cli_settings', {}).get('default_task'),
         help="The task to run the ACE pipeline on."
     )
+    run_parser.add_argument("--top-k", type=int, help="The number of playbook entries put into the prompt.")
+    run_parser.add_argument("--min-similarity", type=float, help="The similarity an entry needs to the task to be retrieved.")
+    run_parser.add_argument("--mmr-lambda", type=float, help="Select entries by maximal marginal relevance with this trade-off.")
 
     # Sub-parser for the 'cluster' command
     cluster_parser = subparsers.add_parser("cluster", help="Manage playbook entry clusters.")
@@ -55,23 +74,32 @@ async def main():
 
     if args.command == "run":
         # Execute the ACE pipeline
-        playbook = Playbook()
-        generator = Generator(llm=llm)
-        reflector = Reflector(llm=llm)
-        curator = Curator(config=settings)
+        playbook = Playbook(store)
+        retriever = create_retriever(settings)
+        generator = Generator(llm=llm, retriever=retriever, packer=create_context_packer(settings))
+        reflector = Reflector(llm=llm, cache=get_reflection_cache(settings))
+        curation_actor = get_curation_actor(settings)
 
         print(f"Running ACE pipeline for task: '{args.task}'\n")
 
         # Execute plugin hooks at each stage of the pipeline
         await plugin_manager.execute_hook("on_pipeline_start", task=args.task)
         await plugin_manager.execute_hook("on_before_generation", playbook=playbook, task=args.task)
-        trajectory = await generator.generate_trajectory(playbook, args.task)
+        retrieval_options = None
+        if retriever is not None:
+            retrieval_options = retriever.options(
+                top_k=args.top_k, min_similarity=args.min_similarity, mmr_lambda=args.mmr_lambda
+            )
+        trajectory = await generator.generate_trajectory(playbook, args.task, retrieval_options)
+        if generator.last_retrieval is not None:
+            retrieval = generator.last_retrieval
+            print(f"Retrieved {len(retrieval.entries)} playbook entries in {retrieval.latency_ms:.1f} ms\n")
         await plugin_manager.execute_hook("on_after_generation", trajectory=trajectory)
         await plugin_manager.execute_hook("on_before_reflection", trajectory=trajectory)
         insights = await reflector.reflect(trajectory)
         await plugin_manager.execute_hook("on_after_reflection", insights=insights)
         await plugin_manager.execute_hook("on_before_curation", insights=insights)
-        await curator.curate(playbook, insights)
+        await curation_actor.submit(playbook, insights)
         await plugin_manager.execute_hook("on_after_curation")
         await plugin_manager.execute_hook("on_pipeline_end")
 
@@ -81,7 +109,7 @@ async def main():
 
     elif args.command == "cluster":
         # Manage clusters
-        cluster_manager = ClusterManager(settings, llm)
+        cluster_manager = ClusterManager(settings, llm, store)
         if args.cluster_command == "run":
             print("Running clustering and summarization...")
             await cluster_manager.run_clustering()
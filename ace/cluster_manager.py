@@ -1,8 +1,9 @@
-from typing import List, Dict, Any
-from ace import database
+from typing import List, Dict, Any, Optional
+from ace.storage import PlaybookStore, get_playbook_store
 from ace.clustering import get_clustering_service
 from ace.summarization import get_summarization_service
 from ace.llm import LanguageModel
+import asyncio
 import collections
 
 class ClusterManager:
@@ -15,57 +16,66 @@ class ClusterManager:
     `SummarizationService` to create the summaries.
     """
 
-    def __init__(self, config: Dict[str, Any], llm: LanguageModel):
+    def __init__(self, config: Dict[str, Any], llm: LanguageModel, store: Optional[PlaybookStore] = None):
         """
         Initializes the ClusterManager.
 
         Args:
             config: A dictionary containing the application configuration.
+                    `clustering.summary_concurrency` bounds the number of
+                    clusters summarized at once.
             llm: An instance of a class that implements the `LanguageModel`
                  interface, to be used for summarization.
+            store: The store holding the playbook entries and clusters.
+                   Defaults to the application's configured store.
         """
         self.config = config
+        self.store = store if store is not None else get_playbook_store(config)
         self.clustering_service = get_clustering_service(config)
         self.summarization_service = get_summarization_service(llm)
+        self.summary_concurrency = max(1, config.get('clustering', {}).get('summary_concurrency', 4))
 
     async def run_clustering(self):
         """
         Runs the full clustering and summarization process.
 
-        This method fetches all playbook entries, clusters them based on their
-        embeddings, and then generates and stores a summary for each cluster.
-        The cluster assignments and summaries are updated in the database.
+        This method clusters the store's embedding matrix, and then generates a
+        summary for each cluster from the contents of its entries. The cluster
+        assignments and summaries are then written to the store in one batch,
+        which also removes clusters that no longer exist.
         """
-        entries = await database.get_all_playbook_entries()
-        if not entries:
+        entry_ids, embeddings = await self.store.get_embedding_matrix()
+        if not entry_ids:
             return
 
-        labels = self.clustering_service.cluster_entries(entries)
+        labels = self.clustering_service.cluster_embeddings(embeddings)
 
-        # Group entries by cluster label
+        # Map entry IDs to cluster labels, ensuring the cluster ID is a
+        # standard Python int for database compatibility
+        assignments = {entry_id: int(label) for entry_id, label in zip(entry_ids, labels)}
         clusters = collections.defaultdict(list)
-        for i, entry in enumerate(entries):
-            clusters[labels[i]].append(entry)
+        async for row in self.store.iter_entries(("id", "content")):
+            if row['id'] in assignments:
+                clusters[assignments[row['id']]].append(row['content'])
 
-        # Update cluster IDs and summarize each cluster
-        for label, cluster_entries in clusters.items():
-            # Ensure the cluster ID is a standard Python int for database compatibility
-            cluster_id = int(label)
+        # Summarize the clusters concurrently, but with at most
+        # `summary_concurrency` LLM calls in flight, to stay within the
+        # provider's rate limits.
+        semaphore = asyncio.Semaphore(self.summary_concurrency)
 
-            # Update the cluster ID for each entry in the current cluster
-            for entry in cluster_entries:
-                await database.update_entry_cluster(entry['id'], cluster_id)
+        async def summarize(cluster_id: int) -> str:
+            async with semaphore:
+                return await self.summarization_service.summarize_cluster(clusters[cluster_id])
 
-            # Generate and store the summary for the current cluster
-            texts = [e['content'] for e in cluster_entries]
-            summary = await self.summarization_service.summarize_cluster(texts)
-            await database.add_or_update_cluster_summary(cluster_id, summary)
+        cluster_ids = list(clusters)
+        summaries = await asyncio.gather(*[summarize(cluster_id) for cluster_id in cluster_ids])
+        await self.store.assign_clusters(assignments, dict(zip(cluster_ids, summaries)))
 
     async def get_clusters(self) -> Dict[int, Dict[str, Any]]:
         """
         Retrieves all clusters, their summaries, and their associated entries.
 
-        This method queries the database to get a comprehensive view of all
+        This method queries the store to get a comprehensive view of all
         the clusters, including the summary of each cluster and the list of
         entries that belong to it.
 
@@ -73,5 +83,5 @@ class ClusterManager:
             A dictionary where keys are cluster IDs and values are dictionaries
             containing the cluster's summary and its entries.
         """
-        clusters_data = await database.get_all_clusters_with_entries()
+        clusters_data = await self.store.get_clusters_with_entries()
         return clusters_data
@@ -1,6 +1,6 @@
-from sklearn.cluster import KMeans
 import numpy as np
 from typing import List, Dict, Any
+from ace.embedding_codec import decode_embedding
 
 class ClusteringService:
     """
@@ -43,14 +43,33 @@ class ClusteringService:
             A list of cluster labels, where each label corresponds to an entry
             in the input list.
         """
-        embeddings = [np.frombuffer(e['embedding'], dtype=np.float32) for e in entries if e['embedding']]
+        embeddings = [decode_embedding(e['embedding']) for e in entries if e['embedding']]
         if not embeddings:
             return []
+        return self.cluster_embeddings(np.stack(embeddings))
+
+    def cluster_embeddings(self, embeddings: np.ndarray) -> List[int]:
+        """
+        Clusters a matrix of embeddings using the KMeans algorithm.
+
+        The matrix is used as given, so a memory-mapped embedding matrix is
+        clustered without first being copied into per-entry arrays.
+
+        Args:
+            embeddings: A matrix with one embedding per row.
+
+        Returns:
+            A list of cluster labels, one per row.
+        """
+        if len(embeddings) == 0:
+            return []
 
         n_clusters = self.n_clusters
         if len(embeddings) < n_clusters:
             n_clusters = len(embeddings)
 
+        # scikit-learn is slow to import, so it is only imported when needed
+        from sklearn.cluster import KMeans
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
         kmeans.fit(embeddings)
         return kmeans.labels_.tolist()
@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+from ace.core.models import PlaybookEntry
+from ace.core.prompt_cache import PlaybookSectionCache, get_playbook_section_cache
+from ace.storage import PlaybookStore
+from ace.tokenizer import Tokenizer, create_tokenizer
+
+@dataclass
+class PackedContext:
+    """
+    The playbook section of a prompt, packed into a token budget.
+
+    Attributes:
+        lines: The lines of the section, one per entry or cluster summary.
+        entry_ids: The IDs of the entries included verbatim.
+        cluster_ids: The IDs of the clusters included as summaries.
+        omitted: The number of candidate entries not included verbatim.
+        tokens: The number of tokens of the section.
+        budget: The token budget the section was packed into.
+    """
+    lines: List[str] = field(default_factory=list)
+    entry_ids: List[str] = field(default_factory=list)
+    cluster_ids: List[int] = field(default_factory=list)
+    omitted: int = 0
+    tokens: int = 0
+    budget: int = 0
+
+    def render(self) -> str:
+        """Returns the section as text."""
+        return "".join(self.lines)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns a JSON-serializable summary of the packing, without the text.
+
+        Returns:
+            A dictionary with the included entry and cluster IDs, the number
+            of omitted entries, and the token count and budget.
+        """
+        return {
+            "entry_ids": self.entry_ids,
+            "cluster_ids": self.cluster_ids,
+            "omitted": self.omitted,
+            "tokens": self.tokens,
+            "budget": self.budget,
+        }
+
+class ContextPacker:
+    """
+    Packs playbook entries into a token budget for the Generator's prompt.
+
+    Entries are considered in order of relevance and added greedily: every
+    entry that still fits into the budget is included verbatim, and entries
+    that do not fit are skipped, so a smaller, less relevant entry can still
+    use the remaining budget. When an entry that belongs to a cluster does not
+    fit, the summary of its cluster (from the `clusters` table) is included
+    instead, if it fits, once per cluster. The prompt thereby gets two levels
+    of context: summaries for breadth and entries for depth.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        tokenizer: Optional[Tokenizer] = None,
+        section_cache: Optional[PlaybookSectionCache] = None
+    ):
+        """
+        Initializes the ContextPacker.
+
+        Args:
+            config: A dictionary containing the application configuration. The
+                    budget is read from `context.token_budget`, and cluster
+                    summaries are used unless `context.cluster_summaries` is
+                    false.
+            tokenizer: The tokenizer that counts tokens. Defaults to the one
+                       configured by `context.tokenizer`.
+            section_cache: The cache of rendered entries and their token
+                           counts. Defaults to the cache shared by every
+                           Generator.
+        """
+        context_config = config.get('context', {})
+        self.token_budget = context_config.get('token_budget', 2000)
+        self.use_cluster_summaries = context_config.get('cluster_summaries', True)
+        self.tokenizer = tokenizer if tokenizer is not None else create_tokenizer(config)
+        self.section_cache = section_cache if section_cache is not None else get_playbook_section_cache()
+
+    @staticmethod
+    def _summary_line(summary: str) -> str:
+        return f"- [Summary] {summary}\n"
+
+    async def pack(
+        self,
+        store: PlaybookStore,
+        entries: List[PlaybookEntry],
+        token_budget: Optional[int] = None
+    ) -> PackedContext:
+        """
+        Packs entries into the token budget.
+
+        Args:
+            store: The store holding the entries, used to look up their
+                   clusters and the clusters' summaries.
+            entries: The candidate entries, most relevant first.
+            token_budget: A budget overriding the configured one.
+
+        Returns:
+            The packed playbook section.
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        packed = PackedContext(budget=budget)
+        clusters: Dict[str, int] = {}
+        summaries: Optional[Dict[int, str]] = None
+        tried_clusters: Set[int] = set()
+
+        if self.use_cluster_summaries and entries:
+            clusters = await store.get_entry_clusters([entry.id for entry in entries])
+
+        for entry in entries:
+            line, cost = self.section_cache.packed_fragment(entry, self.tokenizer)
+            if packed.tokens + cost <= budget:
+                packed.lines.append(line)
+                packed.entry_ids.append(entry.id)
+                packed.tokens += cost
+                continue
+
+            packed.omitted += 1
+            cluster_id = clusters.get(entry.id)
+            if cluster_id is None or cluster_id in tried_clusters:
+                continue
+            tried_clusters.add(cluster_id)
+            if summaries is None:
+                # Summaries are only needed once the budget overflows, and are
+                # then read for every candidate cluster at once.
+                summaries = await store.get_cluster_summaries(sorted(set(clusters.values())))
+            if cluster_id not in summaries:
+                continue
+            line = self._summary_line(summaries[cluster_id])
+            cost = self.tokenizer.count(line)
+            if packed.tokens + cost <= budget:
+                packed.lines.append(line)
+                packed.cluster_ids.append(cluster_id)
+                packed.tokens += cost
+        return packed
+
+def create_context_packer(config: Dict[str, Any]) -> Optional[ContextPacker]:
+    """
+    Factory function to create the Generator's context packer based on the configuration.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        A `ContextPacker` if `context.token_budget` is set, otherwise None, in
+        which case the prompt size is not limited.
+
+    Raises:
+        ValueError: If the configured tokenizer is unknown.
+    """
+    if not config.get('context', {}).get('token_budget'):
+        return None
+    return ContextPacker(config)
@@ -0,0 +1,172 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from ace.core.curator import Curator
+from ace.core.models import Playbook, PlaybookEntry
+
+class CurationActor:
+    """
+    Curates the insights of every request through a single worker.
+
+    Requests build their own pipeline components, so a per-request Curator's
+    lock serializes nothing across requests: two requests could each find a
+    new insight absent from the playbook and both add it. The actor instead
+    owns the application's Curator and its write path. Requests submit their
+    insights over a queue, and a single worker task merges the queued
+    submissions, up to `max_batch_size` insights or until `max_wait` seconds
+    have passed since the first of them, and curates each merged batch at
+    once: insights are deduplicated against each other across requests,
+    embedded in one batch, and added to the playbook with one commit. Every
+    submitter then receives the entries added from its own insights.
+
+    The worker is started on first use and is bound to the running event
+    loop; if the actor is later used from another loop, it starts a new
+    worker there.
+    """
+
+    def __init__(self, curator: Curator, max_batch_size: int = 256, max_wait: float = 0.01):
+        """
+        Initializes the actor.
+
+        Args:
+            curator: The Curator that selects the insights to add. Its store
+                     is the one every submitted playbook must be backed by.
+            max_batch_size: The number of insights at which a batch is
+                            curated without waiting for more submissions.
+            max_wait: The maximum time, in seconds, a submission waits for
+                      other submissions to be batched with.
+        """
+        self.curator = curator
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches_curated = 0
+        self.insights_curated = 0
+        self.entries_added = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker_task is None or self._worker_task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker_task = loop.create_task(self._run_worker())
+
+    async def submit(self, playbook: Playbook, insights: List[Dict[str, Any]]) -> List[PlaybookEntry]:
+        """
+        Curates insights into a playbook, batched with other submissions.
+
+        Args:
+            playbook: The playbook to add the insights to.
+            insights: The insights to be considered for addition.
+
+        Returns:
+            The entries that were added from these insights, in order.
+
+        Raises:
+            ValueError: If the playbook is not backed by the Curator's store.
+        """
+        if playbook.store is not self.curator.store:
+            raise ValueError("The playbook is not backed by the curation actor's store.")
+        if not insights:
+            return []
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((playbook, list(insights), future))
+        return await future
+
+    async def close(self):
+        """Stops the worker task, if it runs on the current event loop."""
+        task, self._worker_task = self._worker_task, None
+        if task is not None and not task.done() and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the actor's batching counters.
+
+        Returns:
+            A dictionary with the number of merged batches curated, the
+            insights they held, the entries added, and the number of
+            submissions waiting in the queue.
+        """
+        return {
+            "batches": self.batches_curated,
+            "insights": self.insights_curated,
+            "entries_added": self.entries_added,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def _run_worker(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch: List[Tuple[Playbook, List[Dict[str, Any]], asyncio.Future]] = [await queue.get()]
+            size = len(batch[0][1])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request[1])
+
+            insights = [insight for _, request_insights, _ in batch for insight in request_insights]
+            try:
+                # The lock also serializes the batch with direct calls to the
+                # Curator's `curate`.
+                async with self.curator.lock:
+                    accepted = await self.curator.select(insights)
+                    if accepted:
+                        await batch[0][0].add_entries([entry for _, entry in accepted])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_curated += 1
+            self.insights_curated += len(insights)
+            self.entries_added += len(accepted)
+            offset = 0
+            for _, request_insights, future in batch:
+                end = offset + len(request_insights)
+                if not future.done():
+                    future.set_result([entry for row, entry in accepted if offset <= row < end])
+                offset = end
+
+# A global singleton instance of the CurationActor.
+_curation_actor: Optional[CurationActor] = None
+
+def get_curation_actor(config: Dict[str, Any]) -> CurationActor:
+    """
+    Returns a singleton instance of the CurationActor.
+
+    Every request of the process submits its insights to this actor, so
+    that curation is serialized and batched across requests.
+
+    Args:
+        config: A dictionary containing the application configuration. The
+                actor is configured by the `curation` section, and its
+                Curator by the rest of the configuration.
+
+    Returns:
+        A singleton instance of the `CurationActor`.
+    """
+    global _curation_actor
+    if _curation_actor is None:
+        curation_config = config.get('curation', {})
+        _curation_actor = CurationActor(
+            Curator(config),
+            max_batch_size=curation_config.get('batch_size', 256),
+            max_wait=curation_config.get('batch_wait_ms', 10) / 1000
+        )
+    return _curation_actor
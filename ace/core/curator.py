@@ -1,7 +1,8 @@
 import asyncio
-from typing import Dict, List, Any
-from ace.core.models import Playbook
+from typing import Dict, List, Any, Optional, Tuple
+from ace.core.models import Playbook, PlaybookEntry
 from ace import database
+from ace.storage import PlaybookStore, get_playbook_store
 from ace.similarity import SimilarityService, get_similarity_service
 import numpy as np
 
@@ -19,48 +20,128 @@ class Curator:
     and comparing it against the embeddings of existing entries in the playbook.
     """
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        store: Optional[PlaybookStore] = None,
+        similarity_service: Optional[SimilarityService] = None
+    ):
         """
         Initializes the Curator.
 
         This sets up the Curator with the necessary services, such as the
         `SimilarityService` for semantic comparisons, and initializes a lock
-        to ensure thread-safe operations on the playbook.
+        that serializes the curations of this instance. Curations from
+        different requests are serialized, and merged, by the
+        `CurationActor`, which owns the application's Curator.
 
         Args:
             config: A dictionary containing the application configuration.
+            store: The store checked for existing entries. It should be the
+                   store backing the playbooks being curated, and defaults to
+                   the application's configured store.
+            similarity_service: The service used to embed and compare
+                                insights. Defaults to the application's
+                                similarity service.
         """
-        self.similarity_service: SimilarityService = get_similarity_service(config)
+        self.store = store if store is not None else get_playbook_store(config)
+        self.similarity_service: SimilarityService = (
+            similarity_service if similarity_service is not None else get_similarity_service(config)
+        )
+        self.scan_batch_size = config.get('similarity', {}).get('scan_batch_size', 1000)
         self.lock = asyncio.Lock()
 
-    async def curate(self, playbook: Playbook, insights: List[Dict[str, Any]]):
-        """
-        Asynchronously integrates a list of insights into the playbook.
+    async def _are_in_playbook(self, embeddings: np.ndarray) -> List[bool]:
+        if self.similarity_service.index_store is self.store:
+            return list(self.similarity_service.are_similar_to_index(embeddings))
+        return [
+            await self.store.is_similar_embedding_present(
+                self.similarity_service, embedding, batch_size=self.scan_batch_size
+            )
+            for embedding in embeddings
+        ]
 
-        This method iterates through the provided insights and, for each one,
-        checks if it is a valuable addition to the playbook. It uses semantic
-        deduplication to avoid adding conceptually redundant information.
+    async def select(self, insights: List[Dict[str, Any]]) -> List[Tuple[int, PlaybookEntry]]:
+        """
+        Asynchronously selects the insights that should be added to the playbook.
 
         The process for each insight is as follows:
-        1. Check if the exact content already exists.
-        2. If not, generate a vector embedding for the insight's content.
-        3. Check if any existing entry is semantically similar to the new one.
-        4. If no similar entry is found, add the new insight to the playbook.
+        1. Check if the exact content already exists, in the playbook or
+           earlier in the same batch. The playbook is checked for all
+           insights at once.
+        2. If not, generate a vector embedding for the insight's content. The
+           remaining insights are embedded together, in one batch.
+        3. Drop the insights that are semantically similar to an earlier
+           insight of the batch. The insights are compared with each other
+           through one similarity matrix, before the playbook is consulted.
+        4. Check if any existing entry is semantically similar to a
+           surviving insight. Existing entries are checked against the
+           similarity service's resident index if it holds this store, for
+           all survivors at once, and by scanning the store otherwise.
+        5. If no similar entry is found, accept the insight.
+
+        Nothing is written, so the caller must hold `lock` until the accepted
+        entries are added, for the selection to stay valid.
+
+        Args:
+            insights: A list of insights to be considered for addition. Each
+                      insight is a dictionary, expected to have 'content' and
+                      'metadata' keys.
+
+        Returns:
+            The accepted insights, each as its index in `insights` and the
+            `PlaybookEntry` to add, in order.
+        """
+        contents = [insight.get("content", "") for insight in insights]
+        candidates = [c for c in contents if c]
+        existing = {c for c, exists in zip(candidates, await self.store.contents_exist(candidates)) if exists}
+        seen_hashes = set()
+        pending = []
+        for row, (insight, content) in enumerate(zip(insights, contents)):
+            if not content or content in existing:
+                continue
+            digest = database.content_hash(content)
+            if digest in seen_hashes:
+                continue
+            seen_hashes.add(digest)
+            pending.append(row)
+
+        if not pending:
+            return []
+
+        embeddings = await self.similarity_service.embed([insights[row]["content"] for row in pending])
+        survivors = self.similarity_service.deduplicate(embeddings)
+        embeddings = embeddings[survivors]
+        in_playbook = await self._are_in_playbook(embeddings)
+        return [
+            (pending[i], PlaybookEntry(
+                content=insights[pending[i]]["content"],
+                metadata=insights[pending[i]].get("metadata", {}),
+                embedding=self.similarity_service.serialize_embedding(embedding)
+            ))
+            for i, embedding, exists in zip(survivors, embeddings, in_playbook)
+            if not exists
+        ]
+
+    async def curate(self, playbook: Playbook, insights: List[Dict[str, Any]]) -> List[PlaybookEntry]:
+        """
+        Asynchronously integrates a list of insights into the playbook.
+
+        The insights that pass the semantic deduplication of `select` are
+        added to the playbook in a single transaction. Concurrent calls on
+        the same instance are serialized by its lock.
 
         Args:
             playbook: The playbook instance to be updated.
             insights: A list of insights to be considered for addition. Each
                       insight is a dictionary, expected to have 'content' and
                       'metadata' keys.
+
+        Returns:
+            The entries that were added, in order.
         """
         async with self.lock:
-            for insight in insights:
-                content = insight.get("content", "")
-                if content and not await database.content_exists(content):
-                    embedding = self.similarity_service.get_embedding(content)
-                    if not await database.is_similar_embedding_present(self.similarity_service, embedding):
-                        await playbook.add_entry(
-                            content=content,
-                            metadata=insight.get("metadata", {}),
-                            embedding=embedding.tobytes()
-                        )
+            accepted = [entry for _, entry in await self.select(insights)]
+            if accepted:
+                await playbook.add_entries(accepted)
+            return accepted
@@ -1,5 +1,13 @@
-from ace.core.models import Playbook
+from typing import AsyncIterator, List, Optional
+import numpy as np
+from ace.config import settings
+from ace.core.context_packer import ContextPacker, PackedContext
+from ace.core.models import Playbook, PlaybookEntry
+from ace.core.prompt_cache import PlaybookSectionCache, get_playbook_section_cache
+from ace.core.retriever import RetrievalOptions, RetrievalResult, Retriever
+from ace.embedding_codec import cosine_similarities
 from ace.llm import LanguageModel
+from ace.similarity import SimilarityService, get_similarity_service
 
 class Generator:
     """
@@ -14,37 +22,157 @@ class Generator:
     The generation process is guided by a language model, which takes the
     current task and the contents of the playbook as input to produce a
     relevant and actionable trajectory.
+
+    With a `Retriever`, only the playbook entries most relevant to the task
+    are put into the prompt, so the prompt stays bounded as the playbook
+    grows. Without one, every entry is. With a `ContextPacker`, the
+    candidate entries are additionally packed into a token budget, falling
+    back to cluster summaries for entries that do not fit. Without a
+    retriever, the packer is given every entry ranked by the similarity of
+    its embedding to the task, so a tight budget keeps the most relevant
+    entries rather than the oldest. A section that
+    lists the whole playbook is rendered once per playbook version and
+    served from a `PlaybookSectionCache` afterwards; packed sections take
+    each entry's line and token count from the same cache.
     """
 
-    def __init__(self, llm: LanguageModel):
+    def __init__(
+        self,
+        llm: LanguageModel,
+        retriever: Optional[Retriever] = None,
+        packer: Optional[ContextPacker] = None,
+        section_cache: Optional[PlaybookSectionCache] = None,
+        similarity_service: Optional[SimilarityService] = None
+    ):
         """
         Initializes the Generator.
 
         Args:
             llm: An instance of a class that implements the `LanguageModel`
                  interface. This model is used to generate the trajectories.
+            retriever: An optional retriever that selects the playbook entries
+                       put into the prompt.
+            packer: An optional packer that fits the playbook entries into a
+                    token budget.
+            section_cache: The cache of rendered playbook sections. Defaults
+                           to the cache shared by every Generator.
+            similarity_service: The service that embeds tasks to rank the
+                                entries to pack when there is no retriever.
+                                Defaults to the application's similarity
+                                service, created on first use.
         """
         self.llm = llm
+        self.retriever = retriever
+        self.packer = packer
+        self.section_cache = section_cache if section_cache is not None else get_playbook_section_cache()
+        self.similarity_service = similarity_service
+        self.last_retrieval: Optional[RetrievalResult] = None
+        self.last_packing: Optional[PackedContext] = None
 
-    async def generate_trajectory(self, playbook: Playbook, task: str) -> str:
+    async def build_prompt(
+        self,
+        playbook: Playbook,
+        task: str,
+        retrieval_options: Optional[RetrievalOptions] = None
+    ) -> str:
+        """
+        Asynchronously constructs the prompt for a given task.
+
+        The prompt includes the current task and the entries from the
+        playbook, or only the most relevant ones if the Generator has a
+        retriever. Entries packed without a retriever are ranked by their
+        similarity to the task first. The retrieval, including its latency, is kept in
+        `last_retrieval`, and the packing, if the Generator has a packer, in
+        `last_packing`.
+
+        Args:
+            playbook: The playbook to be used as context for the language model.
+            task: The task for which to generate a reasoning trajectory.
+            retrieval_options: Options overriding the retriever's defaults
+                               for this request.
+
+        Returns:
+            The prompt.
+        """
+        if self.retriever is not None:
+            self.last_retrieval = await self.retriever.retrieve(playbook, task, retrieval_options)
+            entries = self.last_retrieval.entries
+        elif self.packer is not None:
+            entries = await self._rank_by_task(
+                [entry async for entry in playbook.iter_entries(include_metadata=False, include_embedding=True)],
+                task
+            )
+        else:
+            entries = None
+
+        if self.packer is not None:
+            self.last_packing = await self.packer.pack(playbook.store, entries)
+            section = self.last_packing.render()
+        elif entries is not None:
+            section = self.section_cache.render_entries(entries)
+        else:
+            section = await self.section_cache.render(playbook)
+        return f"Task: {task}\n\nPlaybook:\n{section}"
+
+    async def _rank_by_task(self, entries: List[PlaybookEntry], task: str) -> List[PlaybookEntry]:
+        # Entries are ranked by the similarity of their stored embeddings to
+        # the task; entries without an embedding follow in insertion order.
+        embedded = [row for row, entry in enumerate(entries) if entry.embedding is not None]
+        if not embedded:
+            return entries
+        if self.similarity_service is None:
+            self.similarity_service = get_similarity_service(settings)
+        query = (await self.similarity_service.embed([task]))[0]
+        scores = np.full(len(entries), -np.inf, dtype=np.float32)
+        scores[embedded] = cosine_similarities(query, [entries[row].embedding for row in embedded])
+        return [entries[row] for row in np.argsort(-scores, kind="stable")]
+
+    async def generate_trajectory(
+        self,
+        playbook: Playbook,
+        task: str,
+        retrieval_options: Optional[RetrievalOptions] = None
+    ) -> str:
         """
         Asynchronously generates a reasoning trajectory for a given task.
 
-        This method constructs a comprehensive prompt that includes the current
-        task and all the entries from the playbook. This prompt is then passed
-        to the language model to generate the reasoning trajectory.
+        This method constructs a prompt with `build_prompt` and passes it to
+        the language model to generate the reasoning trajectory.
 
         Args:
             playbook: The playbook to be used as context for the language model.
             task: The task for which to generate a reasoning trajectory.
+            retrieval_options: Options overriding the retriever's defaults
+                               for this request.
 
         Returns:
             A string representing the generated reasoning trajectory.
         """
-        prompt = f"Task: {task}\n\nPlaybook:\n"
-        for entry in await playbook.get_all_entries():
-            prompt += f"- {entry.content}\n"
+        prompt = await self.build_prompt(playbook, task, retrieval_options)
 
         trajectory = await self.llm.generate(prompt)
 
         return trajectory
+
+    async def generate_trajectory_stream(
+        self,
+        playbook: Playbook,
+        task: str,
+        retrieval_options: Optional[RetrievalOptions] = None
+    ) -> AsyncIterator[str]:
+        """
+        Asynchronously generates a reasoning trajectory, yielding it as it is produced.
+
+        Args:
+            playbook: The playbook to be used as context for the language model.
+            task: The task for which to generate a reasoning trajectory.
+            retrieval_options: Options overriding the retriever's defaults
+                               for this request.
+
+        Yields:
+            Consecutive chunks of the trajectory, as streamed by the
+            language model.
+        """
+        prompt = await self.build_prompt(playbook, task, retrieval_options)
+        async for chunk in self.llm.generate_stream(prompt):
+            yield chunk
@@ -0,0 +1,179 @@
+import json
+from typing import Any, Dict, List, Optional
+from ace.logger import get_logger
+
+logger = get_logger(__name__)
+
+def validate_insight(candidate: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validates a parsed insight against the schema the Curator expects.
+
+    An insight is an object with a non-empty string `content` and an
+    optional object `metadata`. Other keys are dropped.
+
+    Args:
+        candidate: The parsed JSON value.
+
+    Returns:
+        The insight, with `metadata` defaulting to an empty dictionary, or
+        None if the value does not match the schema.
+    """
+    if not isinstance(candidate, dict):
+        return None
+    content = candidate.get("content")
+    metadata = candidate.get("metadata", {})
+    if not isinstance(content, str) or not content.strip():
+        return None
+    if metadata is None:
+        metadata = {}
+    if not isinstance(metadata, dict):
+        return None
+    return {"content": content, "metadata": metadata}
+
+def find_insights(value: Any) -> List[Dict[str, Any]]:
+    """
+    Finds the valid insights in a parsed JSON value.
+
+    Models sometimes wrap the array of insights, e.g. in
+    `{"insights": [...]}`. A value that is not an insight itself is searched
+    for nested insights, in order. Objects with a `content` key are taken to
+    be insights and are not searched, so that an invalid insight does not
+    yield insights from its metadata.
+
+    Args:
+        value: The parsed JSON value.
+
+    Returns:
+        The valid insights found, in order.
+    """
+    insight = validate_insight(value)
+    if insight is not None:
+        return [insight]
+    if isinstance(value, dict) and "content" not in value:
+        return [found for nested in value.values() for found in find_insights(nested)]
+    if isinstance(value, list):
+        return [found for item in value for found in find_insights(item)]
+    return []
+
+class InsightStreamParser:
+    """
+    An incremental, fault-tolerant parser for a JSON array of insights.
+
+    The parser is fed the language model's response in chunks, as they are
+    streamed, and returns every insight object as soon as its closing brace
+    arrives. It does not require the response to be valid JSON as a whole:
+    it scans for top-level JSON objects, tracking strings and nesting, and
+    parses each object on its own. Prose or Markdown fences around the array,
+    a missing closing bracket, malformed objects, and a truncated last object
+    therefore only lose the affected objects. An object that does not match
+    the insight schema (see `validate_insight`) is searched for nested
+    insights, so that a wrapper such as `{"insights": [...]}` is unpacked
+    (see `find_insights`); the scan also continues inside a malformed
+    object. Objects that yield no insights are skipped.
+    """
+
+    def __init__(self):
+        """Initializes the parser with an empty buffer."""
+        self._buffer = ""
+        self._position = 0
+        self._object_start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.parsed = 0
+        self.skipped = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Adds a chunk of the response and returns the insights it completed.
+
+        Args:
+            chunk: The next chunk of the response.
+
+        Returns:
+            The valid insights whose objects ended in this chunk, in order.
+        """
+        self._buffer += chunk
+        return self._scan()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Marks the end of the response and returns any insights still recoverable.
+
+        If an object was left open, e.g. because a stray `{` in the
+        surrounding prose was never closed, the rest of the response after
+        it is scanned again.
+
+        Returns:
+            The valid insights recovered after the open object, in order.
+        """
+        insights: List[Dict[str, Any]] = []
+        while self._object_start is not None:
+            restart = self._object_start + 1
+            self._object_start = None
+            self._depth = 0
+            self._in_string = False
+            self._escaped = False
+            self._position = restart
+            insights.extend(self._scan())
+        return insights
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        insights: List[Dict[str, Any]] = []
+        buffer = self._buffer
+        position = self._position - 1
+        while position + 1 < len(buffer):
+            position += 1
+            char = buffer[position]
+            if self._object_start is None:
+                # Between objects, everything but an opening brace is noise.
+                if char == "{":
+                    self._object_start = position
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = self._parse(buffer[self._object_start:position + 1])
+                    if parsed is None:
+                        # The object is malformed; objects nested inside it
+                        # may still be valid, so the scan resumes after its
+                        # opening brace.
+                        position = self._object_start
+                    else:
+                        insights.extend(parsed)
+                    self._object_start = None
+        self._position = len(buffer)
+
+        # Text before an open object is no longer needed.
+        drop = self._object_start if self._object_start is not None else self._position
+        self._buffer = buffer[drop:]
+        self._position -= drop
+        if self._object_start is not None:
+            self._object_start = 0
+        return insights
+
+    def _parse(self, text: str) -> Optional[List[Dict[str, Any]]]:
+        # Returns None if the object is not valid JSON.
+        try:
+            found = find_insights(json.loads(text))
+        except json.JSONDecodeError:
+            found = None
+        if not found:
+            self.skipped += 1
+            logger.warning(f"Skipping an invalid insight in the LLM response: {text[:200]}")
+        else:
+            self.parsed += len(found)
+        return found
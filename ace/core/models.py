@@ -1,7 +1,9 @@
 import uuid
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Any, Sequence
 from ace import database
+from ace.config import settings
+from ace.storage import PlaybookStore, get_playbook_store
 
 @dataclass
 class PlaybookEntry:
@@ -34,17 +36,22 @@ class Playbook:
     The playbook acts as the central knowledge repository for the ACE framework.
     It is a dynamic entity, continuously updated and refined by the Curator.
     This class provides an asynchronous interface for interacting with the
-    playbook data stored in the database.
+    playbook data held by a `PlaybookStore`.
     """
 
-    def __init__(self):
+    def __init__(self, store: Optional[PlaybookStore] = None):
         """
         Initializes the playbook.
 
-        Note: The database connection and table creation should be handled
-        separately at the application's startup.
+        Note: The store's initialization (e.g. table creation) should be
+        handled separately at the application's startup.
+
+        Args:
+            store: The store holding the playbook's data. Defaults to the
+                   application's configured store, so that writes reach its
+                   listeners, version counter, and embedding matrix.
         """
-        pass
+        self.store = store if store is not None else get_playbook_store(settings)
 
     async def add_entry(self, content: str, metadata: Optional[Dict[str, Any]] = None, embedding: Optional[bytes] = None, entry_id: Optional[str] = None) -> PlaybookEntry:
         """
@@ -70,20 +77,93 @@ class Playbook:
         if entry_id is None:
             entry_id = str(uuid.uuid4())
         entry = PlaybookEntry(id=entry_id, content=content, metadata=metadata, embedding=embedding)
-        await database.add_or_update_playbook_entry(entry.id, entry.content, entry.metadata, entry.embedding)
+        await self.add_entries([entry])
         return entry
 
+    async def add_entries(self, entries: List[PlaybookEntry]) -> List[PlaybookEntry]:
+        """
+        Asynchronously adds or updates several entries in one transaction.
+
+        Entries whose `id` already exists in the playbook are updated. Use
+        this instead of calling `add_entry` in a loop, so the whole batch is
+        persisted with a single commit.
+
+        Args:
+            entries: The `PlaybookEntry` objects to persist.
+
+        Returns:
+            The persisted `PlaybookEntry` objects.
+        """
+        await self.store.upsert_entries([
+            {"id": e.id, "content": e.content, "metadata": e.metadata, "embedding": e.embedding}
+            for e in entries
+        ])
+        return entries
+
     async def get_all_entries(self) -> List[PlaybookEntry]:
         """
         Asynchronously retrieves all entries from the playbook.
 
         Returns:
             A list of `PlaybookEntry` objects, representing all the entries
-            currently stored in the database.
+            currently stored in the playbook.
         """
-        all_entries_data = await database.get_all_playbook_entries()
+        all_entries_data = await self.store.get_all_entries()
         return [PlaybookEntry(**data) for data in all_entries_data]
 
+    async def iter_entries(
+        self,
+        include_metadata: bool = True,
+        include_embedding: bool = False,
+        batch_size: int = 500
+    ) -> AsyncIterator[PlaybookEntry]:
+        """
+        Asynchronously iterates over the playbook's entries.
+
+        Unlike `get_all_entries`, this streams the entries from the database
+        in bounded batches, so memory use stays flat as the playbook grows.
+        Columns that are not requested are not read, and the corresponding
+        fields of the yielded entries keep their defaults.
+
+        Args:
+            include_metadata: Whether to read and decode each entry's metadata.
+            include_embedding: Whether to read each entry's embedding.
+            batch_size: The maximum number of entries fetched per query.
+
+        Yields:
+            `PlaybookEntry` objects, in insertion order.
+        """
+        columns = ["id", "content"]
+        if include_metadata:
+            columns.append("metadata")
+        if include_embedding:
+            columns.append("embedding")
+        async for row in self.store.iter_entries(columns, batch_size):
+            yield PlaybookEntry(**row)
+
+    def iter_rows(
+        self,
+        columns: Sequence[str] = ("id", "content", "metadata"),
+        batch_size: int = 500
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        """
+        Asynchronously iterates over the playbook's entries as raw store rows.
+
+        Unlike `iter_entries`, the rows are passed through as the store
+        yields them, without building `PlaybookEntry` objects. Rows of the
+        SQLite stores decode their metadata only when it is accessed, and
+        `ace.database.metadata_json` serializes it without decoding it.
+
+        Args:
+            columns: The columns to read.
+            batch_size: The maximum number of entries fetched per query.
+
+        Returns:
+            An async iterator over mappings of the requested columns, in
+            insertion order.
+        """
+        return self.store.iter_entries(columns, batch_size)
+
     async def get_entry(self, entry_id: str) -> Optional[PlaybookEntry]:
         """
         Asynchronously retrieves a specific entry from the playbook by its ID.
@@ -94,11 +174,34 @@ class Playbook:
         Returns:
             The `PlaybookEntry` object if found, otherwise `None`.
         """
-        # This is not the most efficient way to get a single entry.
-        # A direct database query would be better.
-        # For now, we'll keep it simple.
-        all_entries = await self.get_all_entries()
-        for entry in all_entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        data = await self.store.get_entry(entry_id)
+        return PlaybookEntry(**data) if data is not None else None
+
+    async def get_entries(self, entry_ids: List[str]) -> List[PlaybookEntry]:
+        """
+        Asynchronously retrieves several entries by their IDs in one query.
+
+        Args:
+            entry_ids: The unique identifiers of the entries to retrieve.
+
+        Returns:
+            The `PlaybookEntry` objects that exist, in the order of
+            `entry_ids`.
+        """
+        return [PlaybookEntry(**data) for data in await self.store.get_entries_by_ids(entry_ids)]
+
+    async def get_entry_by_content(self, content: str) -> Optional[PlaybookEntry]:
+        """
+        Asynchronously retrieves the entry with the given content.
+
+        The content is matched after normalization, using the indexed content
+        hash.
+
+        Args:
+            content: The content of the entry to retrieve.
+
+        Returns:
+            The `PlaybookEntry` object if found, otherwise `None`.
+        """
+        data = await self.store.get_entry_by_content_hash(database.content_hash(content))
+        return PlaybookEntry(**data) if data is not None else None
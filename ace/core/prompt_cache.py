@@ -0,0 +1,153 @@
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple, TYPE_CHECKING
+from ace.cache import LRUCache
+from ace.core.models import Playbook, PlaybookEntry
+
+if TYPE_CHECKING:
+    from ace.tokenizer import Tokenizer
+
+class PlaybookSectionCache:
+    """
+    Caches the rendered playbook section of the Generator's prompts.
+
+    The section that lists every playbook entry is rendered once per store
+    and store `version`, and reused until a write through the store changes
+    the version. Under steady read traffic, a prompt then costs only the
+    concatenation of the task with the cached section, instead of a read of
+    the whole playbook and one string concatenation per entry.
+
+    When the entries are packed into a token budget, every prompt lists a
+    different selection of entries, so the section cannot be cached whole.
+    The `ContextPacker` then takes each entry's line and token count from a
+    bounded per-entry fragment cache (see `packed_fragment`), so an entry is
+    only tokenized the first time it is packed.
+
+    Stores are held weakly, so caching a section never keeps a store alive.
+    """
+
+    def __init__(self, fragment_cache_size: int = 10000):
+        """
+        Initializes an empty cache.
+
+        Args:
+            fragment_cache_size: The maximum number of entry fragments, with
+                                 their token counts, kept for packing.
+        """
+        self._sections: 'weakref.WeakKeyDictionary[Any, Tuple[int, str]]' = weakref.WeakKeyDictionary()
+        self.fragments = LRUCache(fragment_cache_size)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fragment(entry: PlaybookEntry) -> str:
+        """
+        Renders a single entry as a line of the playbook section.
+
+        Args:
+            entry: The entry to render.
+
+        Returns:
+            The rendered line, including its newline.
+        """
+        return f"- {entry.content}\n"
+
+    def packed_fragment(self, entry: PlaybookEntry, tokenizer: 'Tokenizer') -> Tuple[str, int]:
+        """
+        Renders an entry and counts its tokens, from the fragment cache if possible.
+
+        Fragments are keyed by the tokenizer's name and the entry's content,
+        so an updated entry is rendered and counted again.
+
+        Args:
+            entry: The entry to render.
+            tokenizer: The tokenizer that counts the line's tokens.
+
+        Returns:
+            A tuple of the rendered line and its number of tokens.
+        """
+        key = (tokenizer.name, entry.content)
+        cached = self.fragments.get(key)
+        if cached is None:
+            line = self.fragment(entry)
+            cached = (line, tokenizer.count(line))
+            self.fragments.put(key, cached)
+        return cached
+
+    def render_entries(self, entries: Iterable[PlaybookEntry]) -> str:
+        """
+        Renders a playbook section listing the given entries.
+
+        Args:
+            entries: The entries to list, in order.
+
+        Returns:
+            The rendered section.
+        """
+        return "".join(self.fragment(entry) for entry in entries)
+
+    async def render(self, playbook: Playbook) -> str:
+        """
+        Returns the playbook section listing every entry of a playbook.
+
+        Args:
+            playbook: The playbook to render.
+
+        Returns:
+            The rendered section, from the cache if the playbook's store has
+            not been written to since it was rendered.
+        """
+        store = playbook.store
+        # The version is read before the entries, so that a write made while
+        # they are read leaves a stale version behind instead of stale text.
+        version = store.version
+        cached = self._sections.get(store)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        section = "".join([self.fragment(entry) async for entry in playbook.iter_entries(include_metadata=False)])
+        self._sections[store] = (version, section)
+        return section
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache's size and hit/miss counters.
+
+        Returns:
+            A dictionary with the number of cached sections, their total
+            length in characters, and their hits and misses; the number of
+            cached fragments and their hits and misses; and the hit rate of
+            section and fragment lookups together.
+        """
+        sections = list(self._sections.values())
+        hits = self.hits + self.fragments.hits
+        lookups = hits + self.misses + self.fragments.misses
+        return {
+            "sections": len(sections),
+            "characters": sum(len(section) for _, section in sections),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fragments": len(self.fragments),
+            "fragment_hits": self.fragments.hits,
+            "fragment_misses": self.fragments.misses,
+            "hit_rate": hits / lookups if lookups else None,
+        }
+
+# A global singleton instance of the PlaybookSectionCache.
+_playbook_section_cache: Optional[PlaybookSectionCache] = None
+
+def get_playbook_section_cache() -> PlaybookSectionCache:
+    """
+    Returns a singleton instance of the PlaybookSectionCache.
+
+    Generators are created per request, so they share this cache to reuse
+    each other's rendered sections.
+
+    Returns:
+        A singleton instance of the `PlaybookSectionCache`.
+    """
+    global _playbook_section_cache
+    if _playbook_section_cache is None:
+        _playbook_section_cache = PlaybookSectionCache()
+    return _playbook_section_cache
@@ -0,0 +1,225 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from ace.cache import LRUCache
+from ace.database import content_hash
+
+class ReflectionCache:
+    """
+    A cache of the insights the Reflector extracted from trajectories.
+
+    Insights are keyed by a version string and the hash of the normalized
+    trajectory (see `ace.database.content_hash`), so a retried or replayed
+    trajectory, or one that differs only in case or whitespace, is reflected
+    on once. The version identifies the Reflector's prompt and language
+    model; changing either starts from an empty cache instead of serving
+    insights produced by the old prompt.
+
+    Like the `EmbeddingCache`, the cache has a bounded in-memory LRU tier and
+    an optional SQLite file that persists insights across restarts. Entries
+    older than the TTL are treated as misses and removed, in both tiers.
+    The SQLite file is bounded too: every `put` deletes its expired rows and
+    then its oldest rows beyond `maxsize`.
+    Insights are stored as JSON, so every lookup returns fresh dictionaries
+    that callers may modify.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        maxsize: int = 1000,
+        ttl_seconds: Optional[float] = 3600,
+        path: Optional[str] = None
+    ):
+        """
+        Initializes the cache.
+
+        Args:
+            version: The version of the Reflector's prompt and model.
+            maxsize: The maximum number of trajectories kept in memory.
+            ttl_seconds: How long cached insights are served, or None to
+                         serve them until they are evicted.
+            path: The SQLite file for the persistent tier, or None to keep
+                  insights in memory only. It holds at most `maxsize` rows.
+        """
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.memory = LRUCache(maxsize)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reflection_cache ("
+                "version TEXT NOT NULL, trajectory_hash TEXT NOT NULL, insights TEXT NOT NULL, "
+                "created_at REAL NOT NULL, PRIMARY KEY (version, trajectory_hash))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS reflection_cache_created_at ON reflection_cache (created_at)"
+            )
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """Whether the cache has a persistent tier."""
+        return self._db is not None
+
+    def _is_fresh(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is None or now - created_at < self.ttl_seconds
+
+    def get(self, trajectory: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Looks up the cached insights of a trajectory.
+
+        Args:
+            trajectory: The trajectory to look up.
+
+        Returns:
+            The insights, or None if the trajectory is not cached or its
+            insights have expired.
+        """
+        key = content_hash(trajectory)
+        now = time.time()
+        with self._lock:
+            cached = self.memory.get(key)
+            if cached is not None:
+                created_at, insights = cached
+                if self._is_fresh(created_at, now):
+                    self.hits += 1
+                    return json.loads(insights)
+                self.memory.pop(key)
+                self.expired += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT insights, created_at FROM reflection_cache WHERE version = ? AND trajectory_hash = ?",
+                    (self.version, key)
+                ).fetchone()
+                if row is not None:
+                    insights, created_at = row
+                    if self._is_fresh(created_at, now):
+                        self.memory.put(key, (created_at, insights))
+                        self.disk_hits += 1
+                        return json.loads(insights)
+                    self._db.execute(
+                        "DELETE FROM reflection_cache WHERE version = ? AND trajectory_hash = ?",
+                        (self.version, key)
+                    )
+                    self._db.commit()
+                    if cached is None:
+                        self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, trajectory: str, insights: List[Dict[str, Any]]):
+        """
+        Caches the insights extracted from a trajectory.
+
+        Args:
+            trajectory: The trajectory that was reflected on.
+            insights: The insights extracted from it.
+        """
+        key = content_hash(trajectory)
+        created_at = time.time()
+        serialized = json.dumps(insights)
+        with self._lock:
+            self.memory.put(key, (created_at, serialized))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reflection_cache (version, trajectory_hash, insights, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.version, key, serialized, created_at)
+                )
+                # Rows of every version are swept, so that the insights of an
+                # old prompt or model do not stay in the file forever.
+                if self.ttl_seconds is not None:
+                    self._db.execute(
+                        "DELETE FROM reflection_cache WHERE created_at < ?", (created_at - self.ttl_seconds,)
+                    )
+                self._db.execute(
+                    "DELETE FROM reflection_cache WHERE rowid IN "
+                    "(SELECT rowid FROM reflection_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.memory.maxsize,)
+                )
+                self._db.commit()
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The fraction of lookups served from either tier, or None before any lookup."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache's size and hit/miss counters.
+
+        Returns:
+            A dictionary with the version, the number of trajectories in
+            memory, the TTL, and the memory hits, disk hits, misses,
+            expirations, and hit rate.
+        """
+        with self._lock:
+            return {
+                "version": self.version,
+                "size": len(self.memory),
+                "maxsize": self.memory.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hit_rate,
+            }
+
+    def close(self):
+        """Closes the persistent tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# A global singleton instance of the ReflectionCache.
+_reflection_cache: Optional[ReflectionCache] = None
+
+def get_reflection_cache(config: Dict[str, Any]) -> Optional[ReflectionCache]:
+    """
+    Returns a singleton instance of the ReflectionCache.
+
+    Reflectors are created per request, so they share this cache to reuse
+    each other's reflections.
+
+    Args:
+        config: A dictionary containing the application configuration. The
+                cache is configured by the `reflection` section, and its
+                version combines the Reflector's `PROMPT_VERSION` with the
+                configured language model.
+
+    Returns:
+        A singleton instance of the `ReflectionCache`, or None if
+        `reflection.cache_size` is 0.
+    """
+    global _reflection_cache
+    reflection_config = config.get('reflection', {})
+    cache_size = reflection_config.get('cache_size', 1000)
+    if cache_size <= 0:
+        return None
+    if _reflection_cache is None:
+        from ace.core.reflector import Reflector
+        model = config.get('language_model', {}).get('name', 'mock')
+        _reflection_cache = ReflectionCache(
+            f"{Reflector.PROMPT_VERSION}:{model}",
+            cache_size,
+            reflection_config.get('cache_ttl_seconds', 3600),
+            reflection_config.get('cache_path')
+        )
+    return _reflection_cache
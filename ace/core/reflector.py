@@ -1,5 +1,7 @@
-from typing import Dict, List, Any
-import json
+import asyncio
+from typing import AsyncIterator, Dict, List, Any, Optional
+from ace.core.insight_parser import InsightStreamParser
+from ace.core.reflection_cache import ReflectionCache
 from ace.llm import LanguageModel
 from ace.logger import get_logger
 
@@ -17,17 +19,61 @@ class Reflector:
     This component uses a language model to perform the analysis, prompting it
     to extract structured information from the unstructured text of the
     trajectory.
+
+    With a `ReflectionCache`, the insights of a trajectory that was already
+    reflected on are returned without calling the language model.
     """
 
-    def __init__(self, llm: LanguageModel):
+    # Identifies the prompt built by `build_prompt` in reflection cache keys.
+    # Bump it whenever the prompt changes, so cached insights are not reused.
+    PROMPT_VERSION = "1"
+
+    def __init__(self, llm: LanguageModel, cache: Optional[ReflectionCache] = None):
         """
         Initializes the Reflector.
 
         Args:
             llm: An instance of a class that implements the `LanguageModel`
                  interface. This model is used to analyze the trajectory.
+            cache: A cache of insights by trajectory. If omitted, every
+                   trajectory is reflected on.
         """
         self.llm = llm
+        self.cache = cache
+
+    async def _cached(self, trajectory: str) -> Optional[List[Dict[str, Any]]]:
+        if self.cache is None:
+            return None
+        if self.cache.persistent:
+            return await asyncio.get_running_loop().run_in_executor(None, self.cache.get, trajectory)
+        return self.cache.get(trajectory)
+
+    async def _store(self, trajectory: str, insights: List[Dict[str, Any]]):
+        # Empty results are not cached, as they are usually the model's
+        # failure to answer in JSON, which a retry may not repeat.
+        if self.cache is None or not insights:
+            return
+        if self.cache.persistent:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.put, trajectory, insights)
+        else:
+            self.cache.put(trajectory, insights)
+
+    @staticmethod
+    def build_prompt(trajectory: str) -> str:
+        """
+        Builds the prompt that asks the language model for insights.
+
+        Args:
+            trajectory: The reasoning trajectory to be analyzed.
+
+        Returns:
+            The prompt.
+        """
+        return (
+            f"Analyze the following trajectory and extract key insights. "
+            f"Return the insights as a JSON list of objects, where each object "
+            f"has 'content' and 'metadata' keys.\n\nTrajectory:\n{trajectory}"
+        )
 
     async def reflect(self, trajectory: str) -> List[Dict[str, Any]]:
         """
@@ -38,29 +84,71 @@ class Reflector:
         output be in a structured JSON format, which can be directly used by
         the Curator.
 
-        The method includes error handling to gracefully manage cases where the
-        language model's response is not valid JSON.
+        The response is parsed with an `InsightStreamParser`, so valid
+        insights are recovered from responses that are not valid JSON as a
+        whole, e.g. because they are wrapped in prose or truncated, and
+        objects that do not match the insight schema are skipped.
 
         Args:
             trajectory: The reasoning trajectory to be analyzed.
 
         Returns:
             A list of insights, where each insight is a dictionary containing
-            'content' and 'metadata'. Returns an empty list if the response
-            from the language model is not valid JSON.
+            'content' and 'metadata', from the cache if the trajectory was
+            already reflected on. Returns an empty list if no valid
+            insight could be recovered from the language model's response.
         """
-        prompt = (
-            f"Analyze the following trajectory and extract key insights. "
-            f"Return the insights as a JSON list of objects, where each object "
-            f"has 'content' and 'metadata' keys.\n\nTrajectory:\n{trajectory}"
-        )
+        cached = await self._cached(trajectory)
+        if cached is not None:
+            return cached
 
-        response_text = await self.llm.generate(prompt)
-
-        try:
-            insights = json.loads(response_text)
-        except json.JSONDecodeError:
-            logger.error(f"Reflector received invalid JSON from LLM: {response_text}")
-            insights = []
+        response_text = await self.llm.generate(self.build_prompt(trajectory))
 
+        parser = InsightStreamParser()
+        insights = parser.feed(response_text) + parser.close()
+        self._log_result(parser, response_text)
+        await self._store(trajectory, insights)
         return insights
+
+    async def reflect_stream(self, trajectory: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyzes a reasoning trajectory, yielding insights as they are generated.
+
+        The language model's response is streamed and parsed incrementally,
+        so each insight is yielded as soon as its JSON object is complete,
+        and the Curator can start on it while the rest is still generated.
+        The insights are the same `reflect` would return for the response,
+        and cached insights are yielded at once.
+
+        Args:
+            trajectory: The reasoning trajectory to be analyzed.
+
+        Yields:
+            Insights, each a dictionary containing 'content' and 'metadata'.
+        """
+        cached = await self._cached(trajectory)
+        if cached is not None:
+            for insight in cached:
+                yield insight
+            return
+
+        parser = InsightStreamParser()
+        chunks = []
+        insights = []
+        async for chunk in self.llm.generate_stream(self.build_prompt(trajectory)):
+            chunks.append(chunk)
+            for insight in parser.feed(chunk):
+                insights.append(insight)
+                yield insight
+        for insight in parser.close():
+            insights.append(insight)
+            yield insight
+        self._log_result(parser, "".join(chunks))
+        await self._store(trajectory, insights)
+
+    @staticmethod
+    def _log_result(parser: InsightStreamParser, response_text: str):
+        if parser.parsed == 0 and response_text.strip() != "[]":
+            logger.error(f"Reflector received no valid insights from LLM: {response_text}")
+        elif parser.skipped:
+            logger.warning(f"Reflector skipped {parser.skipped} invalid insights from LLM")
@@ -0,0 +1,198 @@
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ace.core.models import Playbook, PlaybookEntry
+from ace.embedding_codec import decode_embedding
+from ace.logger import get_logger
+from ace.similarity import SimilarityService, get_similarity_service
+from ace.vector_index import VectorIndex
+
+logger = get_logger(__name__)
+
+@dataclass
+class RetrievalOptions:
+    """
+    Options controlling which playbook entries are retrieved for a task.
+
+    Attributes:
+        top_k: The maximum number of entries to retrieve.
+        min_similarity: If given, only entries whose cosine similarity to the
+                        task exceeds this floor are retrieved.
+        mmr_lambda: If given, entries are selected by maximal marginal
+                    relevance: each pick maximizes `mmr_lambda` times its
+                    similarity to the task minus `1 - mmr_lambda` times its
+                    highest similarity to the entries already picked. 1.0
+                    ranks by relevance only; lower values favor diversity.
+        candidates: The number of most relevant entries MMR chooses from.
+                    Defaults to four times `top_k`.
+    """
+    top_k: int = 20
+    min_similarity: Optional[float] = None
+    mmr_lambda: Optional[float] = None
+    candidates: Optional[int] = None
+
+@dataclass
+class RetrievalResult:
+    """
+    The entries retrieved for a task.
+
+    Attributes:
+        entries: The retrieved entries, in the order they should be presented.
+        scores: The cosine similarity of each entry to the task.
+        candidates: The number of entries that were considered.
+        latency_ms: The time the retrieval took, in milliseconds, including
+                    embedding the task.
+    """
+    entries: List[PlaybookEntry] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    candidates: int = 0
+    latency_ms: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns a JSON-serializable summary of the retrieval, without the entries.
+
+        Returns:
+            A dictionary with the IDs and scores of the retrieved entries, the
+            number of candidates, and the latency.
+        """
+        return {
+            "entry_ids": [entry.id for entry in self.entries],
+            "scores": self.scores,
+            "candidates": self.candidates,
+            "latency_ms": self.latency_ms,
+        }
+
+class Retriever:
+    """
+    Selects the playbook entries most relevant to a task.
+
+    The Retriever embeds the task and ranks the playbook's entries by the
+    cosine similarity of their stored embeddings to it, so that the
+    Generator's prompt holds a bounded number of relevant entries instead of
+    the whole playbook. If the similarity service's resident index holds the
+    playbook's store, the ranking is a query against the index; otherwise
+    the store's embedding matrix is read and ranked.
+
+    Entries without an embedding cannot be ranked and are never retrieved.
+    """
+
+    def __init__(self, config: Dict[str, Any], similarity_service: Optional[SimilarityService] = None):
+        """
+        Initializes the Retriever.
+
+        The default options are read from the `retrieval` section of the
+        configuration.
+
+        Args:
+            config: A dictionary containing the application configuration.
+            similarity_service: The service used to embed tasks and to query
+                                the resident index. Defaults to the
+                                application's similarity service.
+        """
+        self.similarity_service = similarity_service if similarity_service is not None else get_similarity_service(config)
+        retrieval_config = config.get('retrieval', {})
+        self.default_options = RetrievalOptions(
+            top_k=retrieval_config.get('top_k', 20),
+            min_similarity=retrieval_config.get('min_similarity'),
+            mmr_lambda=retrieval_config.get('mmr_lambda'),
+            candidates=retrieval_config.get('candidates')
+        )
+
+    def options(self, **overrides: Any) -> RetrievalOptions:
+        """
+        Returns the default options with some of them overridden.
+
+        Args:
+            **overrides: `RetrievalOptions` fields to override. Fields set to
+                         None keep their default.
+
+        Returns:
+            The resulting options.
+        """
+        return replace(self.default_options, **{k: v for k, v in overrides.items() if v is not None})
+
+    async def _rank(self, playbook: Playbook, query: np.ndarray, k: int, threshold: Optional[float]) -> List[Tuple[str, float]]:
+        if self.similarity_service.index_store is playbook.store:
+            return self.similarity_service.find_similar(query, k, threshold)
+
+        index = VectorIndex()
+        index.load(*await playbook.store.get_embedding_matrix())
+        return index.search(query, k, threshold)
+
+    async def retrieve(self, playbook: Playbook, task: str, options: Optional[RetrievalOptions] = None) -> RetrievalResult:
+        """
+        Retrieves the entries of a playbook most relevant to a task.
+
+        Args:
+            playbook: The playbook to retrieve entries from.
+            task: The task the entries should be relevant to.
+            options: The retrieval options. Defaults to the configured ones.
+
+        Returns:
+            The retrieved entries, most relevant first, or in MMR selection
+            order if MMR is enabled.
+        """
+        options = options or self.default_options
+        start = time.perf_counter()
+        result = RetrievalResult()
+        if options.top_k > 0:
+            query = (await self.similarity_service.embed([task]))[0]
+            use_mmr = options.mmr_lambda is not None
+            pool = (options.candidates or 4 * options.top_k) if use_mmr else options.top_k
+            ranked = await self._rank(playbook, query, max(pool, options.top_k), options.min_similarity)
+            result.candidates = len(ranked)
+
+            entries = {entry.id: entry for entry in await playbook.get_entries([entry_id for entry_id, _ in ranked])}
+            ranked = [(entry_id, score) for entry_id, score in ranked if entry_id in entries]
+            if use_mmr and len(ranked) > options.top_k:
+                ranked = self._mmr(ranked, entries, options.top_k, options.mmr_lambda)
+            ranked = ranked[:options.top_k]
+            result.entries = [entries[entry_id] for entry_id, _ in ranked]
+            result.scores = [score for _, score in ranked]
+
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        logger.debug(
+            f"Retrieved {len(result.entries)} of {result.candidates} candidate entries "
+            f"in {result.latency_ms:.1f} ms"
+        )
+        return result
+
+    @staticmethod
+    def _mmr(
+        ranked: List[Tuple[str, float]],
+        entries: Dict[str, PlaybookEntry],
+        k: int,
+        mmr_lambda: float
+    ) -> List[Tuple[str, float]]:
+        vectors = VectorIndex._normalize(np.stack([decode_embedding(entries[entry_id].embedding) for entry_id, _ in ranked]))
+        relevance = np.array([score for _, score in ranked], dtype=np.float32)
+        pairwise = vectors @ vectors.T
+
+        selected = [0]
+        redundancy = pairwise[0].copy()
+        available = np.ones(len(ranked), dtype=bool)
+        available[0] = False
+        while len(selected) < k:
+            scores = np.where(available, mmr_lambda * relevance - (1 - mmr_lambda) * redundancy, -np.inf)
+            pick = int(np.argmax(scores))
+            selected.append(pick)
+            available[pick] = False
+            redundancy = np.maximum(redundancy, pairwise[pick])
+        return [ranked[row] for row in selected]
+
+def create_retriever(config: Dict[str, Any]) -> Optional[Retriever]:
+    """
+    Factory function to create the Generator's retriever based on the configuration.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        A `Retriever` if `retrieval.enabled` is set, otherwise None, in which
+        case the Generator puts the whole playbook into its prompts.
+    """
+    if not config.get('retrieval', {}).get('enabled', False):
+        return None
+    return Retriever(config)
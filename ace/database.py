@@ -1,41 +1,467 @@
 import aiosqlite
+import asyncio
 import json
-from typing import List, Dict, Any, TYPE_CHECKING
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Sequence, Mapping, TYPE_CHECKING
 import collections
+import collections.abc
+import hashlib
 import numpy as np
+from ace.bloom import BloomFilter
+from ace.cache import LRUCache
 
 if TYPE_CHECKING:
     from ace.similarity import SimilarityService
 
 DATABASE_PATH = "ace_playbook.db"
 
-async def initialize_database():
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "FULL",
+    "busy_timeout": 5000,
+}
+
+class ConnectionPool:
+    """
+    A pool of long-lived aiosqlite connections to a single database file.
+
+    Every aiosqlite connection runs on its own background thread, so opening
+    one per query is expensive. The pool opens a fixed number of reader
+    connections and a single dedicated writer connection up front and hands
+    them out for the lifetime of the application.
+
+    Reads borrow any idle reader connection. Writes are never executed by the
+    caller directly: they are queued to a single writer task, which groups
+    the mutations of concurrent callers into one transaction (bounded by a
+    batch size and a time window) and commits them together. Each caller's
+    `write` call resolves only once the transaction holding its mutation has
+    been committed. Every connection is configured with the given pragmas,
+    which by default put the database in WAL mode so that readers are never
+    blocked by the writer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 4,
+        pragmas: Optional[Dict[str, Any]] = None,
+        max_batch_size: int = 64,
+        max_batch_delay: float = 0.002
+    ):
+        """
+        Initializes the pool. No connections are opened until `open` is called.
+
+        Args:
+            path: The path to the SQLite database file.
+            size: The number of reader connections to keep open.
+            pragmas: The SQLite pragmas to apply to every connection. Defaults
+                     to `DEFAULT_PRAGMAS`.
+            max_batch_size: The maximum number of write operations coalesced
+                            into a single transaction.
+            max_batch_delay: How long, in seconds, the writer waits for more
+                             operations before committing a batch.
+        """
+        self.path = path
+        self.size = max(1, size)
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_delay = max(0.0, max_batch_delay)
+        self.transactions_committed = 0
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._pending_writes: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the pool's connections are currently open."""
+        return self._writer is not None
+
+    async def _connect(self, **kwargs: Any) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.path, **kwargs)
+        connection.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            await connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+    async def open(self):
+        """
+        Opens all connections and starts the writer task.
+        """
+        self._idle_readers = asyncio.Queue()
+        self._pending_writes = asyncio.Queue()
+        # The writer manages its transactions explicitly.
+        self._writer = await self._connect(isolation_level=None)
+        for _ in range(self.size):
+            connection = await self._connect()
+            self._readers.append(connection)
+            self._idle_readers.put_nowait(connection)
+        self._writer_task = asyncio.create_task(self._run_writer())
+
+    async def close(self):
+        """
+        Flushes any queued writes, stops the writer task, and closes every
+        connection owned by the pool.
+        """
+        if self._writer_task is not None:
+            # A writer that already stopped has failed its pending writes.
+            if not self._writer_task.done():
+                self._pending_writes.put_nowait(None)
+                await self._writer_task
+            self._writer_task = None
+        for connection in self._readers:
+            await connection.close()
+        self._readers = []
+        self._idle_readers = None
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrows an idle reader connection for the duration of the block.
+
+        If all reader connections are in use, this waits until one is returned.
+        """
+        connection = await self._idle_readers.get()
+        try:
+            yield connection
+        finally:
+            self._idle_readers.put_nowait(connection)
+
+    async def write(self, operation: Callable[[aiosqlite.Connection], Awaitable[Any]]) -> Any:
+        """
+        Queues a write operation for the writer task and waits until it is
+        committed.
+
+        The operation runs inside a savepoint of a shared transaction, so if
+        it raises, only its own changes are rolled back and the exception is
+        re-raised here; the other operations in the batch are unaffected.
+
+        Args:
+            operation: An async callable that receives the writer connection.
+                       It must not commit or roll back itself.
+
+        Returns:
+            The value returned by `operation`.
+
+        Raises:
+            RuntimeError: If the pool is closed or its writer task has stopped.
+        """
+        if self._writer_task is None or self._writer_task.done():
+            raise RuntimeError("The connection pool's writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.put_nowait((operation, future))
+        return await future
+
+    async def _run_writer(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        batch: List[Any] = []
+        try:
+            while not stopping:
+                item = await self._pending_writes.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = loop.time() + self.max_batch_delay
+                while len(batch) < self.max_batch_size:
+                    try:
+                        item = self._pending_writes.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._pending_writes.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                await self._commit_batch(batch)
+        finally:
+            # The writer can also stop on a BaseException, such as a write
+            # callback raising CancelledError. Fail the writes it will never
+            # commit so that their callers do not wait forever.
+            error = RuntimeError("The connection pool's writer stopped before the write was committed")
+            pending = list(batch)
+            while not self._pending_writes.empty():
+                pending.append(self._pending_writes.get_nowait())
+            for item in pending:
+                if item is not None and not item[1].done():
+                    item[1].set_exception(error)
+
+    async def _commit_batch(self, batch: List[Any]):
+        results = []
+        try:
+            await self._writer.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                await self._writer.execute("SAVEPOINT write_op")
+                try:
+                    results.append((future, await operation(self._writer), None))
+                except Exception as e:
+                    await self._writer.execute("ROLLBACK TO write_op")
+                    results.append((future, None, e))
+                await self._writer.execute("RELEASE write_op")
+            await self._writer.execute("COMMIT")
+        except Exception as e:
+            if self._writer.in_transaction:
+                await self._writer.execute("ROLLBACK")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.transactions_committed += 1
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+# The process-wide connection pools, keyed by database path and opened at
+# application startup.
+_pools: Dict[str, ConnectionPool] = {}
+
+async def open_pool(config: Optional[Dict[str, Any]] = None, path: Optional[str] = None) -> ConnectionPool:
+    """
+    Opens the process-wide connection pool for a database file.
+
+    Once the pool is open, every function in this module borrows its
+    connections from it instead of opening a new one per call, and all
+    writes go through its writer task. The pool is tuned with the
+    `database` settings: `pool_size`, `pragmas`, `write_batch_size`, and
+    `write_batch_delay_ms`. The `entry_cache_size` setting also configures
+    the entry lookup cache (see `configure_entry_cache`).
+
+    Args:
+        config: The application's configuration dictionary.
+        path: The database file to open the pool for. Defaults to
+              `DATABASE_PATH`.
+
+    Returns:
+        The opened connection pool.
+    """
+    path = path or DATABASE_PATH
+    await close_pool(path)
+    db_config = (config or {}).get('database', {})
+    pool = ConnectionPool(
+        path,
+        size=db_config.get('pool_size', 4),
+        pragmas={**DEFAULT_PRAGMAS, **db_config.get('pragmas', {})},
+        max_batch_size=db_config.get('write_batch_size', 64),
+        max_batch_delay=db_config.get('write_batch_delay_ms', 2) / 1000
+    )
+    configure_entry_cache(db_config.get('entry_cache_size', 0))
+    await pool.open()
+    _pools[path] = pool
+    return pool
+
+async def close_pool(path: Optional[str] = None):
+    """
+    Closes the process-wide connection pool for a database file, if one is
+    open.
+
+    Args:
+        path: The database file whose pool to close. Defaults to
+              `DATABASE_PATH`.
+    """
+    pool = _pools.pop(path or DATABASE_PATH, None)
+    if pool is not None:
+        await pool.close()
+
+def _active_pool(path: str) -> Optional[ConnectionPool]:
+    pool = _pools.get(path)
+    if pool is not None and pool.is_open:
+        return pool
+    return None
+
+@asynccontextmanager
+async def _read_connection(path: str) -> AsyncIterator[aiosqlite.Connection]:
+    pool = _active_pool(path)
+    if pool is not None:
+        async with pool.reader() as db:
+            yield db
+    else:
+        async with aiosqlite.connect(path) as db:
+            db.row_factory = aiosqlite.Row
+            yield db
+
+async def _write(operation: Callable[[aiosqlite.Connection], Awaitable[Any]], path: str) -> Any:
+    pool = _active_pool(path)
+    if pool is not None:
+        return await pool.write(operation)
+    async with aiosqlite.connect(path) as db:
+        result = await operation(db)
+        await db.commit()
+        return result
+
+def normalize_content(content: str) -> str:
+    """
+    Normalizes entry content for exact-duplicate detection.
+
+    Leading and trailing whitespace is removed, internal runs of whitespace
+    are collapsed to a single space, and the text is case-folded.
+
+    Args:
+        content: The content to normalize.
+
+    Returns:
+        The normalized content.
+    """
+    return " ".join(content.split()).casefold()
+
+def content_hash(content: str) -> str:
+    """
+    Computes the fixed-width hash used to look up entries by content.
+
+    Args:
+        content: The content to hash. It is normalized first.
+
+    Returns:
+        The SHA-256 hex digest of the normalized content.
+    """
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+# The smallest number of content hashes the Bloom filter is sized for.
+CONTENT_FILTER_MIN_CAPACITY = 100_000
+
+# In-memory Bloom filters over the content hashes stored in each database,
+# used to skip the database entirely for content that is certainly new.
+_content_filters: Dict[str, BloomFilter] = {}
+
+async def rebuild_content_filter(path: Optional[str] = None):
+    """
+    Rebuilds the in-memory content Bloom filter from the database.
+
+    The filter is sized for twice the current number of entries (and at
+    least `CONTENT_FILTER_MIN_CAPACITY`), and is kept up to date as entries
+    are added. It is rebuilt automatically at startup by
+    `initialize_database` and whenever it fills up.
+
+    Note that entries written by other processes are not added to this
+    process's filter; `contents_exist` may then report such content as new,
+    which is caught by the semantic similarity check.
+
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
+    """
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
+        async with db.execute("SELECT content_hash FROM playbook_entries") as cursor:
+            hashes = [row[0] for row in await cursor.fetchall()]
+    content_filter = BloomFilter(max(CONTENT_FILTER_MIN_CAPACITY, 2 * len(hashes)))
+    content_filter.update(hashes)
+    _content_filters[path] = content_filter
+
+# An optional per-process cache of recently looked up entries, keyed by
+# (database path, entry id). Each value is an (entry, content hash) pair.
+_entry_cache: Optional[LRUCache] = None
+
+# The number of times the cached entries of each database file were
+# invalidated. A lookup only caches the rows it read if the generation did
+# not change while it read them, so a row read before a concurrent write is
+# never cached after the write invalidated it.
+_entry_cache_generations: Dict[str, int] = collections.defaultdict(int)
+
+def configure_entry_cache(size: int):
+    """
+    Enables or disables the per-process LRU cache used by entry lookups.
+
+    The cache serves repeated `get_playbook_entry` and
+    `get_playbook_entries_by_ids` lookups of hot entries from memory. It is
+    invalidated by writes made through this module, but not by writes from
+    other processes.
+
+    Args:
+        size: The maximum number of entries to cache, or 0 to disable it.
+    """
+    global _entry_cache
+    _entry_cache = LRUCache(size) if size > 0 else None
+
+def clear_entry_cache(path: Optional[str] = None):
+    """
+    Drops the cached entries of a database file.
+
+    This is needed when another process may have written to the file.
+
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
+    """
+    path = path or DATABASE_PATH
+    _entry_cache_generations[path] += 1
+    if _entry_cache is not None:
+        _entry_cache.discard_where(lambda key, value: key[0] == path)
+
+def _invalidate_cached_entries(path: str, entry_ids: Sequence[str], hashes: Sequence[str] = ()):
+    # An upsert may also replace other entries with the same content.
+    _entry_cache_generations[path] += 1
+    if _entry_cache is not None:
+        ids, hashes = {(path, i) for i in entry_ids}, set(hashes)
+        _entry_cache.discard_where(lambda key, value: key in ids or (key[0] == path and value[1] in hashes))
+
+async def initialize_database(path: Optional[str] = None):
     """
     Initializes the database by creating the necessary tables.
 
     This function sets up the database schema, creating the `playbook_entries`
-    and `clusters` tables if they do not already exist. It should be called
-    at the application's startup to ensure the database is ready for use.
+    and `clusters` tables if they do not already exist, and migrates
+    databases created before the `content_hash` column was introduced. It
+    should be called at the application's startup to ensure the database is
+    ready for use. It also builds the in-memory content Bloom filter.
+
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    path = path or DATABASE_PATH
+
+    async def _create_tables(db: aiosqlite.Connection):
         await db.execute("""
             CREATE TABLE IF NOT EXISTS playbook_entries (
                 id TEXT PRIMARY KEY,
                 content TEXT NOT NULL UNIQUE,
                 metadata TEXT,
                 embedding BLOB,
-                cluster_id INTEGER
+                cluster_id INTEGER,
+                content_hash TEXT
             )
         """)
+        async with db.execute("PRAGMA table_info(playbook_entries)") as cursor:
+            columns = [row[1] for row in await cursor.fetchall()]
+        if "content_hash" not in columns:
+            await db.execute("ALTER TABLE playbook_entries ADD COLUMN content_hash TEXT")
+            async with db.execute("SELECT id, content FROM playbook_entries") as cursor:
+                rows = await cursor.fetchall()
+            await db.executemany(
+                "UPDATE playbook_entries SET content_hash = ? WHERE id = ?",
+                [(content_hash(row[1]), row[0]) for row in rows]
+            )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_playbook_entries_content_hash ON playbook_entries (content_hash)"
+        )
         await db.execute("""
             CREATE TABLE IF NOT EXISTS clusters (
                 id INTEGER PRIMARY KEY,
                 summary TEXT
             )
         """)
-        await db.commit()
 
-async def add_or_update_playbook_entry(entry_id: str, content: str, metadata: Dict[str, Any], embedding: bytes):
+    await _write(_create_tables, path)
+    await rebuild_content_filter(path)
+
+async def add_or_update_playbook_entry(
+    entry_id: str,
+    content: str,
+    metadata: Dict[str, Any],
+    embedding: bytes,
+    path: Optional[str] = None
+):
     """
     Adds a new entry to the playbook or updates an existing one.
 
@@ -48,15 +474,101 @@ async def add_or_update_playbook_entry(entry_id: str, content: str, metadata: Di
         content: The text content of the entry.
         metadata: A dictionary of metadata associated with the entry.
         embedding: The vector embedding of the content, as a byte string.
+        path: The database file. Defaults to `DATABASE_PATH`.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute(
-            "INSERT OR REPLACE INTO playbook_entries (id, content, metadata, embedding) VALUES (?, ?, ?, ?)",
-            (entry_id, content, json.dumps(metadata), embedding)
+    await add_or_update_playbook_entries([
+        {"id": entry_id, "content": content, "metadata": metadata, "embedding": embedding}
+    ], path=path)
+
+async def add_or_update_playbook_entries(entries: List[Dict[str, Any]], path: Optional[str] = None) -> List[str]:
+    """
+    Adds or updates several playbook entries in a single transaction.
+
+    This is the bulk counterpart of `add_or_update_playbook_entry`. All rows
+    are written with one `executemany` call and committed together, so
+    adding a whole batch of insights costs a single commit.
+
+    Content is unique, so a row replaces any other row with the same
+    content, whether it was stored before or comes earlier in
+    the batch. The IDs of the replaced rows are returned, so that callers
+    can drop state derived from them.
+
+    Args:
+        entries: A list of dictionaries, each with `id`, `content`,
+                 `metadata`, and `embedding` keys.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        The IDs of the entries that were replaced by an entry with the same
+        content and a different ID, and therefore no longer exist.
+    """
+    path = path or DATABASE_PATH
+    if not entries:
+        return []
+    rows = [
+        (e['id'], e['content'], json.dumps(e['metadata']), e['embedding'], content_hash(e['content']))
+        for e in entries
+    ]
+
+    # The hashes are added before the write so that the filter never reports
+    # committed content as absent, even while the write is in flight.
+    content_filter = _content_filters.get(path)
+    if content_filter is not None:
+        content_filter.update(row[4] for row in rows)
+
+    # The last row of the batch with a given content is the one that stays.
+    surviving = {row[1]: row[0] for row in rows}
+    written = {row[0] for row in rows}
+    kept = set(surviving.values())
+    replaced_in_batch = [entry_id for entry_id in dict.fromkeys(row[0] for row in rows) if entry_id not in kept]
+
+    async def _upsert(db: aiosqlite.Connection) -> List[str]:
+        async with db.execute(
+            "SELECT id FROM playbook_entries WHERE content IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(surviving)),)
+        ) as cursor:
+            replaced = [row[0] for row in await cursor.fetchall() if row[0] not in written]
+        await db.executemany(
+            "INSERT OR REPLACE INTO playbook_entries (id, content, metadata, embedding, content_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows
         )
-        await db.commit()
+        return replaced
+
+    replaced = await _write(_upsert, path) + replaced_in_batch
+    _invalidate_cached_entries(path, [row[0] for row in rows] + replaced, [row[4] for row in rows])
+
+    if content_filter is not None and content_filter.is_saturated:
+        await rebuild_content_filter(path=path)
+    return replaced
+
+async def delete_playbook_entries(entry_ids: List[str], chunk_size: int = 500, path: Optional[str] = None):
+    """
+    Deletes several playbook entries in a single transaction.
+
+    The content filter is not updated, since Bloom filters cannot remove
+    keys; deleted content is simply reported as possibly present until the
+    filter is next rebuilt, and the exact lookup behind it settles the check.
+
+    Args:
+        entry_ids: The IDs of the entries to delete.
+        chunk_size: The maximum number of IDs deleted per statement.
+        path: The database file. Defaults to `DATABASE_PATH`.
+    """
+    path = path or DATABASE_PATH
+    if not entry_ids:
+        return
+
+    async def _delete(db: aiosqlite.Connection):
+        for start in range(0, len(entry_ids), chunk_size):
+            chunk = entry_ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            await db.execute(f"DELETE FROM playbook_entries WHERE id IN ({placeholders})", chunk)
+
+    await _write(_delete, path)
+    _invalidate_cached_entries(path, entry_ids)
 
-async def get_all_playbook_entries() -> List[Dict[str, Any]]:
+async def get_all_playbook_entries(path: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Retrieves all entries from the playbook.
 
@@ -64,12 +576,15 @@ async def get_all_playbook_entries() -> List[Dict[str, Any]]:
     a list of dictionaries. The `metadata` field is deserialized from a JSON
     string back into a dictionary.
 
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
+
     Returns:
         A list of dictionaries, where each dictionary represents a playbook
         entry.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
         async with db.execute("SELECT id, content, metadata, embedding FROM playbook_entries") as cursor:
             rows = await cursor.fetchall()
 
@@ -80,34 +595,304 @@ async def get_all_playbook_entries() -> List[Dict[str, Any]]:
         entries.append(entry)
     return entries
 
-async def content_exists(content: str) -> bool:
+def _entry_from_row(row: aiosqlite.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+        "embedding": row["embedding"],
+    }
+
+def _copy_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    # Callers get their own copy so they cannot mutate the cached entry.
+    return {**entry, "metadata": dict(entry["metadata"])}
+
+async def get_playbook_entries_by_ids(
+    entry_ids: List[str],
+    chunk_size: int = 500,
+    path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retrieves several entries by their IDs.
+
+    Entries found in the entry cache are served from memory; the rest are
+    fetched through the primary key index with one query per chunk.
+
+    Args:
+        entry_ids: The IDs of the entries to retrieve.
+        chunk_size: The maximum number of IDs looked up per query.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        The entries that exist, in the order of `entry_ids`, as dictionaries
+        with `id`, `content`, `metadata`, and `embedding` keys.
+    """
+    path = path or DATABASE_PATH
+    found: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for entry_id in dict.fromkeys(entry_ids):
+        cached = _entry_cache.get((path, entry_id)) if _entry_cache is not None else None
+        if cached is not None:
+            found[entry_id] = cached[0]
+        else:
+            missing.append(entry_id)
+
+    if missing:
+        generation = _entry_cache_generations[path]
+        async with _read_connection(path) as db:
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                async with db.execute(
+                    f"SELECT id, content, metadata, embedding, content_hash FROM playbook_entries "
+                    f"WHERE id IN ({placeholders})",
+                    chunk
+                ) as cursor:
+                    for row in await cursor.fetchall():
+                        entry = _entry_from_row(row)
+                        found[entry["id"]] = entry
+                        if _entry_cache is not None and _entry_cache_generations[path] == generation:
+                            _entry_cache.put((path, entry["id"]), (entry, row["content_hash"]))
+
+    return [_copy_entry(found[entry_id]) for entry_id in entry_ids if entry_id in found]
+
+async def get_playbook_entry(entry_id: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves a single entry by its ID.
+
+    Args:
+        entry_id: The ID of the entry to retrieve.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        The entry as a dictionary with `id`, `content`, `metadata`, and
+        `embedding` keys, or None if it does not exist.
+    """
+    entries = await get_playbook_entries_by_ids([entry_id], path=path)
+    return entries[0] if entries else None
+
+async def get_playbook_entry_by_content_hash(digest: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves the entry whose normalized content has the given hash.
+
+    Args:
+        digest: A content hash, as computed by `content_hash`.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        The entry as a dictionary with `id`, `content`, `metadata`, and
+        `embedding` keys, or None if no entry has that content.
+    """
+    path = path or DATABASE_PATH
+    content_filter = _content_filters.get(path)
+    if content_filter is not None and digest not in content_filter:
+        return None
+    async with _read_connection(path) as db:
+        async with db.execute(
+            "SELECT id, content, metadata, embedding FROM playbook_entries WHERE content_hash = ? LIMIT 1",
+            (digest,)
+        ) as cursor:
+            row = await cursor.fetchone()
+    return _entry_from_row(row) if row is not None else None
+
+# The columns of `playbook_entries` that can be selected when iterating.
+ENTRY_COLUMNS = ("id", "content", "metadata", "embedding", "cluster_id", "content_hash")
+
+class PlaybookRow(collections.abc.Mapping):
+    """
+    A read-only view of one playbook row.
+
+    The `metadata` column is stored as JSON; it is only decoded the first
+    time it is accessed, so callers that never look at it do not pay for
+    decoding it.
+    """
+
+    __slots__ = ("_values", "_metadata")
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values = values
+        self._metadata = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "metadata" and "metadata" in self._values:
+            if self._metadata is None:
+                raw = self._values["metadata"]
+                self._metadata = json.loads(raw) if raw else {}
+            return self._metadata
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def metadata_json(self) -> str:
+        """
+        Returns the row's metadata as JSON text, without decoding it.
+
+        Returns:
+            The stored JSON text, or `{}` if the row has no metadata.
+        """
+        if self._metadata is not None:
+            return json.dumps(self._metadata)
+        return self._values["metadata"] or "{}"
+
+def metadata_json(row: Mapping[str, Any]) -> str:
+    """
+    Returns the metadata of a playbook row as JSON text.
+
+    The stored text of a `PlaybookRow` is returned as is, so serializing a
+    row does not pay for decoding and re-encoding its metadata.
+
+    Args:
+        row: A row yielded by a store's `iter_entries`, with a `metadata` column.
+
+    Returns:
+        The row's metadata as JSON text.
+    """
+    if isinstance(row, PlaybookRow):
+        return row.metadata_json()
+    return json.dumps(row["metadata"])
+
+async def iter_playbook_entries(
+    columns: Sequence[str] = ("id", "content", "metadata"),
+    batch_size: int = 500,
+    path: Optional[str] = None
+) -> AsyncIterator[PlaybookRow]:
+    """
+    Asynchronously iterates over the playbook entries in insertion order.
+
+    Rows are fetched in batches of at most `batch_size` using keyset
+    pagination on the rowid, and only the requested columns are read, so
+    memory use stays flat regardless of the size of the playbook. Embeddings
+    are not read unless `embedding` is explicitly requested. A connection is
+    only held while a batch is being fetched, so the caller may freely use
+    the database while iterating.
+
+    Args:
+        columns: The columns to select, from `ENTRY_COLUMNS`.
+        batch_size: The maximum number of rows fetched per query.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Yields:
+        A `PlaybookRow` for each entry, with lazily decoded metadata.
+
+    Raises:
+        ValueError: If an unknown column is requested.
+    """
+    path = path or DATABASE_PATH
+    unknown = set(columns) - set(ENTRY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown playbook entry columns: {sorted(unknown)}")
+    column_list = ", ".join(columns)
+
+    last_rowid = 0
+    while True:
+        async with _read_connection(path) as db:
+            async with db.execute(
+                f"SELECT rowid, {column_list} FROM playbook_entries WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield PlaybookRow(dict(zip(columns, tuple(row)[1:])))
+        last_rowid = rows[-1][0]
+
+async def get_embedded_content_hashes(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Retrieves the content hash of every entry that has an embedding.
+
+    This is a cheap fingerprint of the embedded entries, used to check
+    derived embedding files against the database.
+
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        A dictionary mapping entry IDs to their content hashes.
+    """
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
+        async with db.execute(
+            "SELECT id, content_hash FROM playbook_entries WHERE embedding IS NOT NULL"
+        ) as cursor:
+            return {row[0]: row[1] for row in await cursor.fetchall()}
+
+async def content_exists(content: str, path: Optional[str] = None) -> bool:
     """
     Checks if an entry with the given content already exists in the playbook.
 
+    Content is compared after normalization (see `normalize_content`).
+
     Args:
         content: The content to check for.
+        path: The database file. Defaults to `DATABASE_PATH`.
 
     Returns:
         True if an entry with the specified content exists, False otherwise.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        async with db.execute("SELECT 1 FROM playbook_entries WHERE content = ?", (content,)) as cursor:
-            row = await cursor.fetchone()
-            return row is not None
+    return (await contents_exist([content], path=path))[0]
 
-async def update_entry_cluster(entry_id: str, cluster_id: int):
+async def contents_exist(
+    contents: List[str],
+    chunk_size: int = 500,
+    path: Optional[str] = None
+) -> List[bool]:
+    """
+    Checks which of the given contents already exist in the playbook.
+
+    Each content is hashed and first checked against the in-memory Bloom
+    filter; only contents that may be present are looked up in the database,
+    using the indexed `content_hash` column and one query per chunk.
+
+    Args:
+        contents: The contents to check for.
+        chunk_size: The maximum number of hashes looked up per query.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        A list of booleans, aligned with `contents`, that are True where an
+        entry with that content exists.
+    """
+    path = path or DATABASE_PATH
+    hashes = [content_hash(content) for content in contents]
+    content_filter = _content_filters.get(path)
+    candidates = list({h for h in hashes if content_filter is None or h in content_filter})
+
+    found = set()
+    if candidates:
+        async with _read_connection(path) as db:
+            for start in range(0, len(candidates), chunk_size):
+                chunk = candidates[start:start + chunk_size]
+                placeholders = ", ".join("?" * len(chunk))
+                async with db.execute(
+                    f"SELECT content_hash FROM playbook_entries WHERE content_hash IN ({placeholders})",
+                    chunk
+                ) as cursor:
+                    found.update(row[0] for row in await cursor.fetchall())
+    return [h in found for h in hashes]
+
+async def update_entry_cluster(entry_id: str, cluster_id: int, path: Optional[str] = None):
     """
     Updates the cluster ID for a specific playbook entry.
 
     Args:
         entry_id: The ID of the playbook entry to update.
         cluster_id: The new cluster ID to assign to the entry.
+        path: The database file. Defaults to `DATABASE_PATH`.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    path = path or DATABASE_PATH
+
+    async def _update(db: aiosqlite.Connection):
         await db.execute("UPDATE playbook_entries SET cluster_id = ? WHERE id = ?", (cluster_id, entry_id))
-        await db.commit()
 
-async def add_or_update_cluster_summary(cluster_id: int, summary: str):
+    await _write(_update, path)
+    _invalidate_cached_entries(path, [entry_id])
+
+async def add_or_update_cluster_summary(cluster_id: int, summary: str, path: Optional[str] = None):
     """
     Adds a new cluster summary or updates an existing one.
 
@@ -117,65 +902,164 @@ async def add_or_update_cluster_summary(cluster_id: int, summary: str):
     Args:
         cluster_id: The ID of the cluster.
         summary: The new summary for the cluster.
+        path: The database file. Defaults to `DATABASE_PATH`.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    path = path or DATABASE_PATH
+
+    async def _upsert(db: aiosqlite.Connection):
         await db.execute("INSERT OR REPLACE INTO clusters (id, summary) VALUES (?, ?)", (cluster_id, summary))
-        await db.commit()
+
+    await _write(_upsert, path)
+
+async def assign_clusters(
+    assignments: Dict[str, int],
+    summaries: Optional[Dict[int, str]] = None,
+    keep_clusters: Sequence[int] = (),
+    path: Optional[str] = None
+):
+    """
+    Replaces all cluster assignments, and optionally their summaries, in a
+    single transaction.
+
+    Every entry listed in `assignments` is moved to its new cluster and every
+    other entry is left unassigned. Cluster rows that are neither assigned
+    to an entry, given a summary, nor listed in `keep_clusters` are deleted,
+    so the `clusters` table never holds stale clusters.
+
+    Args:
+        assignments: A mapping of entry IDs to their new cluster IDs.
+        summaries: An optional mapping of cluster IDs to their summaries.
+        keep_clusters: Additional cluster IDs whose rows must be kept, e.g.
+                       because their entries are stored in another database.
+        path: The database file. Defaults to `DATABASE_PATH`.
+    """
+    path = path or DATABASE_PATH
+    live_clusters = set(assignments.values()) | set(summaries or {}) | set(keep_clusters)
+
+    async def _assign(db: aiosqlite.Connection):
+        await db.execute("UPDATE playbook_entries SET cluster_id = NULL WHERE cluster_id IS NOT NULL")
+        await db.executemany(
+            "UPDATE playbook_entries SET cluster_id = ? WHERE id = ?",
+            [(cluster_id, entry_id) for entry_id, cluster_id in assignments.items()]
+        )
+        if summaries:
+            await db.executemany(
+                "INSERT OR REPLACE INTO clusters (id, summary) VALUES (?, ?)",
+                list(summaries.items())
+            )
+        await db.execute(
+            "DELETE FROM clusters WHERE id NOT IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(live_clusters)),)
+        )
+
+    await _write(_assign, path)
+    clear_entry_cache(path)
 
 async def is_similar_embedding_present(
     similarity_service: 'SimilarityService',
     embedding: np.ndarray,
-    batch_size: int = 100
+    batch_size: int = 1000,
+    path: Optional[str] = None
 ) -> bool:
     """
     Checks if a similar embedding exists in the database, processing in batches.
 
-    This function is designed to be memory-efficient by fetching and comparing
-    embeddings in smaller batches rather than loading all of them into memory
-    at once.
+    This function streams the stored embeddings over a single cursor on one
+    connection, comparing them one batch at a time, so memory use is bounded
+    by `batch_size` and every row is read exactly once. The scan stops as
+    soon as a similar embedding is found.
 
     Args:
         similarity_service: The similarity service to use for the check.
         embedding: The embedding to check for similarity.
         batch_size: The number of embeddings to fetch from the database at a time.
+        path: The database file. Defaults to `DATABASE_PATH`.
 
     Returns:
         True if a similar embedding is found, False otherwise.
     """
-    offset = 0
-    while True:
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            db.row_factory = aiosqlite.Row
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
+        async with db.execute(
+            "SELECT embedding FROM playbook_entries WHERE embedding IS NOT NULL ORDER BY rowid"
+        ) as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    return False
+
+                if similarity_service.is_similar_encoded(embedding, [row[0] for row in rows]):
+                    return True
+
+async def get_entry_cluster_ids(
+    entry_ids: List[str],
+    chunk_size: int = 500,
+    path: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Looks up the clusters of several entries.
+
+    Args:
+        entry_ids: The IDs of the entries.
+        chunk_size: The maximum number of IDs looked up per query.
+        path: The database file. Defaults to `DATABASE_PATH`.
+
+    Returns:
+        A dictionary mapping the ID of every entry that belongs to a cluster
+        to its cluster ID.
+    """
+    path = path or DATABASE_PATH
+    clusters: Dict[str, int] = {}
+    unique = list(dict.fromkeys(entry_ids))
+    async with _read_connection(path) as db:
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
             async with db.execute(
-                "SELECT embedding FROM playbook_entries WHERE embedding IS NOT NULL LIMIT ? OFFSET ?",
-                (batch_size, offset)
+                f"SELECT id, cluster_id FROM playbook_entries "
+                f"WHERE cluster_id IS NOT NULL AND id IN ({placeholders})",
+                chunk
             ) as cursor:
-                rows = await cursor.fetchall()
-
-        if not rows:
-            break
+                clusters.update((row[0], row[1]) for row in await cursor.fetchall())
+    return clusters
 
-        existing_embeddings = [np.frombuffer(row['embedding'], dtype=np.float32) for row in rows]
-        if similarity_service.is_similar(embedding, existing_embeddings):
-            return True
+async def get_cluster_summaries(cluster_ids: List[int], path: Optional[str] = None) -> Dict[int, str]:
+    """
+    Retrieves the summaries of several clusters.
 
-        offset += batch_size
+    Args:
+        cluster_ids: The IDs of the clusters.
+        path: The database file. Defaults to `DATABASE_PATH`.
 
-    return False
+    Returns:
+        A dictionary mapping the ID of every cluster that has a summary to
+        that summary.
+    """
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
+        async with db.execute(
+            "SELECT id, summary FROM clusters "
+            "WHERE summary IS NOT NULL AND summary != '' AND id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(set(cluster_ids))),)
+        ) as cursor:
+            return {row[0]: row[1] for row in await cursor.fetchall()}
 
-async def get_all_clusters_with_entries() -> Dict[int, Dict[str, Any]]:
+async def get_all_clusters_with_entries(path: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
     """
     Retrieves all clusters, their summaries, and their associated entries.
 
     This function queries the database to build a nested dictionary that maps
     cluster IDs to their summaries and a list of their member entries.
 
+    Args:
+        path: The database file. Defaults to `DATABASE_PATH`.
+
     Returns:
         A dictionary where keys are cluster IDs and values are dictionaries
         containing the cluster's summary and a list of its entries.
     """
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    path = path or DATABASE_PATH
+    async with _read_connection(path) as db:
         async with db.execute("SELECT id, summary FROM clusters") as cursor:
             clusters_rows = await cursor.fetchall()
 
@@ -0,0 +1,115 @@
+import asyncio
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+class EmbeddingBatcher:
+    """
+    Gathers embedding requests from concurrent callers into micro-batches.
+
+    Encoding a batch of texts costs little more than encoding one, but the
+    encoder is synchronous and would block the event loop. The batcher
+    therefore queues every request and lets a single worker task merge the
+    queued requests, up to `max_batch_size` texts or until `max_wait`
+    seconds have passed since the first of them, and encode each merged
+    batch in the default executor. Every caller then receives its own slice
+    of the result.
+
+    The worker is started on first use and is bound to the running event
+    loop; if the batcher is later used from another loop, it starts a new
+    worker there.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait: float = 0.005
+    ):
+        """
+        Initializes the batcher.
+
+        Args:
+            encode: A synchronous function that embeds a list of texts and
+                    returns a matrix with one embedding per text.
+            max_batch_size: The number of texts at which a batch is encoded
+                            without waiting for more requests.
+            max_wait: The maximum time, in seconds, a request waits for
+                      other requests to be batched with.
+        """
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches_encoded = 0
+        self.texts_encoded = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_task: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker_task is None or self._worker_task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker_task = loop.create_task(self._run_worker())
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds several texts, batched with other concurrent requests.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A matrix with one embedding per text, in order.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((list(texts), future))
+        return await future
+
+    async def close(self):
+        """Stops the worker task, if it runs on the current event loop."""
+        task, self._worker_task = self._worker_task, None
+        if task is not None and not task.done() and self._loop is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run_worker(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch: List[Tuple[List[str], asyncio.Future]] = [await queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                embeddings = await loop.run_in_executor(None, self.encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_encoded += 1
+            self.texts_encoded += len(texts)
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from ace.cache import LRUCache
+from ace.database import content_hash
+from ace.embedding_codec import decode_embedding, encode_embedding
+
+class EmbeddingCache:
+    """
+    A content-addressed cache of text embeddings.
+
+    Embeddings are keyed by the model name and the hash of the normalized
+    text (see `ace.database.content_hash`), so texts that differ only in
+    case or whitespace share one entry. The cache has two tiers: a bounded
+    in-memory LRU tier, and an optional SQLite file that persists embeddings
+    across restarts. Embeddings found on disk are promoted to memory.
+
+    The cache is used from the embedding worker's executor thread, so the
+    SQLite tier uses the synchronous `sqlite3` module, and every method is
+    guarded by a lock.
+    """
+
+    def __init__(self, model_name: str, maxsize: int = 10000, path: Optional[str] = None):
+        """
+        Initializes the cache.
+
+        Args:
+            model_name: The name of the model whose embeddings are cached.
+            maxsize: The maximum number of embeddings kept in memory.
+            path: The SQLite file for the persistent tier, or None to keep
+                  embeddings in memory only.
+        """
+        self.model_name = model_name
+        self.path = path
+        self.memory = LRUCache(maxsize)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+            self._db.commit()
+
+    def get_many(self, texts: Sequence[str], chunk_size: int = 500) -> List[Optional[np.ndarray]]:
+        """
+        Looks up the cached embeddings of several texts.
+
+        Args:
+            texts: The texts to look up.
+            chunk_size: The maximum number of hashes looked up per query in
+                        the persistent tier.
+
+        Returns:
+            A list aligned with `texts`, holding each text's embedding, or
+            None if it is not cached.
+        """
+        keys = [content_hash(text) for text in texts]
+        with self._lock:
+            results = [self.memory.get(key) for key in keys]
+            self.hits += sum(result is not None for result in results)
+
+            missing = [key for key, result in zip(keys, results) if result is None]
+            if self._db is not None and missing:
+                found: Dict[str, np.ndarray] = {}
+                unique = list(dict.fromkeys(missing))
+                for start in range(0, len(unique), chunk_size):
+                    chunk = unique[start:start + chunk_size]
+                    placeholders = ", ".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT text_hash, embedding FROM embedding_cache "
+                        f"WHERE model = ? AND text_hash IN ({placeholders})",
+                        [self.model_name, *chunk]
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = self._freeze(decode_embedding(blob))
+                        self.memory.put(key, found[key])
+                for i, key in enumerate(keys):
+                    if results[i] is None and key in found:
+                        results[i] = found[key]
+                        self.disk_hits += 1
+
+            self.misses += sum(result is None for result in results)
+        return results
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[np.ndarray]):
+        """
+        Caches the embeddings of several texts.
+
+        Args:
+            texts: The texts that were embedded.
+            embeddings: The embeddings, aligned with `texts`.
+        """
+        keys = [content_hash(text) for text in texts]
+        frozen = [self._freeze(np.asarray(embedding, dtype=np.float32)) for embedding in embeddings]
+        with self._lock:
+            for key, embedding in zip(keys, frozen):
+                self.memory.put(key, embedding)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, text_hash, embedding) VALUES (?, ?, ?)",
+                    [(self.model_name, key, encode_embedding(embedding)) for key, embedding in zip(keys, frozen)]
+                )
+                self._db.commit()
+
+    @staticmethod
+    def _freeze(embedding: np.ndarray) -> np.ndarray:
+        # Cached arrays are shared between callers, so they must not change.
+        embedding = embedding.copy()
+        embedding.flags.writeable = False
+        return embedding
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The fraction of lookups served from either tier, or None before any lookup."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache's size and hit/miss counters.
+
+        Returns:
+            A dictionary with the model name, the number of embeddings in
+            memory, and the memory hits, disk hits, misses, and hit rate.
+        """
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "size": len(self.memory),
+                "maxsize": self.memory.maxsize,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+            }
+
+    def close(self):
+        """Closes the persistent tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
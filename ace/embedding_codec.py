@@ -0,0 +1,211 @@
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# The header written in front of every encoded embedding: a magic marker,
+# the format version, the dtype code, the dimension, the L2 norm of the
+# original vector, and the int8 quantization scale.
+HEADER = struct.Struct("<2sBBIff")
+MAGIC = b"AE"
+VERSION = 1
+
+DTYPE_CODES: Dict[str, int] = {"float32": 0, "float16": 1, "int8": 2}
+DTYPES_BY_CODE: Dict[int, np.dtype] = {
+    0: np.dtype(np.float32),
+    1: np.dtype(np.float16),
+    2: np.dtype(np.int8),
+}
+
+@dataclass
+class EncodedEmbedding:
+    """
+    A stored embedding in its compact form, before dequantization.
+
+    Attributes:
+        values: The stored components, in the stored dtype.
+        norm: The L2 norm of the original float32 vector.
+        scale: The factor that maps int8 components back to floats (1.0 for
+               float dtypes).
+    """
+    values: np.ndarray
+    norm: float
+    scale: float
+
+    @property
+    def dtype(self) -> str:
+        """The name of the stored dtype."""
+        return self.values.dtype.name
+
+def encode_embedding(embedding: np.ndarray, dtype: str = "float32") -> bytes:
+    """
+    Serializes an embedding with a header describing its layout.
+
+    The header records the dtype, the dimension, and the L2 norm of the
+    vector, so readers never have to guess the layout and similarity checks
+    do not have to recompute norms. With `float16` or `int8` the components
+    are quantized, which makes the stored embedding 2x or 4x smaller. `int8`
+    uses symmetric scalar quantization with one scale per vector.
+
+    Args:
+        embedding: The embedding to serialize.
+        dtype: The storage dtype: `float32`, `float16`, or `int8`.
+
+    Returns:
+        The encoded embedding.
+
+    Raises:
+        ValueError: If the dtype is not supported.
+    """
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    scale = 1.0
+    if dtype == "int8":
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        values = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    else:
+        values = vector.astype(dtype)
+    return HEADER.pack(MAGIC, VERSION, DTYPE_CODES[dtype], vector.size, norm, scale) + values.tobytes()
+
+def parse_embedding(blob: bytes) -> EncodedEmbedding:
+    """
+    Parses a stored embedding without dequantizing it.
+
+    Blobs written before the encoding was introduced, which are raw float32
+    bytes without a header, are also accepted.
+
+    Args:
+        blob: The stored embedding.
+
+    Returns:
+        The embedding in its stored form. The values are a read-only view
+        of `blob`, so no data is copied.
+    """
+    if len(blob) >= HEADER.size and blob[:2] == MAGIC:
+        magic, version, code, dim, norm, scale = HEADER.unpack_from(blob)
+        dtype = DTYPES_BY_CODE.get(code)
+        if version == VERSION and dtype is not None and len(blob) == HEADER.size + dim * dtype.itemsize:
+            values = np.frombuffer(blob, dtype=dtype, offset=HEADER.size, count=dim)
+            return EncodedEmbedding(values, norm, scale)
+    values = np.frombuffer(blob, dtype=np.float32)
+    return EncodedEmbedding(values, float(np.linalg.norm(values)), 1.0)
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """
+    Deserializes a stored embedding into a float32 vector.
+
+    Args:
+        blob: The stored embedding, with or without a header.
+
+    Returns:
+        The (dequantized) embedding.
+    """
+    encoded = parse_embedding(blob)
+    if encoded.dtype == "float32":
+        return encoded.values
+    return encoded.values.astype(np.float32) * np.float32(encoded.scale)
+
+# The number of quantized rows widened to float32 at a time, so the widened
+# copy stays small enough to remain in cache during the matrix product.
+WIDEN_CHUNK_ROWS = 256
+
+def _record_dtype(dtype: np.dtype, dim: int) -> np.dtype:
+    """
+    Builds a structured dtype matching the layout of an encoded embedding.
+
+    Args:
+        dtype: The stored dtype of the components.
+        dim: The dimension of the embedding.
+
+    Returns:
+        A dtype whose records are laid out exactly like `HEADER` followed by
+        the components.
+    """
+    return np.dtype([
+        ("magic", "S2"),
+        ("version", "u1"),
+        ("code", "u1"),
+        ("dim", "<u4"),
+        ("norm", "<f4"),
+        ("scale", "<f4"),
+        ("values", dtype.newbyteorder("<"), (dim,)),
+    ])
+
+def _dot_products(values: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Multiplies stored components with a float32 query.
+
+    Args:
+        values: The stored components, one row per embedding.
+        query: The query embedding.
+
+    Returns:
+        The dot product of each row with the query.
+    """
+    if values.dtype == np.float32:
+        return values @ query
+    dots = np.empty(len(values), dtype=np.float32)
+    for start in range(0, len(values), WIDEN_CHUNK_ROWS):
+        chunk = values[start:start + WIDEN_CHUNK_ROWS]
+        dots[start:start + len(chunk)] = chunk.astype(np.float32) @ query
+    return dots
+
+def cosine_similarities(query: np.ndarray, blobs: Sequence[bytes]) -> np.ndarray:
+    """
+    Computes the cosine similarity between a query and stored embeddings.
+
+    Embeddings with the same header prefix and size are concatenated and
+    read as one array of records, so their headers are parsed in bulk
+    rather than one blob at a time. The matrix product itself always runs
+    in float32: `float16` and `int8` rows are widened a few hundred rows at
+    a time, int8 scales are applied to the resulting dot products, and the
+    norms are read from the headers instead of being recomputed. Quantized
+    storage therefore mainly saves space and bytes read; `int8` rows are
+    also cheaper to gather, while widening `float16` costs about as much as
+    it saves.
+
+    Args:
+        query: The query embedding.
+        blobs: The stored embeddings.
+
+    Returns:
+        An array with the cosine similarity of the query to each embedding,
+        aligned with `blobs`. Embeddings of another dimension score 0.
+    """
+    query = np.asarray(query, dtype=np.float32).ravel()
+    query_norm = float(np.linalg.norm(query))
+    similarities = np.zeros(len(blobs), dtype=np.float32)
+    if query_norm == 0 or not blobs:
+        return similarities
+
+    # Group the embeddings by header prefix and size: every blob in a group
+    # with a valid header has the same dtype and dimension.
+    groups: Dict[Tuple[bytes, int], List[int]] = {}
+    for i, blob in enumerate(blobs):
+        groups.setdefault((bytes(blob[:4]), len(blob)), []).append(i)
+
+    for (prefix, size), indices in groups.items():
+        dtype = DTYPES_BY_CODE.get(prefix[3]) if len(prefix) == 4 else None
+        if (prefix[:2] == MAGIC and prefix[2] == VERSION and dtype is not None
+                and size == HEADER.size + query.size * dtype.itemsize):
+            records = np.frombuffer(b"".join(blobs[i] for i in indices),
+                                    dtype=_record_dtype(dtype, query.size))
+            values, norms, scales = records["values"], records["norm"], records["scale"]
+        else:
+            # Legacy raw float32 blobs, or blobs of another dimension.
+            parsed = [parse_embedding(blobs[i]) for i in indices]
+            kept = [row for row, encoded in enumerate(parsed) if encoded.values.size == query.size]
+            if not kept:
+                continue
+            indices = [indices[row] for row in kept]
+            values = np.stack([parsed[row].values.astype(np.float32, copy=False) for row in kept])
+            norms = np.array([parsed[row].norm for row in kept], dtype=np.float32)
+            scales = np.array([parsed[row].scale for row in kept], dtype=np.float32)
+        dots = _dot_products(values, query)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(norms > 0, dots * scales / (norms * query_norm), 0.0)
+        similarities[indices] = scores
+    return similarities
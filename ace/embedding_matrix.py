@@ -0,0 +1,340 @@
+import contextlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+class EmbeddingMatrix:
+    """
+    An append-only, memory-mapped matrix of playbook embeddings.
+
+    The matrix is kept in two files next to the database file: a `.vectors`
+    file holding the float32 embeddings as one contiguous row-major matrix,
+    and a `.rows.jsonl` log recording which entry each row belongs to. The
+    first line of the log records the dimension; every following line either
+    appends a row (`{"id": ..., "hash": ...}`) or deletes an entry
+    (`{"delete": ...}`). Updating an entry appends a new row and leaves the
+    old one dead.
+
+    Because the vectors are memory-mapped, similarity checks and clustering
+    read them without decoding or copying one database row at a time. Dead
+    rows accumulate until `compact` rewrites the files.
+
+    Several processes may share the files, e.g. the API server and the CLI.
+    Every write and every rewrite takes an exclusive lock on a `.lock` file.
+    Before each write or read, the matrix compares the files' identity and
+    size with the ones it last loaded or wrote. If another process changed
+    them, it reloads the log, so its row indices always match the vectors.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the matrix, loading it from disk if it exists.
+
+        Args:
+            path: The path of the database file the matrix belongs to. The
+                  sidecar files are named after it.
+        """
+        self.path = path
+        self.vectors_path = path + ".vectors"
+        self.rows_path = path + ".rows.jsonl"
+        self.lock_path = path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+        self._file_state: Optional[Tuple] = None
+        self.load()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Holds an exclusive lock on the sidecar files, across processes
+        # through `flock` and across threads through a re-entrant lock.
+        with self._thread_lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_file = open(self.lock_path, "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _stat_files(self) -> Tuple:
+        state = []
+        for path in (self.rows_path, self.vectors_path):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_ino, stat.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def _sync(self):
+        # Reloads the log if another process appended to or rewrote the
+        # files since this instance last loaded or wrote them.
+        if self._stat_files() != self._file_state:
+            self.load()
+
+    def load(self):
+        """Reads the row log and maps the vectors file."""
+        with self._locked():
+            self._load()
+            self._file_state = self._stat_files()
+
+    def _load(self):
+        self.dim: Optional[int] = None
+        self.corrupt = False
+        self._row_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._hashes: Dict[str, str] = {}
+        self._mmap: Optional[np.memmap] = None
+        if not os.path.exists(self.rows_path):
+            return
+
+        with open(self.rows_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn write at the end of the log; the size check
+                    # below decides whether the matrix is still usable.
+                    self.corrupt = True
+                    break
+                if "dim" in record:
+                    self.dim = record["dim"]
+                elif "delete" in record:
+                    self._kill(record["delete"])
+                else:
+                    self._append_row(record["id"], record["hash"])
+
+        expected_size = len(self._row_ids) * (self.dim or 0) * 4
+        actual_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if actual_size != expected_size:
+            self.corrupt = True
+
+    def _kill(self, entry_id: str):
+        row = self._rows.pop(entry_id, None)
+        if row is not None:
+            self._row_ids[row] = None
+        self._hashes.pop(entry_id, None)
+
+    def _append_row(self, entry_id: str, digest: str):
+        self._kill(entry_id)
+        self._rows[entry_id] = len(self._row_ids)
+        self._hashes[entry_id] = digest
+        self._row_ids.append(entry_id)
+
+    def __len__(self) -> int:
+        with self._locked():
+            self._sync()
+        return len(self._rows)
+
+    @property
+    def dead_rows(self) -> int:
+        """The number of rows that belong to deleted or updated entries."""
+        with self._locked():
+            self._sync()
+        return len(self._row_ids) - len(self._rows)
+
+    def add(self, entry_ids: List[str], hashes: List[str], embeddings: np.ndarray):
+        """
+        Appends embeddings for new or updated entries.
+
+        Args:
+            entry_ids: The IDs of the entries.
+            hashes: The content hashes of the entries, used to check the
+                    matrix against the database.
+            embeddings: A matrix with one float32 embedding per entry.
+
+        Raises:
+            ValueError: If the embeddings do not match the matrix's dimension.
+        """
+        if not entry_ids:
+            return
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._locked():
+            self._sync()
+            records = []
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+                records.append({"dim": self.dim})
+            elif embeddings.shape[1] != self.dim:
+                raise ValueError(f"Expected embeddings of dimension {self.dim}, got {embeddings.shape[1]}")
+
+            # Vectors are written before the log, so a crash in between leaves
+            # a size mismatch that `load` detects rather than rows without data.
+            with open(self.vectors_path, "ab") as f:
+                f.write(embeddings.tobytes())
+            for entry_id, digest in zip(entry_ids, hashes):
+                self._append_row(entry_id, digest)
+                records.append({"id": entry_id, "hash": digest})
+            self._append_records(records)
+            self._mmap = None
+
+    def delete(self, entry_ids: Iterable[str]):
+        """
+        Marks the rows of the given entries as dead.
+
+        Args:
+            entry_ids: The IDs of the entries to remove.
+        """
+        with self._locked():
+            self._sync()
+            records = []
+            for entry_id in entry_ids:
+                if entry_id in self._rows:
+                    self._kill(entry_id)
+                    records.append({"delete": entry_id})
+            self._append_records(records)
+
+    def _append_records(self, records: List[Dict[str, str]]):
+        # Called with the lock held; the files then match this instance's
+        # state again.
+        if records:
+            with open(self.rows_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+        self._file_state = self._stat_files()
+
+    def matrix(self) -> np.ndarray:
+        """
+        Returns every row of the matrix, including dead rows.
+
+        Returns:
+            A read-only, memory-mapped array of shape (rows, dim).
+        """
+        with self._locked():
+            self._sync()
+        if not self._row_ids:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        if self._mmap is None:
+            self._mmap = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r", shape=(len(self._row_ids), self.dim)
+            )
+        return self._mmap
+
+    def live(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Returns the IDs and embeddings of every live entry.
+
+        When there are no dead rows, the embeddings are the memory-mapped
+        matrix itself and nothing is copied.
+
+        Returns:
+            A tuple of the entry IDs and a matrix with their embeddings, in
+            the same order.
+        """
+        matrix = self.matrix()
+        if not self.dead_rows:
+            return list(self._row_ids), matrix
+        rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+        rows.sort()
+        return [self._row_ids[row] for row in rows], matrix[rows]
+
+    def iter_batches(self, batch_size: int) -> Iterator[np.ndarray]:
+        """
+        Iterates over the live embeddings in batches.
+
+        Batches are zero-copy slices of the memory-mapped matrix, except for
+        batches that have to skip dead rows.
+
+        Args:
+            batch_size: The maximum number of embeddings per batch.
+
+        Yields:
+            A matrix of up to `batch_size` embeddings.
+        """
+        matrix = self.matrix()
+        for start in range(0, len(matrix), batch_size):
+            row_ids = self._row_ids[start:start + batch_size]
+            if all(entry_id is not None for entry_id in row_ids):
+                yield matrix[start:start + batch_size]
+            else:
+                live_rows = [start + i for i, entry_id in enumerate(row_ids) if entry_id is not None]
+                if live_rows:
+                    yield matrix[live_rows]
+
+    def is_consistent(self, hashes: Dict[str, str]) -> bool:
+        """
+        Checks the matrix against the entries in the database.
+
+        Args:
+            hashes: The content hash of every database entry that has an
+                    embedding, keyed by entry ID.
+
+        Returns:
+            True if the matrix holds exactly those entries, at the same
+            content, and its files are intact.
+        """
+        with self._locked():
+            self._sync()
+        return not self.corrupt and self._hashes == hashes
+
+    def rebuild(self, entries: Iterable[Tuple[str, str, np.ndarray]]):
+        """
+        Replaces the matrix with the given entries.
+
+        The new files are written next to the old ones and then moved into
+        place, so existing memory maps stay valid.
+
+        Args:
+            entries: Tuples of entry ID, content hash, and embedding.
+
+        Raises:
+            ValueError: If the embeddings do not all have the same
+                        dimension. The existing files are then kept.
+        """
+        tmp_vectors, tmp_rows = self.vectors_path + ".tmp", self.rows_path + ".tmp"
+        dim = None
+        with self._locked():
+            try:
+                with open(tmp_vectors, "wb") as vectors, open(tmp_rows, "w", encoding="utf-8") as rows:
+                    for entry_id, digest, embedding in entries:
+                        embedding = np.asarray(embedding, dtype=np.float32)
+                        if dim is None:
+                            dim = embedding.size
+                            rows.write(json.dumps({"dim": dim}) + "\n")
+                        elif embedding.size != dim:
+                            raise ValueError(
+                                f"Expected embeddings of dimension {dim}, got {embedding.size} for entry "
+                                f"{entry_id}. The playbook mixes embeddings of different backends and "
+                                "must be re-embedded."
+                            )
+                        vectors.write(embedding.tobytes())
+                        rows.write(json.dumps({"id": entry_id, "hash": digest}) + "\n")
+            except BaseException:
+                for path in (tmp_vectors, tmp_rows):
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_rows, self.rows_path)
+            self.load()
+
+    def compact(self):
+        """Rewrites the matrix without its dead rows."""
+        with self._locked():
+            entry_ids, embeddings = self.live()
+            self.rebuild(
+                (entry_id, self._hashes[entry_id], embedding)
+                for entry_id, embedding in zip(entry_ids, embeddings)
+            )
+
+    def remove_files(self):
+        """Deletes the sidecar files."""
+        with self._locked():
+            for path in (self.vectors_path, self.rows_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.load()
+        if os.path.exists(self.lock_path):
+            os.remove(self.lock_path)
@@ -0,0 +1,37 @@
+from .base import EmbeddingBackend
+from .sentence_transformer import SentenceTransformerBackend
+from .hashing import HashingBackend
+from typing import Dict, Any
+
+def create_embedding_backend(config: Dict[str, Any]) -> EmbeddingBackend:
+    """
+    Factory function to create an embedding backend based on the configuration.
+
+    The backend is selected by the `similarity.backend` setting:
+    - `sentence_transformer` (the default): the `sentence-transformers`
+      model named by `similarity.model`.
+    - `hashing`: a `HashingBackend` configured by `similarity.hashing`,
+      which needs no model download.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        An instance of a class that implements the `EmbeddingBackend` interface.
+
+    Raises:
+        ValueError: If the specified embedding backend is unknown.
+    """
+    similarity_config = config.get('similarity', {})
+    backend = similarity_config.get('backend', 'sentence_transformer')
+    if backend == 'sentence_transformer':
+        return SentenceTransformerBackend(similarity_config.get('model', 'all-MiniLM-L6-v2'))
+    elif backend == 'hashing':
+        hashing_config = similarity_config.get('hashing', {})
+        return HashingBackend(
+            dim=hashing_config.get('dim', 1024),
+            ngram_range=tuple(hashing_config.get('ngram_range', (1, 2))),
+            char_ngram=hashing_config.get('char_ngram', 3)
+        )
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+from typing import List
+import numpy as np
+
+class EmbeddingBackend(ABC):
+    """
+    Abstract base class for an embedding backend.
+
+    An embedding backend turns texts into fixed-size vectors. The
+    `SimilarityService` delegates all encoding to its backend, so different
+    embedding methods (e.g., a sentence transformer model, or a cheap
+    hashing vectorizer for CPU-starved nodes and offline tests) can be used
+    interchangeably.
+
+    Backends are called from executor threads, so `encode` must be safe to
+    call from any thread.
+    """
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """
+        A name identifying the backend and its settings.
+
+        Embeddings are cached under this name, so two backends that produce
+        different embeddings for the same text must have different names.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def dim(self) -> int:
+        """The dimension of the embeddings produced by the backend."""
+        pass
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The dtype of the embeddings produced by the backend."""
+        return np.dtype(np.float32)
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Calculates the embeddings of several texts.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            A matrix of shape (len(texts), dim), with one embedding per text.
+        """
+        pass
+
+    def warmup(self):
+        """
+        Prepares the backend so that the first real request is fast.
+
+        The default implementation encodes a single text.
+        """
+        self.encode(["warmup"])
@@ -0,0 +1,93 @@
+import math
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+import numpy as np
+from .base import EmbeddingBackend
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingBackend(EmbeddingBackend):
+    """
+    A dependency-light embedding backend based on the hashing trick.
+
+    Each text is split into lowercase word n-grams and, optionally, the
+    character n-grams of its words. Every feature is hashed with CRC32 into
+    one of `dim` buckets, with a sign taken from the hash so that collisions
+    tend to cancel out, and weighted by the logarithm of its count. The
+    vector is then L2-normalized.
+
+    The backend needs no model download and no training, runs in pure
+    numpy, and is fully deterministic across processes and machines, which
+    makes it suited to CPU-starved nodes, offline CI, and reproducible
+    benchmarks. Its similarities are lexical rather than semantic: texts
+    that share words are similar, paraphrases that do not are not.
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range: Tuple[int, int] = (1, 2), char_ngram: int = 3):
+        """
+        Initializes the backend.
+
+        Args:
+            dim: The number of hash buckets, which is the embedding dimension.
+            ngram_range: The smallest and largest word n-gram to extract.
+            char_ngram: The length of the character n-grams extracted from
+                        each word, which make the embeddings robust to typos
+                        and inflections. 0 disables them.
+
+        Raises:
+            ValueError: If `dim` is not positive or `ngram_range` is invalid.
+        """
+        if dim <= 0:
+            raise ValueError(f"The embedding dimension must be positive, got {dim}")
+        min_n, max_n = ngram_range
+        if not 1 <= min_n <= max_n:
+            raise ValueError(f"Invalid n-gram range: {ngram_range}")
+        self._dim = dim
+        self.ngram_range = (min_n, max_n)
+        self.char_ngram = char_ngram
+
+    @property
+    def name(self) -> str:
+        min_n, max_n = self.ngram_range
+        return f"hashing-{self._dim}-w{min_n}{max_n}-c{self.char_ngram}"
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def _features(self, text: str) -> Counter:
+        words = _TOKEN_PATTERN.findall(text.lower())
+        features = Counter()
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, max_n + 1):
+            for start in range(len(words) - n + 1):
+                features["w " + " ".join(words[start:start + n])] += 1
+        if self.char_ngram > 0:
+            for word in words:
+                padded = f"<{word}>"
+                for start in range(len(padded) - self.char_ngram + 1):
+                    features["c " + padded[start:start + self.char_ngram]] += 1
+        return features
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(digest % self._dim)
+                # The sign is taken from the top bit, the bucket mostly from the low bits.
+                values.append((1.0 if digest & 0x80000000 else -1.0) * (1.0 + math.log(count)))
+
+        embeddings = np.zeros((len(texts), self._dim), dtype=np.float32)
+        np.add.at(embeddings, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), values)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms > 0, norms, 1.0)
+
+    def warmup(self):
+        # There is nothing to load.
+        pass
@@ -0,0 +1,52 @@
+import threading
+from typing import List
+import numpy as np
+from .base import EmbeddingBackend
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    An embedding backend that uses a `sentence-transformers` model.
+
+    The library is imported and the model loaded on first use, or ahead of
+    time by `warmup`, so that creating the backend is cheap.
+    """
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+        """
+        Initializes the backend without loading the model.
+
+        Args:
+            model_name: The name or path of the sentence transformer model.
+        """
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The sentence transformer model, loaded on first access."""
+        if self._model is None:
+            # Embeddings are computed in executor threads, so two threads may
+            # race to load the model.
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def name(self) -> str:
+        return self.model_name
+
+    @property
+    def dim(self) -> int:
+        # Loads the model, as the dimension is only known from its weights.
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts)), dtype=np.float32)
+
+    def warmup(self):
+        # Loading the model is not enough: the first forward pass also
+        # initializes lazily allocated state, so run one.
+        self.model.encode(["warmup"])
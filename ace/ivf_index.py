@@ -0,0 +1,415 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ace.embedding_codec import decode_embedding
+from ace.storage.base import PlaybookStoreListener, check_embedding_dim
+from ace.vector_index import VectorIndex
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 10,
+    seed: int = 0,
+    chunk_size: int = 65536
+) -> np.ndarray:
+    """
+    Clusters L2-normalized vectors by cosine similarity.
+
+    Args:
+        vectors: A matrix of L2-normalized vectors.
+        n_clusters: The number of clusters.
+        n_iter: The number of refinement iterations.
+        seed: The seed for the initial centroids.
+        chunk_size: The number of vectors assigned at a time, which bounds
+                    the size of the intermediate similarity matrix.
+
+    Returns:
+        A matrix of L2-normalized centroids, one per row.
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        sums = np.zeros_like(centroids)
+        counts = np.zeros(n_clusters, dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            labels = np.argmax(chunk @ centroids.T, axis=1)
+            np.add.at(sums, labels, chunk)
+            counts += np.bincount(labels, minlength=n_clusters)
+
+        # Reseed empty clusters with random vectors so every list is used.
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms > 0, norms, 1.0)
+    return centroids.astype(np.float32)
+
+class IVFIndex(PlaybookStoreListener):
+    """
+    An approximate, resident index of playbook embeddings.
+
+    The index partitions the embeddings into `nlist` inverted lists, one per
+    centroid of a spherical k-means clustering, and keeps each list as an
+    exact `VectorIndex`. A query is compared with the centroids first and
+    then only with the entries of the `nprobe` closest lists, so its cost
+    grows with about `nprobe / nlist` of the playbook instead of all of it.
+    Raising `nprobe` trades latency for recall.
+
+    Until the index holds `train_size` entries it keeps them in a single
+    list and answers exactly. It is then trained once; later entries are
+    assigned to the existing lists, and `train` can be called again to
+    rebalance them after the playbook has grown substantially. When the
+    training size is reached inside a running event loop, e.g. by a write
+    through the store, the centroids are computed in an executor, and the
+    index keeps answering exactly until they are ready.
+
+    The index has the same query and listener interface as `VectorIndex`,
+    so it can replace it inside the `SimilarityService`.
+    """
+
+    def __init__(
+        self,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        train_size: Optional[int] = None,
+        max_train_points: Optional[int] = None,
+        seed: int = 0
+    ):
+        """
+        Initializes an empty, untrained index.
+
+        Args:
+            nlist: The number of inverted lists.
+            nprobe: The number of lists searched per query.
+            train_size: The number of entries at which the index is trained.
+                        Defaults to 40 entries per list.
+            max_train_points: The maximum number of entries sampled to train
+                              the centroids. Defaults to 256 per list.
+            seed: The seed for sampling and centroid initialization.
+        """
+        self.nlist = max(1, nlist)
+        self.nprobe = max(1, nprobe)
+        self.train_size = train_size if train_size is not None else 40 * self.nlist
+        self.max_train_points = max_train_points if max_train_points is not None else 256 * self.nlist
+        self.seed = seed
+        self.clear()
+
+    def clear(self):
+        """Removes every entry and the trained centroids from the index."""
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[VectorIndex] = self._new_lists(1)
+        self._list_of: Dict[str, int] = {}
+        # A background training started by `add`; its result is discarded
+        # if the index is cleared or trained in the meantime.
+        self._training: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def _new_lists(count: int) -> List[VectorIndex]:
+        # Lists start small, since each holds only about 1/nlist of the entries.
+        return [VectorIndex(initial_capacity=16) for _ in range(count)]
+
+    def __len__(self) -> int:
+        return len(self._list_of)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._list_of
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the centroids have been trained."""
+        return self.centroids is not None
+
+    @property
+    def dim(self) -> Optional[int]:
+        """The dimension of the indexed embeddings."""
+        if self.centroids is not None:
+            return self.centroids.shape[1]
+        return self._lists[0].dim
+
+    @property
+    def ids(self) -> List[str]:
+        """The IDs of the indexed entries, grouped by list."""
+        return [entry_id for inverted_list in self._lists for entry_id in inverted_list.ids]
+
+    def _entries(self) -> Tuple[List[str], np.ndarray]:
+        ids = self.ids
+        vectors = [inverted_list.vectors for inverted_list in self._lists if len(inverted_list)]
+        return ids, np.concatenate(vectors) if vectors else np.empty((0, self.dim or 0), dtype=np.float32)
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        if self.centroids is None:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk_size] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk_size)
+        ])
+
+    def load(self, entry_ids: List[str], embeddings: np.ndarray):
+        """
+        Replaces the entries of the index, keeping trained centroids.
+
+        Args:
+            entry_ids: The IDs of the entries.
+            embeddings: A matrix with one embedding per entry.
+        """
+        self._lists = self._new_lists(len(self._lists))
+        self._list_of = {}
+        self.add(entry_ids, embeddings)
+
+    def _training_sample(self, vectors: np.ndarray) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.max_train_points:
+            return vectors[np.sort(rng.choice(len(vectors), self.max_train_points, replace=False))]
+        return vectors
+
+    def _install_centroids(self, centroids: np.ndarray):
+        ids, vectors = self._entries()
+        self.centroids = centroids
+        self._lists = self._new_lists(len(centroids))
+        self._list_of = {}
+        if ids:
+            self._add_normalized(ids, vectors)
+
+    def train(self):
+        """
+        Trains the centroids on the indexed entries and redistributes them.
+
+        Training samples at most `max_train_points` entries, but every entry
+        is then assigned to its closest centroid.
+        """
+        ids, vectors = self._entries()
+        if not ids:
+            return
+        self._training = None
+        self._install_centroids(spherical_kmeans(self._training_sample(vectors), self.nlist, seed=self.seed))
+
+    def _start_training(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.train()
+            return
+
+        # The sample is copied, so that writes made while the executor runs
+        # do not change it. Entries added meanwhile are assigned to the new
+        # lists when the centroids are installed.
+        sample = self._training_sample(self._entries()[1]).copy()
+        training = loop.run_in_executor(None, spherical_kmeans, sample, self.nlist, 10, self.seed)
+        self._training = training
+
+        def _done(future: asyncio.Future):
+            if future is not self._training:
+                return
+            self._training = None
+            if not future.cancelled() and future.exception() is None and len(self):
+                self._install_centroids(future.result())
+
+        training.add_done_callback(_done)
+
+    async def wait_for_training(self):
+        """Waits until a background training, if one was started, has finished."""
+        if self._training is not None:
+            await asyncio.shield(self._training)
+
+    def _add_normalized(self, entry_ids: List[str], vectors: np.ndarray):
+        labels = self._assign(vectors)
+        order = np.argsort(labels, kind="stable")
+        for rows in np.split(order, np.flatnonzero(np.diff(labels[order])) + 1):
+            label = int(labels[rows[0]])
+            list_ids = [entry_ids[row] for row in rows]
+            self._lists[label].add(list_ids, vectors[rows])
+            self._list_of.update((entry_id, label) for entry_id in list_ids)
+
+    def add(self, entry_ids: List[str], embeddings: np.ndarray):
+        """
+        Adds or replaces the embeddings of several entries.
+
+        Args:
+            entry_ids: The IDs of the entries.
+            embeddings: A matrix with one embedding per entry.
+
+        Raises:
+            ValueError: If the embeddings do not match the index's dimension.
+        """
+        if not len(entry_ids):
+            return
+        vectors = VectorIndex._normalize(embeddings)
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}")
+        self.remove(entry_ids)
+        self._add_normalized(list(entry_ids), vectors)
+        if not self.is_trained and self._training is None and len(self) >= self.train_size:
+            self._start_training()
+
+    def remove(self, entry_ids: Iterable[str]):
+        """
+        Removes several entries from the index.
+
+        IDs that are not indexed are ignored.
+
+        Args:
+            entry_ids: The IDs of the entries to remove.
+        """
+        for entry_id in entry_ids:
+            label = self._list_of.pop(entry_id, None)
+            if label is not None:
+                self._lists[label].remove([entry_id])
+
+    def reconcile(self, entry_ids: List[str], embeddings: np.ndarray):
+        """
+        Brings the index in line with a store's entries without retraining.
+
+        Entries that are no longer present are removed, missing entries are
+        added, and entries whose embedding changed, e.g. because they were
+        updated while the index file was not being written, are re-added.
+
+        Args:
+            entry_ids: The IDs of the store's entries.
+            embeddings: A matrix with one embedding per entry.
+        """
+        wanted = set(entry_ids)
+        self.remove([entry_id for entry_id in list(self._list_of) if entry_id not in wanted])
+        if not len(entry_ids):
+            return
+        vectors = VectorIndex._normalize(embeddings)
+        indexed_ids, indexed_vectors = self._entries()
+        indexed_rows = {entry_id: row for row, entry_id in enumerate(indexed_ids)}
+        stale = [row for row, entry_id in enumerate(entry_ids) if entry_id not in indexed_rows]
+        kept = [row for row, entry_id in enumerate(entry_ids) if entry_id in indexed_rows]
+        if kept and (self.dim is None or vectors.shape[1] == self.dim):
+            indexed = indexed_vectors[[indexed_rows[entry_ids[row]] for row in kept]]
+            changed = np.abs(indexed - vectors[kept]).max(axis=1) > 1e-5
+            stale.extend(row for row, is_changed in zip(kept, changed) if is_changed)
+        elif kept:
+            stale.extend(kept)
+        if stale:
+            stale.sort()
+            self.add([entry_ids[row] for row in stale], embeddings[stale])
+
+    def _probe(self, query: np.ndarray) -> List[VectorIndex]:
+        if self.centroids is None:
+            return self._lists
+        nprobe = min(self.nprobe, len(self.centroids))
+        scores = self.centroids @ VectorIndex._normalize(query)[0]
+        return [self._lists[label] for label in np.argpartition(-scores, nprobe - 1)[:nprobe]]
+
+    def any_above(self, embedding: np.ndarray, threshold: float) -> bool:
+        """
+        Checks if any entry in the probed lists is more similar than a threshold.
+
+        Args:
+            embedding: The query embedding.
+            threshold: The cosine similarity to exceed.
+
+        Returns:
+            True if a similar entry was found, False otherwise.
+        """
+        if not len(self) or np.size(embedding) != self.dim:
+            return False
+        return any(inverted_list.any_above(embedding, threshold) for inverted_list in self._probe(embedding))
+
+    def any_above_batch(self, embeddings: np.ndarray, threshold: float) -> np.ndarray:
+        """
+        Checks, for each of several embeddings, if any entry in its probed lists is more similar than a threshold.
+
+        Args:
+            embeddings: A matrix with one query embedding per row.
+            threshold: The cosine similarity to exceed.
+
+        Returns:
+            A boolean array with one flag per query.
+        """
+        # Every query probes its own lists, so the queries are checked one by one.
+        return np.array([self.any_above(embedding, threshold) for embedding in embeddings], dtype=bool)
+
+    def search(self, embedding: np.ndarray, k: int = 10, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Finds the entries in the probed lists most similar to an embedding.
+
+        Args:
+            embedding: The query embedding.
+            k: The maximum number of entries to return.
+            threshold: If given, only entries more similar than this are
+                       returned.
+
+        Returns:
+            A list of `(entry_id, similarity)` tuples, most similar first.
+        """
+        if k <= 0 or not len(self) or np.size(embedding) != self.dim:
+            return []
+        results = [
+            result
+            for inverted_list in self._probe(embedding)
+            for result in inverted_list.search(embedding, k, threshold)
+        ]
+        results.sort(key=lambda result: -result[1])
+        return results[:k]
+
+    def save(self, path: str):
+        """
+        Writes the centroids and entries of the index to a file.
+
+        The file is written next to `path` and then moved into place, so a
+        crash never leaves a partial index behind.
+
+        Args:
+            path: The path of the `.npz` file to write.
+        """
+        ids = []
+        vectors = []
+        sizes = []
+        for inverted_list in self._lists:
+            ids.extend(inverted_list.ids)
+            sizes.append(len(inverted_list))
+            if len(inverted_list):
+                vectors.append(inverted_list.vectors)
+        dim = self.dim or 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids if self.centroids is not None else np.empty((0, dim), dtype=np.float32),
+                vectors=np.concatenate(vectors) if vectors else np.empty((0, dim), dtype=np.float32),
+                list_sizes=np.array(sizes, dtype=np.int64),
+                ids=np.array(json.dumps(ids)),
+            )
+        os.replace(tmp_path, path)
+
+    def read(self, path: str):
+        """
+        Replaces the index with one written by `save`.
+
+        Args:
+            path: The path of the `.npz` file to read.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            centroids = data["centroids"]
+            vectors = data["vectors"]
+            sizes = data["list_sizes"]
+            ids = json.loads(str(data["ids"]))
+
+        self.clear()
+        if len(centroids):
+            self.centroids = centroids
+            self._lists = self._new_lists(len(centroids))
+        start = 0
+        for label, size in enumerate(sizes):
+            list_ids = ids[start:start + size]
+            self._lists[label].add(list_ids, vectors[start:start + size])
+            self._list_of.update((entry_id, label) for entry_id in list_ids)
+            start += size
+
+    def check_entries(self, entries: List[Dict[str, Any]]):
+        check_embedding_dim(entries, self.dim)
+
+    def on_entries_upserted(self, entries: List[Dict[str, Any]]):
+        embedded = [e for e in entries if e["embedding"] is not None]
+        self.remove(e["id"] for e in entries if e["embedding"] is None)
+        if embedded:
+            self.add([e["id"] for e in embedded], np.stack([decode_embedding(e["embedding"]) for e in embedded]))
+
+    def on_entries_deleted(self, entry_ids: List[str]):
+        self.remove(entry_ids)
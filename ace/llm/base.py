@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any
 
 class LanguageModel(ABC):
     """
@@ -44,3 +44,19 @@ class LanguageModel(ABC):
             A string containing the response from the language model.
         """
         pass
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Asynchronously generates a response, yielding it in chunks as they are produced.
+
+        Concatenating the chunks gives the complete response. Models that can
+        stream override this method; the default implementation yields the
+        whole response of `generate` as a single chunk.
+
+        Args:
+            prompt: The prompt to be sent to the language model.
+
+        Yields:
+            Consecutive chunks of the response.
+        """
+        yield await self.generate(prompt)
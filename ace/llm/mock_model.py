@@ -1,5 +1,8 @@
 from .base import LanguageModel
+from typing import AsyncIterator
+import asyncio
 import random
+import re
 
 class MockLanguageModel(LanguageModel):
     """
@@ -13,6 +16,10 @@ class MockLanguageModel(LanguageModel):
     This allows for predictable and repeatable behavior, which is essential for
     unit testing and for developing the application without relying on a live
     internet connection or API keys.
+
+    When streaming, the response is yielded word by word, with a delay of
+    `language_model.mock.token_delay_ms` between words to simulate the
+    pacing of a real model.
     """
 
     async def generate(self, prompt: str) -> str:
@@ -35,3 +42,21 @@ class MockLanguageModel(LanguageModel):
             return "No mock responses found in config."
 
         return random.choice(responses)
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Asynchronously generates a mock response, yielding it word by word.
+
+        Args:
+            prompt: The prompt to the model (ignored in this implementation).
+
+        Yields:
+            Consecutive words of a randomly selected mock response, each
+            with its trailing whitespace.
+        """
+        delay = self.config.get('language_model', {}).get('mock', {}).get('token_delay_ms', 0) / 1000
+        response = await self.generate(prompt)
+        for token in re.findall(r"\s*\S+\s*", response) or [response]:
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
@@ -1,6 +1,5 @@
 from .base import LanguageModel
-import openai
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any
 
 class OpenAILanguageModel(LanguageModel):
     """
@@ -34,7 +33,12 @@ class OpenAILanguageModel(LanguageModel):
         self.api_key = self.config.get('language_model', {}).get('openai', {}).get('api_key')
         if not self.api_key:
             raise ValueError("OpenAI API key not found in config.yaml")
+        # The openai package is slow to import, so it is only imported when
+        # this model is actually used. The module is kept on the instance for
+        # the API calls in `generate` and `generate_stream`.
+        import openai
         openai.api_key = self.api_key
+        self._openai = openai
 
     async def generate(self, prompt: str) -> str:
         """
@@ -54,7 +58,7 @@ class OpenAILanguageModel(LanguageModel):
         # Uncomment the following lines to enable the actual API call:
         #
         # try:
-        #     response = await openai.Completion.acreate(
+        #     response = await self._openai.Completion.acreate(
         #         engine="text-davinci-003",
         #         prompt=prompt,
         #         max_tokens=150
@@ -67,3 +71,42 @@ class OpenAILanguageModel(LanguageModel):
 
         # A placeholder response for when the API call is disabled.
         return f"Placeholder response for prompt: {prompt}"
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Asynchronously generates a response from the OpenAI API, yielding it as it is streamed.
+
+        NOTE: As in `generate`, the actual API call is commented out. To enable
+              it, uncomment the API call and ensure your OpenAI API key is
+              correctly set in the `config.yaml` file.
+
+        Args:
+            prompt: The prompt to be sent to the OpenAI API.
+
+        Yields:
+            Consecutive chunks of the text generated by the OpenAI API.
+        """
+        # Uncomment the following lines to enable the actual API call:
+        #
+        # try:
+        #     response = await self._openai.Completion.acreate(
+        #         engine="text-davinci-003",
+        #         prompt=prompt,
+        #         max_tokens=150,
+        #         stream=True
+        #     )
+        #     async for chunk in response:
+        #         yield chunk.choices[0].text
+        #     return
+        # except Exception as e:
+        #     # Handle potential API errors, e.g., network issues, invalid key
+        #     print(f"An error occurred with the OpenAI API: {e}")
+        #     yield "Error: Could not get a response from OpenAI."
+        #     return
+
+        # A placeholder response for when the API call is disabled, streamed
+        # word by word.
+        response = await self.generate(prompt)
+        for word in response.split(" ")[:-1]:
+            yield word + " "
+        yield response.split(" ")[-1]
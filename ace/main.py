@@ -1,18 +1,29 @@
 from fastapi import FastAPI, Depends, HTTPException, Security
+from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
-from ace import database
+from ace.storage import get_playbook_store
+from ace.database import metadata_json
 from ace.core.models import Playbook, PlaybookEntry
 from ace.core.generator import Generator
+from ace.core.retriever import create_retriever
+from ace.core.context_packer import create_context_packer
+from ace.core.prompt_cache import get_playbook_section_cache
 from ace.core.reflector import Reflector
-from ace.core.curator import Curator
+from ace.core.reflection_cache import get_reflection_cache
+from ace.core.curation_actor import get_curation_actor
 from ace.llm import get_language_model
 from ace.plugins.manager import plugin_manager
 from ace.cluster_manager import ClusterManager
 from ace.config import settings
+from ace.similarity import get_similarity_service
+from ace.logger import get_logger
 import asyncio
+import json
+
+logger = get_logger(__name__)
 
 app = FastAPI(
     title="ACE Framework API",
@@ -22,6 +33,9 @@ app = FastAPI(
 
 api_key_header = APIKeyHeader(name="X-API-Key")
 
+# The storage backend shared by every request.
+playbook_store = get_playbook_store(settings)
+
 async def get_api_key(api_key: str = Security(api_key_header)):
     """
     Dependency to validate the API key.
@@ -46,8 +60,15 @@ async def get_api_key(api_key: str = Security(api_key_header)):
 
 from pydantic import BaseModel, validator
 
+class RetrievalRequest(BaseModel):
+    top_k: Optional[int] = None
+    min_similarity: Optional[float] = None
+    mmr_lambda: Optional[float] = None
+    candidates: Optional[int] = None
+
 class RunAceRequest(BaseModel):
     task: str
+    retrieval: Optional[RetrievalRequest] = None
 
     @validator('task')
     def task_must_not_be_empty(cls, v):
@@ -55,16 +76,43 @@ class RunAceRequest(BaseModel):
             raise ValueError('Task must not be empty')
         return v
 
+class PlaybookEntryResponse(BaseModel):
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+
 class RunAceResponse(BaseModel):
     new_insights: List[Dict[str, Any]]
     playbook_entries: List[PlaybookEntry]
+    retrieval: Optional[Dict[str, Any]] = None
+    context: Optional[Dict[str, Any]] = None
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Initializes the database when the application starts.
+    Initializes the playbook store and opens its connection pools when the
+    application starts, then loads the resident similarity index if enabled.
+
+    The embedding model is warmed up in the background, so the server starts
+    answering `/healthz` immediately; `/readyz` reports when it is done.
     """
-    await database.initialize_database()
+    await playbook_store.initialize()
+    await playbook_store.open(settings)
+    similarity_service = get_similarity_service(settings)
+    if settings.get('similarity', {}).get('resident_index', False):
+        await similarity_service.load_index(playbook_store)
+    app.state.warmup_task = asyncio.create_task(similarity_service.warmup())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stops the curation actor and closes the playbook store's connection
+    pools when the application shuts down.
+    """
+    await get_curation_actor(settings).close()
+    if settings.get('similarity', {}).get('resident_index', False):
+        get_similarity_service(settings).unload_index()
+    await playbook_store.close()
 
 @app.get("/")
 async def root():
@@ -73,51 +121,211 @@ async def root():
     """
     return {"message": "Welcome to the ACE Framework API!"}
 
-@app.get("/playbook/", response_model=List[PlaybookEntry], dependencies=[Depends(get_api_key)])
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness probe: reports that the server process is up and responsive.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness probe: reports whether the server can serve requests quickly.
+
+    The server is ready once the startup warmup has loaded the embedding
+    model. Until then, and if the warmup failed, this returns a 503 error.
+    """
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and warmup_task.done() and warmup_task.exception() is not None:
+        raise HTTPException(status_code=503, detail=f"Model warmup failed: {warmup_task.exception()}")
+    if not get_similarity_service(settings).ready:
+        raise HTTPException(status_code=503, detail="The embedding model is still warming up.")
+    return {"status": "ready"}
+
+async def _stream_playbook_json(playbook: Playbook) -> AsyncIterator[str]:
+    """
+    Streams the playbook's entries, without embeddings, as a JSON array.
+
+    The metadata is copied from the store as JSON text, without being
+    decoded and re-encoded.
+    """
+    separator = ""
+    yield "["
+    async for row in playbook.iter_rows(("id", "content", "metadata")):
+        yield (
+            f'{separator}{{"id": {json.dumps(row["id"])}, "content": {json.dumps(row["content"])}, '
+            f'"metadata": {metadata_json(row)}}}'
+        )
+        separator = ","
+    yield "]"
+
+@app.get(
+    "/playbook/",
+    response_class=StreamingResponse,
+    responses={200: {"model": List[PlaybookEntryResponse], "description": "The playbook's entries, streamed as a JSON array."}},
+    dependencies=[Depends(get_api_key)]
+)
 async def get_playbook():
     """
     Retrieves all entries from the playbook.
+
+    The entries are streamed from the database as a JSON array of objects
+    with `id`, `content`, and `metadata` keys, so the response never holds
+    the whole playbook in memory.
     """
-    playbook = Playbook()
-    return await playbook.get_all_entries()
+    playbook = Playbook(playbook_store)
+    return StreamingResponse(_stream_playbook_json(playbook), media_type="application/json")
 
-@app.post("/run-ace/", response_model=RunAceResponse, dependencies=[Depends(get_api_key)])
-async def run_ace(request: RunAceRequest):
+async def _run_pipeline(request: RunAceRequest, stream: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
     """
-    Runs the full ACE pipeline for a given task.
+    Runs the ACE pipeline for a task, yielding its progress as events.
 
-    This endpoint orchestrates the entire ACE process:
-    1. Generates a reasoning trajectory for the task.
-    2. Reflects on the trajectory to extract insights.
-    3. Curates the insights into the playbook.
+    Both `/run-ace/` and `/run-ace/stream` run the pipeline through this
+    helper, so that they go through the same stages and plugin hooks. Each
+    event is a tuple of its name and payload, as documented on
+    `run_ace_stream`. With `stream`, the trajectory and the insights are
+    streamed from the language model and yielded as `token` and `insight`
+    events; otherwise they are generated at once and only the other events
+    are yielded. The last event is `done`.
+
+    Args:
+        request: The pipeline request.
+        stream: Whether to stream the trajectory and the insights.
+
+    Yields:
+        Tuples of an event name and its payload.
     """
+    yield "stage", {"stage": "generation", "status": "started"}
     await plugin_manager.execute_hook("on_pipeline_start", task=request.task)
 
-    playbook = Playbook()
+    playbook = Playbook(playbook_store)
     llm = get_language_model(settings)
-    generator = Generator(llm=llm)
-    reflector = Reflector(llm=llm)
-    curator = Curator(config=settings)
+    retriever = create_retriever(settings)
+    generator = Generator(llm=llm, retriever=retriever, packer=create_context_packer(settings))
+    reflector = Reflector(llm=llm, cache=get_reflection_cache(settings))
+    curation_actor = get_curation_actor(settings)
 
     await plugin_manager.execute_hook("on_before_generation", playbook=playbook, task=request.task)
-    trajectory = await generator.generate_trajectory(playbook, request.task)
+    retrieval_options = None
+    if retriever is not None and request.retrieval is not None:
+        retrieval_options = retriever.options(**request.retrieval.dict())
+
+    def _prompt_events() -> List[Tuple[str, Dict[str, Any]]]:
+        events = []
+        if generator.last_retrieval is not None:
+            events.append(("retrieval", generator.last_retrieval.summary()))
+        if generator.last_packing is not None:
+            events.append(("context", generator.last_packing.summary()))
+        return events
+
+    if stream:
+        chunks = []
+        async for chunk in generator.generate_trajectory_stream(playbook, request.task, retrieval_options):
+            if not chunks:
+                # The prompt, and with it the retrieval, is complete once the
+                # first chunk arrives.
+                for event in _prompt_events():
+                    yield event
+            chunks.append(chunk)
+            yield "token", {"text": chunk}
+        trajectory = "".join(chunks)
+    else:
+        trajectory = await generator.generate_trajectory(playbook, request.task, retrieval_options)
+        for event in _prompt_events():
+            yield event
     await plugin_manager.execute_hook("on_after_generation", trajectory=trajectory)
+    yield "stage", {"stage": "generation", "status": "completed"}
 
+    yield "stage", {"stage": "reflection", "status": "started"}
     await plugin_manager.execute_hook("on_before_reflection", trajectory=trajectory)
-    insights = await reflector.reflect(trajectory)
+    if stream:
+        insights = []
+        async for insight in reflector.reflect_stream(trajectory):
+            insights.append(insight)
+            yield "insight", insight
+    else:
+        insights = await reflector.reflect(trajectory)
     await plugin_manager.execute_hook("on_after_reflection", insights=insights)
+    yield "stage", {"stage": "reflection", "status": "completed", "insights": insights}
 
+    # The insights are curated as one batch, so that plugins see every
+    # insight in a single `on_before_curation` call before any is added.
+    yield "stage", {"stage": "curation", "status": "started"}
     await plugin_manager.execute_hook("on_before_curation", insights=insights)
-    await curator.curate(playbook, insights)
+    await curation_actor.submit(playbook, insights)
     await plugin_manager.execute_hook("on_after_curation")
-
-    all_entries = await playbook.get_all_entries()
+    yield "stage", {"stage": "curation", "status": "completed"}
 
     await plugin_manager.execute_hook("on_pipeline_end")
+    yield "done", {"new_insights": insights, "playbook_version": playbook_store.version}
+
+@app.post("/run-ace/", response_model=RunAceResponse, dependencies=[Depends(get_api_key)])
+async def run_ace(request: RunAceRequest):
+    """
+    Runs the full ACE pipeline for a given task.
+
+    This endpoint orchestrates the entire ACE process:
+    1. Generates a reasoning trajectory for the task. If retrieval is
+       enabled, only the playbook entries most relevant to the task are put
+       into the prompt; `retrieval` in the request overrides the configured
+       retrieval options, and `retrieval` in the response reports which
+       entries were retrieved and how long it took. If a token budget is
+       configured, the entries are packed into it, and `context` in the
+       response reports what was included.
+    2. Reflects on the trajectory to extract insights.
+    3. Curates the insights into the playbook.
+    """
+    events = {name: data async for name, data in _run_pipeline(request)}
+    playbook = Playbook(playbook_store)
+    all_entries = [entry async for entry in playbook.iter_entries()]
 
     return RunAceResponse(
-        new_insights=insights,
+        new_insights=events["done"]["new_insights"],
         playbook_entries=all_entries,
+        retrieval=events.get("retrieval"),
+        context=events.get("context"),
+    )
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Formats a Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_ace_events(request: RunAceRequest) -> AsyncIterator[str]:
+    """
+    Runs the ACE pipeline for a task, yielding its progress as Server-Sent Events.
+    """
+    try:
+        async for name, data in _run_pipeline(request, stream=True):
+            yield _sse_event(name, data)
+    except Exception as e:
+        # The response has already started, so errors are reported in-stream.
+        logger.exception("The streamed ACE pipeline failed")
+        yield _sse_event("error", {"detail": str(e)})
+
+@app.post("/run-ace/stream", dependencies=[Depends(get_api_key)])
+async def run_ace_stream(request: RunAceRequest):
+    """
+    Runs the full ACE pipeline for a given task, streaming its progress.
+
+    The response is a stream of Server-Sent Events, so clients see output
+    as soon as it is produced instead of after curation:
+    - `stage`: a stage (`generation`, `reflection`, or `curation`) started
+      or completed. The completed reflection stage carries the insights,
+      which are then curated together.
+    - `retrieval` and `context`: which playbook entries were put into the
+      prompt, as reported by `/run-ace/`.
+    - `token`: a chunk of the trajectory, as streamed by the language model.
+    - `insight`: an insight, as soon as the Reflector has extracted it.
+    - `done`: the pipeline finished; carries the new insights.
+    - `error`: the pipeline failed; carries the error's description.
+    """
+    return StreamingResponse(
+        _stream_ace_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @app.post("/clusters/run", status_code=202, dependencies=[Depends(get_api_key)])
@@ -126,7 +334,7 @@ async def run_clustering_endpoint():
     Triggers the clustering and summarization process in the background.
     """
     llm = get_language_model(settings)
-    cluster_manager = ClusterManager(settings, llm)
+    cluster_manager = ClusterManager(settings, llm, playbook_store)
     asyncio.create_task(cluster_manager.run_clustering())
     return {"message": "Clustering and summarization process started."}
 
@@ -136,10 +344,49 @@ async def get_clusters_endpoint():
     Retrieves all clusters, their summaries, and their associated entries.
     """
     llm = get_language_model(settings)
-    cluster_manager = ClusterManager(settings, llm)
+    cluster_manager = ClusterManager(settings, llm, playbook_store)
     return await cluster_manager.get_clusters()
 
-from ace.similarity import get_similarity_service
+@app.post("/index/sync", dependencies=[Depends(get_api_key)])
+async def sync_index_endpoint():
+    """
+    Reloads the resident similarity index from the playbook store.
+
+    Writes made through this server keep the index up to date; this is only
+    needed after another process, such as the CLI, wrote to the playbook.
+    """
+    similarity_service = get_similarity_service(settings)
+    await similarity_service.sync_index()
+    return {"indexed_entries": len(similarity_service.index)}
+
+@app.get("/stats/", dependencies=[Depends(get_api_key)])
+async def get_stats():
+    """
+    Reports the hit and miss counters of the similarity service's caches,
+    of the cache of rendered playbook sections, and of the reflection cache,
+    and the batching counters of the curation actor.
+
+    `hit_rates` summarizes them by pipeline stage: the playbook section
+    cache serves generation, the reflection cache serves reflection, and
+    the embedding cache serves curation.
+    """
+    similarity_service = get_similarity_service(settings)
+    cache = similarity_service.embedding_cache
+    section_cache = get_playbook_section_cache().stats()
+    reflection_cache = get_reflection_cache(settings)
+    return {
+        "embedding_cache": cache.stats() if cache is not None else None,
+        "indexed_entries": len(similarity_service.index) if similarity_service.index_loaded else None,
+        "playbook_section_cache": section_cache,
+        "reflection_cache": reflection_cache.stats() if reflection_cache is not None else None,
+        "curation_actor": get_curation_actor(settings).stats(),
+        "hit_rates": {
+            "generation": section_cache["hit_rate"],
+            "reflection": reflection_cache.hit_rate if reflection_cache is not None else None,
+            "curation": cache.hit_rate if cache is not None else None,
+        },
+        "playbook_version": playbook_store.version,
+    }
 
 @app.post("/self-heal/", status_code=202, dependencies=[Depends(get_api_key)])
 async def run_self_healing_endpoint():
@@ -147,7 +394,7 @@ async def run_self_healing_endpoint():
     Triggers the self-healing process in the background.
     """
     llm = get_language_model(settings)
-    playbook = Playbook()
+    playbook = Playbook(playbook_store)
     similarity_service = get_similarity_service(settings)
     from ace.self_healing import SelfHealing
     self_healing = SelfHealing(llm, playbook, similarity_service)
@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from ace.core.models import Playbook
+from ace.core.models import Playbook, PlaybookEntry
 from ace.llm import LanguageModel
 from ace.logger import get_logger
 from ace.similarity import SimilarityService
@@ -33,13 +33,15 @@ class SelfHealing:
         """
         Analyzes all entries in the playbook and corrects them if necessary.
 
-        This method iterates through each entry in the playbook, uses the
-        language model to assess its correctness and relevance, and then
-        updates the entry if a correction is suggested by the model.
+        This method iterates through each entry in the playbook and uses the
+        language model to assess its correctness and relevance. Every entry
+        for which the model suggests a correction is then updated: the
+        corrections are embedded in one batch and written to the playbook in
+        a single transaction.
         """
         logger.info("Starting self-healing process...")
-        all_entries = await self.playbook.get_all_entries()
-        for entry in all_entries:
+        corrections = []
+        async for entry in self.playbook.iter_entries(include_metadata=False):
             prompt = (
                 f"Review the following playbook entry and determine if it is "
                 f"still accurate and relevant. If it is not, provide a "
@@ -51,11 +53,14 @@ class SelfHealing:
             corrected_content = await self.llm.generate(prompt)
             if corrected_content != entry.content:
                 logger.info(f"Correcting entry {entry.id}: '{entry.content}' -> '{corrected_content}'")
-                new_embedding = self.similarity_service.get_embedding(corrected_content).tobytes()
-                await self.playbook.add_entry(
-                    entry_id=entry.id,
+                corrections.append(PlaybookEntry(
+                    id=entry.id,
                     content=corrected_content,
-                    metadata={"source": "self-healing"},
-                    embedding=new_embedding
-                )
+                    metadata={"source": "self-healing"}
+                ))
+        if corrections:
+            embeddings = await self.similarity_service.embed([c.content for c in corrections])
+            for correction, embedding in zip(corrections, embeddings):
+                correction.embedding = self.similarity_service.serialize_embedding(embedding)
+            await self.playbook.add_entries(corrections)
         logger.info("Self-healing process complete.")
@@ -1,7 +1,16 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import asyncio
 import numpy as np
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Optional, Tuple, Union, TYPE_CHECKING
+from ace.embedding_batcher import EmbeddingBatcher
+from ace.embedding_cache import EmbeddingCache
+from ace.embedding_codec import cosine_similarities, encode_embedding
+from ace.embeddings import EmbeddingBackend, create_embedding_backend
+from ace.vector_index import VectorIndex
+from ace.ivf_index import IVFIndex
+
+if TYPE_CHECKING:
+    from ace.storage import PlaybookStore
 
 class SimilarityService:
     """
@@ -9,27 +18,75 @@ class SimilarityService:
 
     This class encapsulates the functionality for converting text into vector
     embeddings and comparing them to determine if they are semantically similar.
-    It uses a pre-trained model from the `sentence-transformers` library to
-    generate the embeddings.
+    The embeddings are generated by an `EmbeddingBackend` selected in the
+    configuration (see `ace.embeddings.create_embedding_backend`), by default
+    a pre-trained model from the `sentence-transformers` library. Backends
+    load their models on first use, or ahead of time through `warmup`, so
+    that creating the service is cheap.
 
     The similarity is determined by calculating the cosine similarity between
     embeddings and checking if it exceeds a configurable threshold.
+
+    The service can also hold a resident index of a store's embeddings,
+    either an exact `VectorIndex` or, for very large playbooks, an
+    approximate `IVFIndex` (see `create_vector_index`). Once loaded with
+    `load_index`, the index follows every write made through that store, and
+    similarity queries against the playbook are answered from memory instead
+    of by scanning the store.
     """
 
     def __init__(self, config: Dict[str, Any]):
         """
         Initializes the SimilarityService.
 
-        The constructor loads the sentence transformer model specified in the
-        application's configuration. If no model is specified, it defaults to
-        'all-MiniLM-L6-v2'.
+        The embedding backend is specified in the application's
+        configuration. If none is specified, it defaults to the
+        'all-MiniLM-L6-v2' sentence transformer model. The model is not
+        loaded here, but on first use.
 
         Args:
             config: A dictionary containing the application configuration.
+
+        Raises:
+            ValueError: If the configured embedding backend is unknown.
         """
         self.config = config
-        model_name = self.config.get('similarity', {}).get('model', 'all-MiniLM-L6-v2')
-        self.model = SentenceTransformer(model_name)
+        self.backend: EmbeddingBackend = create_embedding_backend(config)
+        # Embeddings are cached under the backend's name, so that switching
+        # backends never serves embeddings of the wrong kind.
+        self.model_name = self.backend.name
+        self.embedding_dtype = self.config.get('similarity', {}).get('embedding_dtype', 'float32')
+        self.ready = False
+        cache_size = self.config.get('similarity', {}).get('embedding_cache_size', 10000)
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if cache_size > 0:
+            self.embedding_cache = EmbeddingCache(
+                self.model_name, cache_size, self.config.get('similarity', {}).get('embedding_cache_path')
+            )
+        self.batcher = EmbeddingBatcher(
+            self.get_embeddings,
+            max_batch_size=self.config.get('similarity', {}).get('embedding_batch_size', 32),
+            max_wait=self.config.get('similarity', {}).get('embedding_batch_wait_ms', 5) / 1000
+        )
+        self.index = create_vector_index(config)
+        self.index_path: Optional[str] = self.config.get('similarity', {}).get('ivf', {}).get('index_path')
+        self.index_store: Optional['PlaybookStore'] = None
+
+    def _warmup(self):
+        self.backend.warmup()
+        self.ready = True
+
+    async def warmup(self):
+        """
+        Warms up the embedding backend, without blocking the event loop.
+
+        For the sentence transformer backend, this loads the model and runs
+        a first inference.
+
+        Once this completes, `ready` is True and requests no longer pay the
+        cost of loading the model.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self._warmup)
 
     def get_embedding(self, text: str) -> np.ndarray:
         """
@@ -41,7 +98,50 @@ class SimilarityService:
         Returns:
             A numpy array representing the vector embedding of the text.
         """
-        return self.model.encode([text])[0]
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Calculates the vector embeddings for several texts in one model call.
+
+        Texts whose embedding is in the embedding cache are not encoded
+        again; the others are encoded together and then cached.
+
+        Args:
+            texts: The texts to be embedded.
+
+        Returns:
+            A matrix with one embedding per text, in order.
+        """
+        texts = list(texts)
+        if self.embedding_cache is None or not texts:
+            return self.backend.encode(texts)
+
+        embeddings = self.embedding_cache.get_many(texts)
+        missing = list(dict.fromkeys(text for text, e in zip(texts, embeddings) if e is None))
+        if missing:
+            encoded = self.backend.encode(missing)
+            self.embedding_cache.put_many(missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            embeddings = [by_text[text] if e is None else e for text, e in zip(texts, embeddings)]
+        return np.stack(embeddings)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Asynchronously calculates the vector embeddings for several texts.
+
+        Unlike `get_embeddings`, this does not block the event loop: the
+        texts are handed to the service's `EmbeddingBatcher`, which merges
+        them with the texts of concurrent callers into micro-batches and
+        runs the model in an executor.
+
+        Args:
+            texts: The texts to be embedded.
+
+        Returns:
+            A matrix with one embedding per text, in order.
+        """
+        return await self.batcher.embed(texts)
 
     def is_similar(self, new_embedding: np.ndarray, existing_embeddings: List[np.ndarray]) -> bool:
         """
@@ -54,25 +154,250 @@ class SimilarityService:
 
         Args:
             new_embedding: The embedding of the new text or insight.
-            existing_embeddings: A list of embeddings from existing texts.
+            existing_embeddings: A list of embeddings from existing texts, or
+                                 a matrix with one embedding per row.
 
         Returns:
             True if a similar embedding is found, False otherwise.
         """
-        if not existing_embeddings:
+        if len(existing_embeddings) == 0:
             return False
 
         threshold = self.config.get('similarity', {}).get('threshold', 0.95)
 
-        # Reshape the new_embedding to be a 2D array for cosine_similarity
-        new_embedding = new_embedding.reshape(1, -1)
-
-        # Calculate cosine similarity between the new embedding and all existing ones
-        similarities = cosine_similarity(new_embedding, np.array(existing_embeddings))
+        # Calculate cosine similarity between the new embedding and all
+        # existing ones; zero vectors have a similarity of 0 to everything
+        existing_embeddings = np.asarray(existing_embeddings, dtype=np.float32)
+        new_embedding = np.asarray(new_embedding, dtype=np.float32).ravel()
+        norms = np.linalg.norm(existing_embeddings, axis=1) * np.linalg.norm(new_embedding)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = np.where(norms > 0, existing_embeddings @ new_embedding / norms, 0.0)
 
         # Check if any similarity score is above the threshold
         return np.any(similarities > threshold)
 
+    def deduplicate(self, embeddings: np.ndarray) -> List[int]:
+        """
+        Selects the embeddings that are not similar to an earlier selected one.
+
+        The embeddings are compared with each other through a single cosine
+        similarity matrix. They are then selected greedily, in order: an
+        embedding is kept unless it is above the similarity threshold to an
+        embedding kept before it, so the first of every group of
+        near-duplicates represents the group.
+
+        Args:
+            embeddings: A matrix with one embedding per row.
+
+        Returns:
+            The row indices of the selected embeddings, in order.
+        """
+        if len(embeddings) == 0:
+            return []
+
+        threshold = self.config.get('similarity', {}).get('threshold', 0.95)
+        similar = VectorIndex._normalize(embeddings)
+        similar = similar @ similar.T > threshold
+        kept: List[int] = []
+        for row in range(len(similar)):
+            if not similar[row, kept].any():
+                kept.append(row)
+        return kept
+
+    def serialize_embedding(self, embedding: np.ndarray) -> bytes:
+        """
+        Encodes an embedding for storage in the configured dtype.
+
+        The dtype is read from the `similarity.embedding_dtype` setting, which
+        can be `float32` (the default), `float16`, or `int8`.
+
+        Args:
+            embedding: The embedding to encode.
+
+        Returns:
+            The encoded embedding, as accepted by `is_similar_encoded`.
+        """
+        return encode_embedding(embedding, self.embedding_dtype)
+
+    def is_similar_encoded(self, new_embedding: np.ndarray, encoded_embeddings: List[bytes]) -> bool:
+        """
+        Checks if a new embedding is similar to any stored, encoded embeddings.
+
+        This is the counterpart of `is_similar` for embeddings as they are
+        stored. The cosine similarity is computed on the stored (possibly
+        quantized) form, using the norms recorded at encoding time, so the
+        embeddings are never decoded into float32 copies first.
+
+        Args:
+            new_embedding: The embedding of the new text or insight.
+            encoded_embeddings: Stored embeddings, as produced by
+                                `serialize_embedding` or raw float32 bytes.
+
+        Returns:
+            True if a similar embedding is found, False otherwise.
+        """
+        if not encoded_embeddings:
+            return False
+
+        threshold = self.config.get('similarity', {}).get('threshold', 0.95)
+        return bool(np.any(cosine_similarities(new_embedding, encoded_embeddings) > threshold))
+
+    @property
+    def index_loaded(self) -> bool:
+        """Whether the resident index has been loaded from a store."""
+        return self.index_store is not None
+
+    async def load_index(self, store: 'PlaybookStore', from_file: bool = True):
+        """
+        Loads the resident index from a store and keeps it in sync with it.
+
+        An approximate index is read from its index file, if one was saved,
+        and then reconciled with the store's entries, so that its centroids
+        do not have to be retrained.
+
+        The stored embeddings must have been produced by the configured
+        embedding backend. If the playbook holds embeddings of another
+        dimension, e.g. because `similarity.backend` was changed, the index
+        is not loaded, since every similarity check against it would fail.
+
+        Args:
+            store: The store whose embeddings to index.
+            from_file: Whether to start from the saved index file, if any.
+
+        Raises:
+            ValueError: If the stored embeddings do not match the dimension
+                        of the embedding backend.
+        """
+        if self.index_store is not None:
+            self.index_store.remove_listener(self.index)
+        entry_ids, embeddings = await store.get_embedding_matrix()
+        if len(entry_ids):
+            # The dimension of a model-based backend is only known once its
+            # model is loaded, so it is read in an executor.
+            backend_dim = await asyncio.get_running_loop().run_in_executor(None, lambda: self.backend.dim)
+            if embeddings.shape[1] != backend_dim:
+                raise ValueError(
+                    f"The playbook's embeddings have dimension {embeddings.shape[1]}, but the "
+                    f"'{self.backend.name}' embedding backend produces embeddings of dimension {backend_dim}. "
+                    "Switch back to the backend the playbook was embedded with, or re-embed the playbook."
+                )
+        if (from_file and isinstance(self.index, IVFIndex)
+                and self.index_path and os.path.exists(self.index_path)):
+            self.index.read(self.index_path)
+            self.index.reconcile(entry_ids, embeddings)
+        else:
+            self.index.load(entry_ids, embeddings)
+        store.add_listener(self.index)
+        self.index_store = store
+
+    def save_index(self):
+        """
+        Saves an approximate index to its index file.
+
+        Exact indexes are cheap to rebuild and are not saved.
+        """
+        if isinstance(self.index, IVFIndex) and self.index_path:
+            self.index.save(self.index_path)
+
+    async def sync_index(self):
+        """
+        Reloads the resident index from its store.
+
+        Writes made through the store are applied to the index as they
+        happen, so this is only needed after another process, such as the
+        CLI, wrote to the store's files.
+        """
+        if self.index_store is not None:
+            await self.index_store.refresh()
+            await self.load_index(self.index_store, from_file=False)
+
+    def unload_index(self):
+        """Saves and drops the resident index, and stops following its store."""
+        if self.index_store is not None:
+            self.index_store.remove_listener(self.index)
+            self.index_store = None
+            self.save_index()
+        self.index.clear()
+
+    def is_similar_to_index(self, new_embedding: np.ndarray) -> bool:
+        """
+        Checks if a new embedding is similar to any embedding in the resident index.
+
+        Args:
+            new_embedding: The embedding of the new text or insight.
+
+        Returns:
+            True if a similar embedding is found, False otherwise.
+        """
+        threshold = self.config.get('similarity', {}).get('threshold', 0.95)
+        return self.index.any_above(new_embedding, threshold)
+
+    def are_similar_to_index(self, new_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Checks, for each of several embeddings, if it is similar to any embedding in the resident index.
+
+        Args:
+            new_embeddings: A matrix with one embedding per row.
+
+        Returns:
+            A boolean array with one flag per embedding.
+        """
+        threshold = self.config.get('similarity', {}).get('threshold', 0.95)
+        return self.index.any_above_batch(new_embeddings, threshold)
+
+    def find_similar(
+        self,
+        embedding: np.ndarray,
+        k: int = 10,
+        threshold: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Finds the entries in the resident index most similar to an embedding.
+
+        Args:
+            embedding: The query embedding.
+            k: The maximum number of entries to return.
+            threshold: If given, only entries more similar than this are
+                       returned.
+
+        Returns:
+            A list of `(entry_id, similarity)` tuples, most similar first.
+        """
+        return self.index.search(embedding, k, threshold)
+
+def create_vector_index(config: Dict[str, Any]) -> Union[VectorIndex, IVFIndex]:
+    """
+    Factory function to create the resident similarity index.
+
+    The index is selected by the `similarity.index` setting:
+    - `exact` (the default): a `VectorIndex`, which compares a query with
+      every entry.
+    - `ivf`: an `IVFIndex`, which only compares a query with the entries in
+      the `similarity.ivf.nprobe` closest of `similarity.ivf.nlist` lists.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        An empty index.
+
+    Raises:
+        ValueError: If the specified index type is unknown.
+    """
+    similarity_config = config.get('similarity', {})
+    index_type = similarity_config.get('index', 'exact')
+    if index_type == 'exact':
+        return VectorIndex()
+    elif index_type == 'ivf':
+        ivf_config = similarity_config.get('ivf', {})
+        return IVFIndex(
+            nlist=ivf_config.get('nlist', 1024),
+            nprobe=ivf_config.get('nprobe', 16),
+            train_size=ivf_config.get('train_size')
+        )
+    else:
+        raise ValueError(f"Unknown similarity index: {index_type}")
+
 # A global singleton instance of the SimilarityService.
 _similarity_service = None
 
@@ -82,7 +407,7 @@ def get_similarity_service(config: Dict[str, Any]) -> SimilarityService:
 
     This function ensures that there is only one instance of the
     `SimilarityService` throughout the application's lifecycle. This avoids
-    re-loading the sentence transformer model, which can be resource-intensive.
+    re-loading the embedding model, which can be resource-intensive.
 
     Args:
         config: The application's configuration dictionary.
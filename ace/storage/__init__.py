@@ -0,0 +1,60 @@
+from .base import PlaybookStore, PlaybookStoreListener
+from .sqlite_store import SQLitePlaybookStore
+from .memory_store import InMemoryPlaybookStore
+from .sharded_store import ShardedSQLitePlaybookStore
+from typing import Dict, Any, Optional
+
+def create_playbook_store(config: Dict[str, Any]) -> PlaybookStore:
+    """
+    Factory function to create a playbook store based on the configuration.
+
+    The backend is selected by the `storage.backend` setting:
+    - `sqlite` (the default): a single SQLite file at
+      `ace.database.DATABASE_PATH`, with a memory-mapped embedding matrix
+      alongside it if `storage.embedding_matrix` is enabled.
+    - `sharded`: `storage.shards` SQLite files, named by formatting
+      `storage.shard_path` with the shard index.
+    - `memory`: an in-memory store that is not persisted.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        An instance of a class that implements the `PlaybookStore` interface.
+
+    Raises:
+        ValueError: If the specified storage backend is unknown.
+    """
+    storage_config = config.get('storage', {})
+    backend = storage_config.get('backend', 'sqlite')
+    if backend == 'sqlite':
+        return SQLitePlaybookStore(use_embedding_matrix=storage_config.get('embedding_matrix', False))
+    elif backend == 'sharded':
+        shard_path = storage_config.get('shard_path', 'ace_playbook.shard{index}.db')
+        shards = storage_config.get('shards', 4)
+        return ShardedSQLitePlaybookStore([shard_path.format(index=i) for i in range(shards)])
+    elif backend == 'memory':
+        return InMemoryPlaybookStore()
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+# A global singleton instance of the configured PlaybookStore.
+_playbook_store: Optional[PlaybookStore] = None
+
+def get_playbook_store(config: Dict[str, Any]) -> PlaybookStore:
+    """
+    Returns a singleton instance of the configured playbook store.
+
+    This ensures that every component of the application shares the same
+    store, and therefore the same connection pools and caches.
+
+    Args:
+        config: The application's configuration dictionary.
+
+    Returns:
+        A singleton instance of a `PlaybookStore`.
+    """
+    global _playbook_store
+    if _playbook_store is None:
+        _playbook_store = create_playbook_store(config)
+    return _playbook_store
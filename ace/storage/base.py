@@ -0,0 +1,388 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+import numpy as np
+from ace.embedding_codec import decode_embedding, parse_embedding
+
+if TYPE_CHECKING:
+    from ace.similarity import SimilarityService
+
+def check_embedding_dim(entries: List[Dict[str, Any]], dim: Optional[int]) -> Optional[int]:
+    """
+    Checks that the embeddings of entries have the same dimension.
+
+    The embeddings are parsed from their headers, not decoded.
+
+    Args:
+        entries: The entries, with `embedding` keys.
+        dim: The dimension the embeddings must have, or None to only
+             require them to agree with each other.
+
+    Returns:
+        The dimension of the embeddings, or `dim` if none has one.
+
+    Raises:
+        ValueError: If an embedding has another dimension.
+    """
+    for entry in entries:
+        if entry["embedding"] is None:
+            continue
+        size = parse_embedding(entry["embedding"]).values.size
+        if dim is None:
+            dim = size
+        elif size != dim:
+            raise ValueError(
+                f"Expected embeddings of dimension {dim}, got {size} for entry {entry['id']}. "
+                "Was the embedding backend changed without re-embedding the playbook?"
+            )
+    return dim
+
+class PlaybookStoreListener(ABC):
+    """
+    Abstract base class for an object that follows the writes to a store.
+
+    Listeners are registered with `PlaybookStore.add_listener` and are called
+    after each write has been committed. They are used to keep derived,
+    in-memory state, such as a vector index, in sync with the store.
+    """
+
+    @abstractmethod
+    def on_entries_upserted(self, entries: List[Dict[str, Any]]):
+        """
+        Called after entries were added or updated.
+
+        Args:
+            entries: The written entries, with `id`, `content`, `metadata`,
+                     and `embedding` keys.
+        """
+        pass
+
+    @abstractmethod
+    def on_entries_deleted(self, entry_ids: List[str]):
+        """
+        Called after entries were deleted.
+
+        Args:
+            entry_ids: The IDs of the deleted entries.
+        """
+        pass
+
+    def check_entries(self, entries: List[Dict[str, Any]]):
+        """
+        Called before entries are added or updated.
+
+        A listener that could not apply the write raises here, so that the
+        store rejects it before anything is committed.
+
+        Args:
+            entries: The entries about to be written.
+
+        Raises:
+            ValueError: If the listener cannot apply the write.
+        """
+        pass
+
+class PlaybookStore(ABC):
+    """
+    Abstract base class for a playbook storage backend.
+
+    This class defines the asynchronous interface through which the rest of
+    the framework reads and writes playbook entries and clusters. By
+    depending on this interface instead of on a particular database, the
+    `Playbook`, `Curator`, and `ClusterManager` can run against any backend,
+    such as a single SQLite file, several sharded SQLite files, or a purely
+    in-memory store for tests and benchmarks.
+
+    Entries are exchanged as dictionaries with `id`, `content`, `metadata`,
+    and `embedding` keys.
+
+    Implementations call `_notify_upserted` and `_notify_deleted` after each
+    write, so that registered listeners see every change made through the
+    store, and `_check_upserted` before writing entries, so that listeners
+    can reject a write they could not apply. Every write, including cluster assignments, also increments the
+    store's `version`, so that state derived from the store's contents can
+    be cached until the version changes.
+    """
+
+    def __init__(self):
+        """Initializes the store's listener registry and version counter."""
+        self._listeners: List[PlaybookStoreListener] = []
+        self.version = 0
+
+    def add_listener(self, listener: PlaybookStoreListener):
+        """
+        Registers a listener to be notified of every write.
+
+        Args:
+            listener: The listener to register.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: PlaybookStoreListener):
+        """
+        Unregisters a listener.
+
+        Args:
+            listener: The listener to unregister.
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _bump_version(self):
+        self.version += 1
+
+    def _check_upserted(self, entries: List[Dict[str, Any]]):
+        # Called by implementations before they write, so that a write the
+        # listeners would reject is not committed.
+        for listener in self._listeners:
+            listener.check_entries(entries)
+
+    def _notify_upserted(self, entries: List[Dict[str, Any]]):
+        self._bump_version()
+        for listener in self._listeners:
+            listener.on_entries_upserted(entries)
+
+    def _notify_deleted(self, entry_ids: List[str]):
+        self._bump_version()
+        for listener in self._listeners:
+            listener.on_entries_deleted(entry_ids)
+
+    async def initialize(self):
+        """
+        Prepares the store for use, e.g. by creating its schema.
+
+        This should be called once at the application's startup.
+        """
+        pass
+
+    async def open(self, config: Dict[str, Any]):
+        """
+        Acquires long-lived resources, such as connection pools.
+
+        Args:
+            config: The application's configuration dictionary.
+        """
+        pass
+
+    async def close(self):
+        """Releases the resources acquired by `open`."""
+        pass
+
+    async def refresh(self):
+        """
+        Discards state derived from the underlying storage, such as caches.
+
+        This should be called after another process may have written to the
+        store's files. Stores backed by files increment their `version`, as
+        writes made by other processes are not otherwise noticed.
+        """
+        pass
+
+    @abstractmethod
+    async def upsert_entries(self, entries: List[Dict[str, Any]]):
+        """
+        Adds or updates several entries at once.
+
+        Entries whose `id` already exists are replaced.
+
+        Args:
+            entries: The entries to persist.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_entries(self, entry_ids: List[str]):
+        """
+        Deletes several entries at once.
+
+        IDs that do not exist are ignored.
+
+        Args:
+            entry_ids: The IDs of the entries to delete.
+        """
+        pass
+
+    @abstractmethod
+    async def get_all_entries(self) -> List[Dict[str, Any]]:
+        """
+        Retrieves every entry, including its embedding.
+
+        Returns:
+            A list of all entries.
+        """
+        pass
+
+    @abstractmethod
+    def iter_entries(
+        self,
+        columns: Sequence[str] = ("id", "content", "metadata"),
+        batch_size: int = 500
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        """
+        Asynchronously iterates over the entries in bounded batches.
+
+        Args:
+            columns: The entry fields to read.
+            batch_size: The maximum number of entries read at a time.
+
+        Yields:
+            A mapping with the requested fields for each entry.
+        """
+        pass
+
+    @abstractmethod
+    async def get_entries_by_ids(self, entry_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieves several entries by their IDs.
+
+        Args:
+            entry_ids: The IDs of the entries to retrieve.
+
+        Returns:
+            The entries that exist, in the order of `entry_ids`.
+        """
+        pass
+
+    async def get_entry(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a single entry by its ID.
+
+        Args:
+            entry_id: The ID of the entry to retrieve.
+
+        Returns:
+            The entry, or None if it does not exist.
+        """
+        entries = await self.get_entries_by_ids([entry_id])
+        return entries[0] if entries else None
+
+    @abstractmethod
+    async def get_entry_by_content_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves the entry whose normalized content has the given hash.
+
+        Args:
+            digest: A content hash, as computed by `ace.database.content_hash`.
+
+        Returns:
+            The entry, or None if no entry has that content.
+        """
+        pass
+
+    @abstractmethod
+    async def contents_exist(self, contents: List[str]) -> List[bool]:
+        """
+        Checks which of the given contents already exist.
+
+        Args:
+            contents: The contents to check for.
+
+        Returns:
+            A list of booleans aligned with `contents`.
+        """
+        pass
+
+    @abstractmethod
+    async def is_similar_embedding_present(
+        self,
+        similarity_service: 'SimilarityService',
+        embedding: np.ndarray,
+        batch_size: int = 1000
+    ) -> bool:
+        """
+        Checks if any stored embedding is similar to the given one.
+
+        Args:
+            similarity_service: The similarity service to use for the check.
+            embedding: The embedding to check for similarity.
+            batch_size: The number of stored embeddings compared at a time.
+
+        Returns:
+            True if a similar embedding is found, False otherwise.
+        """
+        pass
+
+    async def get_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Retrieves the embeddings of all entries as one float32 matrix.
+
+        The default implementation reads and decodes every embedding; stores
+        that keep a contiguous copy of their embeddings return it directly.
+
+        Returns:
+            A tuple of the IDs of the entries that have an embedding and a
+            matrix with one row per entry, in the same order.
+        """
+        entry_ids, embeddings = [], []
+        async for row in self.iter_entries(("id", "embedding")):
+            if row["embedding"]:
+                entry_ids.append(row["id"])
+                embeddings.append(decode_embedding(row["embedding"]))
+        if not embeddings:
+            return [], np.empty((0, 0), dtype=np.float32)
+        return entry_ids, np.stack(embeddings)
+
+    @abstractmethod
+    async def assign_clusters(self, assignments: Dict[str, int], summaries: Optional[Dict[int, str]] = None):
+        """
+        Replaces all cluster assignments and, optionally, their summaries.
+
+        Entries not listed in `assignments` are left unassigned, and clusters
+        that are neither assigned nor summarized are removed.
+
+        Args:
+            assignments: A mapping of entry IDs to their new cluster IDs.
+            summaries: An optional mapping of cluster IDs to their summaries.
+        """
+        pass
+
+    async def get_entry_clusters(self, entry_ids: List[str]) -> Dict[str, int]:
+        """
+        Looks up the clusters of several entries.
+
+        The default implementation reads every cluster; stores that can look
+        up single entries override it.
+
+        Args:
+            entry_ids: The IDs of the entries.
+
+        Returns:
+            A dictionary mapping the ID of every entry that belongs to a
+            cluster to its cluster ID.
+        """
+        wanted = set(entry_ids)
+        return {
+            entry["id"]: cluster_id
+            for cluster_id, data in (await self.get_clusters_with_entries()).items()
+            for entry in data["entries"]
+            if entry["id"] in wanted
+        }
+
+    async def get_cluster_summaries(self, cluster_ids: List[int]) -> Dict[int, str]:
+        """
+        Retrieves the summaries of several clusters.
+
+        Args:
+            cluster_ids: The IDs of the clusters.
+
+        Returns:
+            A dictionary mapping the ID of every cluster that has a summary
+            to that summary.
+        """
+        wanted = set(cluster_ids)
+        return {
+            cluster_id: data["summary"]
+            for cluster_id, data in (await self.get_clusters_with_entries()).items()
+            if cluster_id in wanted and data["summary"]
+        }
+
+    @abstractmethod
+    async def get_clusters_with_entries(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Retrieves all clusters, their summaries, and their entries.
+
+        Returns:
+            A dictionary mapping cluster IDs to dictionaries with `summary`
+            and `entries` keys.
+        """
+        pass
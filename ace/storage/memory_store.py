@@ -0,0 +1,149 @@
+import collections
+import copy
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, TYPE_CHECKING
+import numpy as np
+from ace.database import ENTRY_COLUMNS, content_hash
+from .base import PlaybookStore
+
+if TYPE_CHECKING:
+    from ace.similarity import SimilarityService
+
+class InMemoryPlaybookStore(PlaybookStore):
+    """
+    A playbook store that keeps every entry in process memory.
+
+    Nothing is persisted, so this store is intended for tests and
+    benchmarks, where it removes database I/O from the measurements. It
+    mirrors the semantics of the SQLite store: entries are kept in insertion
+    order, replacing an entry moves it to the end, and content is unique, so
+    an upsert removes any other entry with identical content.
+    """
+
+    def __init__(self):
+        """Initializes an empty store."""
+        super().__init__()
+        self._entries: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self._ids_by_content: Dict[str, str] = {}
+        self._ids_by_hash: Dict[str, set] = collections.defaultdict(set)
+        self._clusters: Dict[int, str] = {}
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id)
+        del self._ids_by_content[entry["content"]]
+        self._ids_by_hash[entry["content_hash"]].discard(entry_id)
+        if not self._ids_by_hash[entry["content_hash"]]:
+            del self._ids_by_hash[entry["content_hash"]]
+
+    async def upsert_entries(self, entries: List[Dict[str, Any]]):
+        self._check_upserted(entries)
+        replaced = []
+        for entry in entries:
+            if entry["id"] in self._entries:
+                self._remove(entry["id"])
+            if entry["content"] in self._ids_by_content:
+                replaced.append(self._ids_by_content[entry["content"]])
+                self._remove(replaced[-1])
+            digest = content_hash(entry["content"])
+            self._entries[entry["id"]] = {
+                "id": entry["id"],
+                "content": entry["content"],
+                "metadata": copy.deepcopy(entry["metadata"]),
+                "embedding": entry["embedding"],
+                "cluster_id": None,
+                "content_hash": digest,
+            }
+            self._ids_by_content[entry["content"]] = entry["id"]
+            self._ids_by_hash[digest].add(entry["id"])
+        self._notify_upserted(entries)
+        replaced = [entry_id for entry_id in dict.fromkeys(replaced) if entry_id not in self._entries]
+        if replaced:
+            # Entries with the same content under another ID were replaced.
+            self._notify_deleted(replaced)
+
+    async def delete_entries(self, entry_ids: List[str]):
+        for entry_id in entry_ids:
+            if entry_id in self._entries:
+                self._remove(entry_id)
+        self._notify_deleted(entry_ids)
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": entry["id"],
+            "content": entry["content"],
+            "metadata": copy.deepcopy(entry["metadata"]),
+            "embedding": entry["embedding"],
+        }
+
+    async def get_all_entries(self) -> List[Dict[str, Any]]:
+        return [self._public(e) for e in self._entries.values()]
+
+    async def iter_entries(
+        self,
+        columns: Sequence[str] = ("id", "content", "metadata"),
+        batch_size: int = 500
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        unknown = set(columns) - set(ENTRY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown playbook entry columns: {sorted(unknown)}")
+        for entry in list(self._entries.values()):
+            row = {column: entry[column] for column in columns}
+            if "metadata" in row:
+                row["metadata"] = copy.deepcopy(row["metadata"])
+            yield row
+
+    async def get_entries_by_ids(self, entry_ids: List[str]) -> List[Dict[str, Any]]:
+        return [self._public(self._entries[i]) for i in entry_ids if i in self._entries]
+
+    async def get_entry_by_content_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        entry_ids = self._ids_by_hash.get(digest)
+        if not entry_ids:
+            return None
+        return self._public(self._entries[next(iter(entry_ids))])
+
+    async def contents_exist(self, contents: List[str]) -> List[bool]:
+        return [content_hash(content) in self._ids_by_hash for content in contents]
+
+    async def is_similar_embedding_present(
+        self,
+        similarity_service: 'SimilarityService',
+        embedding: np.ndarray,
+        batch_size: int = 1000
+    ) -> bool:
+        embeddings = [e["embedding"] for e in self._entries.values() if e["embedding"] is not None]
+        for start in range(0, len(embeddings), batch_size):
+            if similarity_service.is_similar_encoded(embedding, embeddings[start:start + batch_size]):
+                return True
+        return False
+
+    async def assign_clusters(self, assignments: Dict[str, int], summaries: Optional[Dict[int, str]] = None):
+        for entry in self._entries.values():
+            entry["cluster_id"] = assignments.get(entry["id"])
+        live_clusters = set(assignments.values()) | set(summaries or {})
+        self._clusters = {i: s for i, s in self._clusters.items() if i in live_clusters}
+        self._clusters.update(summaries or {})
+        self._bump_version()
+
+    async def get_entry_clusters(self, entry_ids: List[str]) -> Dict[str, int]:
+        return {
+            entry_id: self._entries[entry_id]["cluster_id"]
+            for entry_id in entry_ids
+            if entry_id in self._entries and self._entries[entry_id]["cluster_id"] is not None
+        }
+
+    async def get_cluster_summaries(self, cluster_ids: List[int]) -> Dict[int, str]:
+        return {i: self._clusters[i] for i in cluster_ids if self._clusters.get(i)}
+
+    async def get_clusters_with_entries(self) -> Dict[int, Dict[str, Any]]:
+        clusters = collections.defaultdict(lambda: {"summary": "", "entries": []})
+        for cluster_id, summary in self._clusters.items():
+            clusters[cluster_id]["summary"] = summary
+        for entry in self._entries.values():
+            if entry["cluster_id"] is not None:
+                clusters[entry["cluster_id"]]["entries"].append({
+                    "id": entry["id"],
+                    "content": entry["content"],
+                    "metadata": copy.deepcopy(entry["metadata"]),
+                    "cluster_id": entry["cluster_id"],
+                })
+        return dict(clusters)
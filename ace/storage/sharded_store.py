@@ -0,0 +1,180 @@
+import asyncio
+import collections
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, TYPE_CHECKING
+import numpy as np
+from ace import database
+from .base import PlaybookStore
+
+if TYPE_CHECKING:
+    from ace.similarity import SimilarityService
+
+class ShardedSQLitePlaybookStore(PlaybookStore):
+    """
+    A playbook store that spreads entries across several SQLite files.
+
+    Each entry lives in the shard selected by a stable hash of its ID. Every
+    shard has its own connection pool and writer, so writes to different
+    shards are committed in parallel instead of contending for a single
+    database lock. Queries that are not keyed by ID, such as content and
+    similarity checks, fan out to every shard. Cluster summaries are kept in
+    the first shard.
+
+    Content uniqueness is only enforced within a shard, so callers should
+    check `contents_exist` before inserting, as the `Curator` does.
+    """
+
+    def __init__(self, paths: List[str]):
+        """
+        Initializes the store.
+
+        Args:
+            paths: The paths to the SQLite files, one per shard. The order
+                   determines the shard assignment and must not change
+                   once entries have been written.
+
+        Raises:
+            ValueError: If no paths are given.
+        """
+        if not paths:
+            raise ValueError("A sharded playbook store needs at least one shard.")
+        super().__init__()
+        self.paths = list(paths)
+
+    def shard_for(self, entry_id: str) -> str:
+        """
+        Returns the path of the shard that holds an entry.
+
+        Args:
+            entry_id: The ID of the entry.
+
+        Returns:
+            The path of the entry's shard.
+        """
+        return self.paths[zlib.crc32(entry_id.encode("utf-8")) % len(self.paths)]
+
+    def _group_by_shard(self, items: List[Any], key) -> Dict[str, List[Any]]:
+        groups = collections.defaultdict(list)
+        for item in items:
+            groups[self.shard_for(key(item))].append(item)
+        return groups
+
+    async def initialize(self):
+        await asyncio.gather(*[database.initialize_database(path=path) for path in self.paths])
+
+    async def open(self, config: Dict[str, Any]):
+        for path in self.paths:
+            await database.open_pool(config, path=path)
+
+    async def close(self):
+        for path in self.paths:
+            await database.close_pool(path=path)
+
+    async def refresh(self):
+        for path in self.paths:
+            database.clear_entry_cache(path=path)
+            await database.rebuild_content_filter(path=path)
+        self._bump_version()
+
+    async def upsert_entries(self, entries: List[Dict[str, Any]]):
+        self._check_upserted(entries)
+        groups = self._group_by_shard(entries, lambda e: e["id"])
+        shards = await asyncio.gather(*[
+            database.add_or_update_playbook_entries(shard_entries, path=path)
+            for path, shard_entries in groups.items()
+        ])
+        self._notify_upserted(entries)
+        replaced = [entry_id for shard in shards for entry_id in shard]
+        if replaced:
+            # Entries with the same content under another ID were replaced.
+            self._notify_deleted(replaced)
+
+    async def delete_entries(self, entry_ids: List[str]):
+        groups = self._group_by_shard(entry_ids, lambda i: i)
+        await asyncio.gather(*[
+            database.delete_playbook_entries(ids, path=path) for path, ids in groups.items()
+        ])
+        self._notify_deleted(entry_ids)
+
+    async def get_all_entries(self) -> List[Dict[str, Any]]:
+        shards = await asyncio.gather(*[database.get_all_playbook_entries(path=path) for path in self.paths])
+        return [entry for shard in shards for entry in shard]
+
+    async def iter_entries(
+        self,
+        columns: Sequence[str] = ("id", "content", "metadata"),
+        batch_size: int = 500
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        for path in self.paths:
+            async for row in database.iter_playbook_entries(columns, batch_size, path=path):
+                yield row
+
+    async def get_entries_by_ids(self, entry_ids: List[str]) -> List[Dict[str, Any]]:
+        groups = self._group_by_shard(entry_ids, lambda i: i)
+        shards = await asyncio.gather(*[
+            database.get_playbook_entries_by_ids(ids, path=path) for path, ids in groups.items()
+        ])
+        found = {entry["id"]: entry for shard in shards for entry in shard}
+        return [found[i] for i in entry_ids if i in found]
+
+    async def get_entry_by_content_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        for path in self.paths:
+            entry = await database.get_playbook_entry_by_content_hash(digest, path=path)
+            if entry is not None:
+                return entry
+        return None
+
+    async def contents_exist(self, contents: List[str]) -> List[bool]:
+        shards = await asyncio.gather(*[database.contents_exist(contents, path=path) for path in self.paths])
+        return [any(found) for found in zip(*shards)] if shards else [False] * len(contents)
+
+    async def is_similar_embedding_present(
+        self,
+        similarity_service: 'SimilarityService',
+        embedding: np.ndarray,
+        batch_size: int = 1000
+    ) -> bool:
+        for path in self.paths:
+            if await database.is_similar_embedding_present(
+                similarity_service, embedding, batch_size=batch_size, path=path
+            ):
+                return True
+        return False
+
+    async def assign_clusters(self, assignments: Dict[str, int], summaries: Optional[Dict[int, str]] = None):
+        groups = collections.defaultdict(dict)
+        for entry_id, cluster_id in assignments.items():
+            groups[self.shard_for(entry_id)][entry_id] = cluster_id
+        # The first shard keeps the summaries of every live cluster, including
+        # those whose entries all live in other shards.
+        live_clusters = sorted(set(assignments.values()))
+        await asyncio.gather(*[
+            database.assign_clusters(
+                groups.get(path, {}),
+                summaries if index == 0 else None,
+                keep_clusters=live_clusters if index == 0 else (),
+                path=path
+            )
+            for index, path in enumerate(self.paths)
+        ])
+        self._bump_version()
+
+    async def get_entry_clusters(self, entry_ids: List[str]) -> Dict[str, int]:
+        groups = self._group_by_shard(entry_ids, lambda i: i)
+        shards = await asyncio.gather(*[
+            database.get_entry_cluster_ids(ids, path=path) for path, ids in groups.items()
+        ])
+        return {entry_id: cluster_id for shard in shards for entry_id, cluster_id in shard.items()}
+
+    async def get_cluster_summaries(self, cluster_ids: List[int]) -> Dict[int, str]:
+        # The first shard keeps the summaries of every live cluster.
+        return await database.get_cluster_summaries(cluster_ids, path=self.paths[0])
+
+    async def get_clusters_with_entries(self) -> Dict[int, Dict[str, Any]]:
+        shards = await asyncio.gather(*[database.get_all_clusters_with_entries(path=path) for path in self.paths])
+        clusters = collections.defaultdict(lambda: {"summary": "", "entries": []})
+        for shard in shards:
+            for cluster_id, data in shard.items():
+                clusters[cluster_id]["summary"] = clusters[cluster_id]["summary"] or data["summary"]
+                clusters[cluster_id]["entries"].extend(data["entries"])
+        return dict(clusters)
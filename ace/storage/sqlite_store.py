@@ -0,0 +1,165 @@
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
+import numpy as np
+from ace import database
+from ace.embedding_codec import decode_embedding
+from ace.embedding_matrix import EmbeddingMatrix
+from .base import PlaybookStore, check_embedding_dim
+
+if TYPE_CHECKING:
+    from ace.similarity import SimilarityService
+
+class SQLitePlaybookStore(PlaybookStore):
+    """
+    A playbook store backed by a single SQLite database file.
+
+    This store is a thin adapter over the functions in `ace.database`, and
+    therefore shares their connection pool, write coalescing, content Bloom
+    filter, and entry cache. When no path is given, it follows
+    `ace.database.DATABASE_PATH`.
+
+    Optionally, the store also keeps an `EmbeddingMatrix` next to the
+    database file, so that similarity checks and clustering read the
+    embeddings from one memory-mapped matrix instead of decoding them from
+    the database row by row. The matrix is checked against the database in
+    `initialize` and rebuilt if they disagree, e.g. after the database was
+    written by another process.
+    """
+
+    def __init__(self, path: Optional[str] = None, use_embedding_matrix: bool = False):
+        """
+        Initializes the store.
+
+        Args:
+            path: The path to the SQLite database file. Defaults to
+                  `ace.database.DATABASE_PATH`, resolved at each call.
+            use_embedding_matrix: Whether to keep a memory-mapped embedding
+                                  matrix alongside the database. It is
+                                  created by `initialize`.
+        """
+        super().__init__()
+        self.path = path
+        self.use_embedding_matrix = use_embedding_matrix
+        self.embedding_matrix: Optional[EmbeddingMatrix] = None
+
+    async def initialize(self):
+        await database.initialize_database(path=self.path)
+        if self.use_embedding_matrix:
+            self.embedding_matrix = EmbeddingMatrix(self.path or database.DATABASE_PATH)
+            await self.sync_embedding_matrix()
+
+    async def refresh(self):
+        database.clear_entry_cache(path=self.path)
+        await database.rebuild_content_filter(path=self.path)
+        await self.sync_embedding_matrix()
+        self._bump_version()
+
+    async def sync_embedding_matrix(self, force: bool = False) -> bool:
+        """
+        Checks the embedding matrix against the database and rebuilds it if needed.
+
+        Args:
+            force: Whether to rebuild the matrix even if it looks consistent.
+
+        Returns:
+            True if the matrix was rebuilt, False otherwise.
+        """
+        if self.embedding_matrix is None:
+            return False
+        if not force and self.embedding_matrix.is_consistent(
+            await database.get_embedded_content_hashes(path=self.path)
+        ):
+            return False
+
+        rows = []
+        async for row in database.iter_playbook_entries(("id", "content_hash", "embedding"), path=self.path):
+            if row["embedding"] is not None:
+                rows.append((row["id"], row["content_hash"], decode_embedding(row["embedding"])))
+        self.embedding_matrix.rebuild(rows)
+        return True
+
+    async def open(self, config: Dict[str, Any]):
+        await database.open_pool(config, path=self.path)
+
+    async def close(self):
+        await database.close_pool(path=self.path)
+
+    async def upsert_entries(self, entries: List[Dict[str, Any]]):
+        self._check_upserted(entries)
+        if self.embedding_matrix is not None:
+            check_embedding_dim(entries, self.embedding_matrix.dim)
+        replaced = await database.add_or_update_playbook_entries(entries, path=self.path)
+        if self.embedding_matrix is not None:
+            embedded = [e for e in entries if e["embedding"] is not None]
+            self.embedding_matrix.delete(e["id"] for e in entries if e["embedding"] is None)
+            if embedded:
+                self.embedding_matrix.add(
+                    [e["id"] for e in embedded],
+                    [database.content_hash(e["content"]) for e in embedded],
+                    np.stack([decode_embedding(e["embedding"]) for e in embedded])
+                )
+            self.embedding_matrix.delete(replaced)
+        self._notify_upserted(entries)
+        if replaced:
+            # Entries with the same content under another ID were replaced.
+            self._notify_deleted(replaced)
+
+    async def delete_entries(self, entry_ids: List[str]):
+        await database.delete_playbook_entries(entry_ids, path=self.path)
+        if self.embedding_matrix is not None:
+            self.embedding_matrix.delete(entry_ids)
+            if self.embedding_matrix.dead_rows > len(self.embedding_matrix):
+                self.embedding_matrix.compact()
+        self._notify_deleted(entry_ids)
+
+    async def get_all_entries(self) -> List[Dict[str, Any]]:
+        return await database.get_all_playbook_entries(path=self.path)
+
+    async def iter_entries(
+        self,
+        columns: Sequence[str] = ("id", "content", "metadata"),
+        batch_size: int = 500
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        async for row in database.iter_playbook_entries(columns, batch_size, path=self.path):
+            yield row
+
+    async def get_entries_by_ids(self, entry_ids: List[str]) -> List[Dict[str, Any]]:
+        return await database.get_playbook_entries_by_ids(entry_ids, path=self.path)
+
+    async def get_entry_by_content_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        return await database.get_playbook_entry_by_content_hash(digest, path=self.path)
+
+    async def contents_exist(self, contents: List[str]) -> List[bool]:
+        return await database.contents_exist(contents, path=self.path)
+
+    async def is_similar_embedding_present(
+        self,
+        similarity_service: 'SimilarityService',
+        embedding: np.ndarray,
+        batch_size: int = 1000
+    ) -> bool:
+        if self.embedding_matrix is not None:
+            return any(
+                similarity_service.is_similar(embedding, batch)
+                for batch in self.embedding_matrix.iter_batches(batch_size)
+            )
+        return await database.is_similar_embedding_present(
+            similarity_service, embedding, batch_size=batch_size, path=self.path
+        )
+
+    async def get_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
+        if self.embedding_matrix is not None:
+            return self.embedding_matrix.live()
+        return await super().get_embedding_matrix()
+
+    async def assign_clusters(self, assignments: Dict[str, int], summaries: Optional[Dict[int, str]] = None):
+        await database.assign_clusters(assignments, summaries, path=self.path)
+        self._bump_version()
+
+    async def get_entry_clusters(self, entry_ids: List[str]) -> Dict[str, int]:
+        return await database.get_entry_cluster_ids(entry_ids, path=self.path)
+
+    async def get_cluster_summaries(self, cluster_ids: List[int]) -> Dict[int, str]:
+        return await database.get_cluster_summaries(cluster_ids, path=self.path)
+
+    async def get_clusters_with_entries(self) -> Dict[int, Dict[str, Any]]:
+        return await database.get_all_clusters_with_entries(path=self.path)
@@ -75,6 +75,18 @@ class TestAcePipeline(unittest.TestCase):
 
         asyncio.run(_test())
 
+    def test_generate_stream_matches_generate(self):
+        """
+        Tests that a streamed trajectory concatenates to a complete response.
+        """
+        async def _test():
+            llm = get_language_model(self.config)
+            chunks = [chunk async for chunk in llm.generate_stream("prompt")]
+            self.assertGreater(len(chunks), 1)
+            self.assertIn("".join(chunks), self.config['language_model']['mock']['responses'])
+
+        asyncio.run(_test())
+
     def test_reflector_malformed_json(self):
         """
         Tests that the Reflector handles malformed JSON responses gracefully.
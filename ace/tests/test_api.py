@@ -1,9 +1,17 @@
 import unittest
 import os
 import asyncio
+import json
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from ace.main import app
+from ace.plugins.manager import plugin_manager
 from ace import database
+from ace.config import settings
+from ace.similarity import SimilarityService, get_similarity_service
+
+# The model-free hashing backend, so that tests can run the pipeline offline.
+HASHING_CONFIG = {**settings, 'similarity': {**settings['similarity'], 'backend': 'hashing'}}
 
 class TestApiSecurity(unittest.TestCase):
     """
@@ -54,5 +62,81 @@ class TestApiSecurity(unittest.TestCase):
         response = self.client.get("/playbook/", headers={"X-API-Key": "test-key-1"})
         self.assertEqual(response.status_code, 200)
 
+    def test_playbook_is_streamed_without_embeddings(self):
+        """
+        Tests that the playbook endpoint returns every entry as JSON and
+        leaves out the embeddings.
+        """
+        async def _add_entries():
+            await database.add_or_update_playbook_entries([
+                {"id": f"id{i}", "content": f"content {i}", "metadata": {"n": i}, "embedding": b"\x00\xff"}
+                for i in range(3)
+            ])
+        asyncio.run(_add_entries())
+
+        response = self.client.get("/playbook/", headers={"X-API-Key": "test-key-1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {"id": f"id{i}", "content": f"content {i}", "metadata": {"n": i}} for i in range(3)
+        ])
+
+    def test_health_and_readiness_probes(self):
+        """
+        Tests that the server is live at once, but only ready after the
+        embedding model has been warmed up, and that probes need no API key.
+        """
+        with patch('ace.similarity._similarity_service', SimilarityService(HASHING_CONFIG)):
+            similarity_service = get_similarity_service(settings)
+            self.assertFalse(similarity_service.ready)
+
+            self.assertEqual(self.client.get("/healthz").status_code, 200)
+            self.assertEqual(self.client.get("/readyz").status_code, 503)
+
+            asyncio.run(similarity_service.warmup())
+            self.assertEqual(self.client.get("/readyz").json(), {"status": "ready"})
+
+    def test_run_ace_stream_emits_tokens_and_stages(self):
+        """
+        Tests that the streaming pipeline endpoint emits the trajectory as
+        token events, followed by stage events and a final done event.
+        """
+        # The curation actor is created afresh, so that its Curator uses the
+        # hashing backend too.
+        with patch('ace.similarity._similarity_service', SimilarityService(HASHING_CONFIG)), \
+                patch('ace.core.curation_actor._curation_actor', None), \
+                patch('ace.main.plugin_manager.execute_hook', wraps=plugin_manager.execute_hook) as mock_hook:
+            with self.client.stream(
+                "POST", "/run-ace/stream", json={"task": "Stream a task"}, headers={"X-API-Key": "test-key-1"}
+            ) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+                body = "".join(response.iter_text())
+
+            events = []
+            for block in body.strip().split("\n\n"):
+                event_line, data_line = block.split("\n")
+                events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+
+            names = [name for name, _ in events]
+            self.assertEqual(events[0], ("stage", {"stage": "generation", "status": "started"}))
+            self.assertGreater(names.count("token"), 1)
+            self.assertEqual(names[-1], "done")
+            self.assertNotIn("error", names)
+            trajectory = "".join(data["text"] for name, data in events if name == "token")
+            self.assertIn(trajectory, settings["language_model"]["mock"]["responses"])
+            stages = [(data["stage"], data["status"]) for name, data in events if name == "stage"]
+            self.assertEqual(stages[-1], ("curation", "completed"))
+            insights = [data for name, data in events if name == "insight"]
+            self.assertEqual(len(insights), 2)
+            self.assertEqual(events[-1][1]["new_insights"], insights)
+            # Plugins see the insights curated as one batch, as in /run-ace/.
+            curation_hooks = [c for c in mock_hook.call_args_list if c.args[0] == "on_before_curation"]
+            self.assertEqual(len(curation_hooks), 1)
+            self.assertEqual(curation_hooks[0].kwargs["insights"], insights)
+
+            stats = self.client.get("/stats/", headers={"X-API-Key": "test-key-1"}).json()
+            self.assertGreaterEqual(stats["reflection_cache"]["misses"], 1)
+            self.assertEqual(set(stats["hit_rates"]), {"generation", "reflection", "curation"})
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 import asyncio
 import os
+from unittest.mock import patch
 from ace.config import settings
 from ace.clustering import ClusteringService
 from ace.summarization import SummarizationService
@@ -119,5 +120,61 @@ class TestClusteringFeatures(unittest.TestCase):
 
         asyncio.run(_test())
 
+    def test_cluster_manager_removes_stale_clusters(self):
+        """
+        Tests that re-running clustering writes all assignments in one
+        transaction and removes clusters that no longer have entries.
+        """
+        async def _test():
+            await database.initialize_database()
+            await database.add_or_update_cluster_summary(7, "Stale cluster")
+            await self.playbook.add_entry("Entry 1", {}, np.array([1.0, 1.0, 1.0]).tobytes())
+            await self.playbook.add_entry("Entry 2", {}, np.array([-1.0, -1.0, -1.0]).tobytes())
+            await self.playbook.add_entry("Entry without embedding", {})
+
+            manager = ClusterManager(self.config, self.llm)
+            pool = await database.open_pool()
+            try:
+                await manager.run_clustering()
+                self.assertEqual(pool.transactions_committed, 1)
+            finally:
+                await database.close_pool()
+
+            clusters = await manager.get_clusters()
+            self.assertEqual(sorted(clusters), [0, 1])
+            self.assertEqual(sum(len(c['entries']) for c in clusters.values()), 2)
+
+        asyncio.run(_test())
+
+    def test_cluster_summaries_are_bounded(self):
+        """
+        Tests that no more than `clustering.summary_concurrency` clusters are
+        summarized at once.
+        """
+        async def _test():
+            await database.initialize_database()
+            for i, embedding in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+                await self.playbook.add_entry(f"Entry {i}", {}, np.array(embedding).tobytes())
+
+            config = {**self.config, 'clustering': {'n_clusters': 3, 'summary_concurrency': 2}}
+            manager = ClusterManager(config, self.llm)
+            manager.clustering_service = ClusteringService(config)
+            in_flight = []
+            peak = []
+
+            async def summarize_cluster(texts):
+                in_flight.append(texts)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.01)
+                in_flight.remove(texts)
+                return "Summary of cluster"
+
+            with patch.object(manager.summarization_service, 'summarize_cluster', summarize_cluster):
+                await manager.run_clustering()
+            self.assertEqual(len(peak), 3)
+            self.assertEqual(max(peak), 2)
+
+        asyncio.run(_test())
+
 if __name__ == '__main__':
     unittest.main()
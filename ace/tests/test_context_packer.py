@@ -0,0 +1,116 @@
+import unittest
+import asyncio
+from ace.core.context_packer import ContextPacker, create_context_packer
+from ace.core.models import PlaybookEntry
+from ace.core.prompt_cache import PlaybookSectionCache
+from ace.storage import InMemoryPlaybookStore
+from ace.tokenizer import ApproximateTokenizer, Tokenizer
+
+class WordTokenizer(Tokenizer):
+    """A tokenizer that counts whitespace-separated words."""
+
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+class CountingTokenizer(WordTokenizer):
+    """A word tokenizer that records the texts it counted."""
+
+    def __init__(self):
+        self.counted = []
+
+    def count(self, text: str) -> int:
+        self.counted.append(text)
+        return super().count(text)
+
+class TestContextPacker(unittest.TestCase):
+    """
+    Tests for packing playbook entries into a token budget.
+    """
+
+    def setUp(self):
+        self.store = InMemoryPlaybookStore()
+        self.entries = [
+            PlaybookEntry(id="a", content="alpha " * 4),
+            PlaybookEntry(id="b", content="beta " * 8),
+            PlaybookEntry(id="c", content="gamma " * 2),
+            PlaybookEntry(id="d", content="delta " * 8),
+        ]
+        self.packer = ContextPacker({'context': {'token_budget': 10}}, tokenizer=WordTokenizer())
+
+    def _populate(self, clusters, summaries):
+        async def _populate():
+            await self.store.upsert_entries([
+                {"id": e.id, "content": e.content, "metadata": {}, "embedding": None} for e in self.entries
+            ])
+            await self.store.assign_clusters(clusters, summaries)
+        return _populate()
+
+    def test_greedy_fill_skips_entries_that_do_not_fit(self):
+        """
+        Tests that entries are packed by relevance, skipping those over budget.
+        """
+        async def _test():
+            await self._populate({}, {})
+            packed = await self.packer.pack(self.store, self.entries)
+            self.assertEqual(packed.entry_ids, ["a", "c"])
+            self.assertEqual(packed.tokens, 8)
+            self.assertEqual(packed.omitted, 2)
+            self.assertEqual(packed.render(), f"- {self.entries[0].content}\n- {self.entries[2].content}\n")
+
+            packed = await self.packer.pack(self.store, self.entries, token_budget=100)
+            self.assertEqual(len(packed.entry_ids), 4)
+
+        asyncio.run(_test())
+
+    def test_cluster_summary_fallback(self):
+        """
+        Tests that a cluster's summary replaces its entries that do not fit,
+        once per cluster.
+        """
+        async def _test():
+            await self._populate({"b": 1, "d": 1, "c": 2}, {1: "Greek letters", 2: "Unused"})
+            packed = await self.packer.pack(self.store, self.entries, token_budget=12)
+            self.assertEqual(packed.entry_ids, ["a", "c"])
+            self.assertEqual(packed.cluster_ids, [1])
+            self.assertEqual(packed.lines[1], "- [Summary] Greek letters\n")
+            self.assertEqual(packed.tokens, 12)
+            self.assertEqual(packed.summary()["omitted"], 2)
+
+        asyncio.run(_test())
+
+    def test_factory_and_tokenizer(self):
+        """
+        Tests that packing is disabled without a budget and that the
+        approximate tokenizer counts characters.
+        """
+        self.assertIsNone(create_context_packer({}))
+        self.assertIsNone(create_context_packer({'context': {'token_budget': None}}))
+        self.assertEqual(create_context_packer({'context': {'token_budget': 50}}).token_budget, 50)
+        self.assertEqual(ApproximateTokenizer(4).count("abcdefghi"), 3)
+
+    def test_fragments_are_cached_across_packings(self):
+        """
+        Tests that each entry is tokenized once, the first time it is packed,
+        and that an updated entry is tokenized again.
+        """
+        async def _test():
+            await self._populate({}, {})
+            cache = PlaybookSectionCache()
+            tokenizer = CountingTokenizer()
+            packer = ContextPacker({'context': {'token_budget': 10}}, tokenizer=tokenizer, section_cache=cache)
+            first = await packer.pack(self.store, self.entries)
+            second = await packer.pack(self.store, self.entries[1:])
+            self.assertEqual(len(tokenizer.counted), 4)
+            self.assertEqual(second.entry_ids, ["b"])
+            self.assertEqual(first.render(), f"- {self.entries[0].content}\n- {self.entries[2].content}\n")
+
+            await packer.pack(self.store, [PlaybookEntry(id="c", content="gamma updated")])
+            self.assertEqual(tokenizer.counted[-1], "- gamma updated\n")
+            stats = cache.stats()
+            self.assertEqual((stats["fragments"], stats["fragment_hits"], stats["fragment_misses"]), (5, 3, 5))
+            self.assertAlmostEqual(stats["hit_rate"], 3 / 8)
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+from ace.config import settings
+from ace.core.curation_actor import CurationActor
+from ace.core.curator import Curator
+from ace.core.models import Playbook
+from ace.similarity import SimilarityService
+from ace.storage import InMemoryPlaybookStore
+
+# The model-free hashing backend, so that the test runs offline. Its
+# similarities are lexical, so the near-duplicates below differ by a word.
+HASHING_CONFIG = {**settings, 'similarity': {**settings['similarity'], 'backend': 'hashing'}}
+
+class TestCurationActor(unittest.TestCase):
+    """
+    Tests for the actor that curates the insights of all requests.
+    """
+
+    def test_concurrent_submissions_are_merged(self):
+        """
+        Tests that concurrent submissions are curated as one batch with one
+        write, deduplicated across submissions, and that each submitter
+        receives the entries added from its own insights.
+        """
+        async def _test():
+            store = InMemoryPlaybookStore()
+            curator = Curator(config=HASHING_CONFIG, store=store, similarity_service=SimilarityService(HASHING_CONFIG))
+            actor = CurationActor(curator, max_wait=0.05)
+            with patch.object(store, 'upsert_entries', wraps=store.upsert_entries) as mock_upsert:
+                first, second, third = await asyncio.gather(
+                    actor.submit(Playbook(store), [{"content": "How do I install Python?", "metadata": {}}]),
+                    actor.submit(Playbook(store), [{"content": "How do I install Python 3?", "metadata": {}}]),
+                    actor.submit(Playbook(store), [
+                        {"content": "How do I install Python?", "metadata": {}},
+                        {"content": "Cats are independent animals.", "metadata": {}},
+                    ]),
+                )
+                self.assertEqual(mock_upsert.call_count, 1)
+
+            self.assertEqual([entry.content for entry in first], ["How do I install Python?"])
+            self.assertEqual(second, [])
+            self.assertEqual([entry.content for entry in third], ["Cats are independent animals."])
+            self.assertEqual(len(await Playbook(store).get_all_entries()), 2)
+            self.assertEqual(actor.stats()["batches"], 1)
+            self.assertEqual(actor.stats()["insights"], 4)
+
+            with self.assertRaises(ValueError):
+                await actor.submit(Playbook(InMemoryPlaybookStore()), [{"content": "Elsewhere", "metadata": {}}])
+            await actor.close()
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
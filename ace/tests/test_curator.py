@@ -6,6 +6,14 @@ from ace.config import settings
 from ace.core.models import Playbook
 from ace.core.curator import Curator
 from ace import database
+from ace.similarity import SimilarityService
+from ace.storage import InMemoryPlaybookStore
+
+# The model-free hashing backend, so that tests can check deduplication
+# offline. Its similarities are lexical: "How do I install Python?" and
+# "How do I install Python 3?" are near-duplicates, and differently worded
+# questions are not.
+HASHING_CONFIG = {**settings, 'similarity': {**settings['similarity'], 'backend': 'hashing'}}
 
 class TestCurator(unittest.TestCase):
     """
@@ -36,6 +44,9 @@ class TestCurator(unittest.TestCase):
         if os.path.exists(database.DATABASE_PATH):
             os.remove(database.DATABASE_PATH)
 
+    def _hashing_curator(self, store):
+        return Curator(config=HASHING_CONFIG, store=store, similarity_service=SimilarityService(HASHING_CONFIG))
+
     def test_deduplication(self):
         """
         Ensures the Curator does not add semantically similar insights.
@@ -131,5 +142,53 @@ class TestCurator(unittest.TestCase):
 
         asyncio.run(_test())
 
+    def test_intra_batch_deduplication(self):
+        """
+        Tests that near-duplicate insights of one batch are filtered against
+        each other before the playbook is consulted.
+        """
+        async def _test():
+            store = InMemoryPlaybookStore()
+            playbook = Playbook(store)
+            curator = self._hashing_curator(store)
+            insights = [
+                {"content": "How do I install Python?", "metadata": {}},
+                {"content": "How do I install Python 3?", "metadata": {}},
+                {"content": "Cats are independent animals.", "metadata": {}},
+            ]
+            with patch.object(store, 'is_similar_embedding_present', new_callable=AsyncMock) as mock_scan:
+                mock_scan.return_value = False
+                await curator.curate(playbook, insights)
+                self.assertEqual(mock_scan.call_count, 2)
+
+            contents = sorted(entry.content for entry in await playbook.get_all_entries())
+            self.assertEqual(contents, ["Cats are independent animals.", "How do I install Python?"])
+
+        asyncio.run(_test())
+
+    def test_resident_index_replaces_store_scan(self):
+        """
+        Tests that the Curator checks the resident index instead of scanning
+        the store once the index is loaded, and that the index follows the
+        entries the Curator adds.
+        """
+        async def _test():
+            store = InMemoryPlaybookStore()
+            playbook = Playbook(store)
+            curator = self._hashing_curator(store)
+            await curator.similarity_service.load_index(store)
+            try:
+                with patch.object(store, 'is_similar_embedding_present', new_callable=AsyncMock) as mock_scan:
+                    await curator.curate(playbook, [{"content": "How do I install Python?", "metadata": {}}])
+                    self.assertEqual(len(curator.similarity_service.index), 1)
+
+                    await curator.curate(playbook, [{"content": "How do I install Python 3?", "metadata": {}}])
+                    self.assertEqual(len(await playbook.get_all_entries()), 1)
+                    mock_scan.assert_not_called()
+            finally:
+                curator.similarity_service.unload_index()
+
+        asyncio.run(_test())
+
 if __name__ == '__main__':
     unittest.main()
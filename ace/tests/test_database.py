@@ -2,7 +2,11 @@ import unittest
 import os
 import asyncio
 from ace import database
+from ace.embedding_codec import decode_embedding
 from typing import Dict, Any
+from unittest.mock import patch, MagicMock
+import numpy as np
+import aiosqlite
 
 class TestDatabase(unittest.TestCase):
     """
@@ -55,5 +59,298 @@ class TestDatabase(unittest.TestCase):
 
         asyncio.run(_test())
 
+    def test_connection_pool_reuses_connections(self):
+        """
+        Tests that reads and writes go through the pooled connections.
+
+        This test opens the connection pool, performs several operations,
+        and verifies that no new connections are opened beyond those owned
+        by the pool and that the pool closes cleanly.
+        """
+        async def _test():
+            await database.initialize_database()
+            pool = await database.open_pool({"database": {"pool_size": 2}})
+            try:
+                with patch("aiosqlite.connect") as mock_connect:
+                    await database.add_or_update_playbook_entry("id1", "content 1", {}, None)
+                    await database.add_or_update_playbook_entry("id2", "content 2", {}, None)
+                    self.assertTrue(await database.content_exists("content 1"))
+                    entries = await database.get_all_playbook_entries()
+                    mock_connect.assert_not_called()
+                self.assertEqual(len(entries), 2)
+            finally:
+                await database.close_pool()
+            self.assertFalse(pool.is_open)
+
+        asyncio.run(_test())
+
+    def test_concurrent_writes_are_coalesced(self):
+        """
+        Tests that concurrent writes are grouped into shared transactions.
+
+        This test issues many writes at once through the pool and verifies
+        that they are all durable once awaited, that they were committed in
+        fewer transactions than writes, that the database runs in WAL mode,
+        and that a failing write does not affect the rest of its batch.
+        """
+        async def _test():
+            await database.initialize_database()
+            config = {"database": {"write_batch_size": 100, "write_batch_delay_ms": 20}}
+            pool = await database.open_pool(config)
+            try:
+                await asyncio.gather(*[
+                    database.add_or_update_playbook_entry(f"id{i}", f"content {i}", {}, None)
+                    for i in range(20)
+                ])
+                self.assertLess(pool.transactions_committed, 20)
+
+                async def _failing_write(db):
+                    raise ValueError("boom")
+
+                results = await asyncio.gather(
+                    pool.write(_failing_write),
+                    database.add_or_update_playbook_entry("id-last", "last content", {}, None),
+                    return_exceptions=True
+                )
+                self.assertIsInstance(results[0], ValueError)
+                self.assertIsNone(results[1])
+
+                async with pool.reader() as db:
+                    async with db.execute("PRAGMA journal_mode") as cursor:
+                        self.assertEqual((await cursor.fetchone())[0], "wal")
+            finally:
+                await database.close_pool()
+
+            entries = await database.get_all_playbook_entries()
+            self.assertEqual(len(entries), 21)
+
+        asyncio.run(_test())
+
+    def test_stopped_writer_fails_pending_writes(self):
+        """
+        Tests that a write callback raising a BaseException does not leave
+        other writers waiting forever.
+
+        The callback's CancelledError stops the writer task, so the writes
+        batched with it must fail, and any later write must raise instead of
+        being queued to a writer that will never run it.
+        """
+        async def _test():
+            await database.initialize_database()
+            config = {"database": {"write_batch_size": 100, "write_batch_delay_ms": 20}}
+            pool = await database.open_pool(config)
+            try:
+                async def _cancelled_write(db):
+                    raise asyncio.CancelledError()
+
+                results = await asyncio.wait_for(asyncio.gather(
+                    pool.write(_cancelled_write),
+                    database.add_or_update_playbook_entry("id1", "content", {}, None),
+                    return_exceptions=True
+                ), timeout=5)
+                self.assertIsInstance(results[0], RuntimeError)
+                self.assertIsInstance(results[1], RuntimeError)
+
+                with self.assertRaises(RuntimeError):
+                    await asyncio.wait_for(
+                        database.add_or_update_playbook_entry("id2", "content", {}, None), timeout=5
+                    )
+            finally:
+                await database.close_pool()
+
+            self.assertEqual(await database.get_all_playbook_entries(), [])
+
+        asyncio.run(_test())
+
+    def test_similarity_scan_stops_on_first_match(self):
+        """
+        Tests that the embedding scan visits every batch on a miss and stops
+        at the first batch containing a similar embedding.
+        """
+        async def _test():
+            await database.initialize_database()
+            for i in range(10):
+                embedding = np.array([float(i), 1.0], dtype=np.float32).tobytes()
+                await database.add_or_update_playbook_entry(f"id{i}", f"content {i}", {}, embedding)
+
+            similarity_service = MagicMock()
+            similarity_service.is_similar_encoded.return_value = False
+            query = np.array([0.0, 1.0], dtype=np.float32)
+            self.assertFalse(await database.is_similar_embedding_present(similarity_service, query, batch_size=3))
+            self.assertEqual(similarity_service.is_similar_encoded.call_count, 4)
+
+            similarity_service.reset_mock()
+            similarity_service.is_similar_encoded.side_effect = [False, True]
+            self.assertTrue(await database.is_similar_embedding_present(similarity_service, query, batch_size=3))
+            self.assertEqual(similarity_service.is_similar_encoded.call_count, 2)
+            second_batch = similarity_service.is_similar_encoded.call_args[0][1]
+            self.assertEqual([decode_embedding(e)[0] for e in second_batch], [3.0, 4.0, 5.0])
+
+        asyncio.run(_test())
+
+    def test_bulk_upsert_single_transaction(self):
+        """
+        Tests that a bulk upsert inserts and updates all entries in a single
+        committed transaction.
+        """
+        async def _test():
+            await database.initialize_database()
+            pool = await database.open_pool()
+            try:
+                await database.add_or_update_playbook_entries([
+                    {"id": f"id{i}", "content": f"content {i}", "metadata": {"n": i}, "embedding": None}
+                    for i in range(50)
+                ])
+                self.assertEqual(pool.transactions_committed, 1)
+
+                await database.add_or_update_playbook_entries([
+                    {"id": "id0", "content": "updated content", "metadata": {}, "embedding": None}
+                ])
+            finally:
+                await database.close_pool()
+
+            entries = {e["id"]: e for e in await database.get_all_playbook_entries()}
+            self.assertEqual(len(entries), 50)
+            self.assertEqual(entries["id0"]["content"], "updated content")
+            self.assertEqual(entries["id7"]["metadata"], {"n": 7})
+
+            # Rows with the same content under another ID are replaced, both
+            # in the database and earlier in the batch, and reported.
+            replaced = await database.add_or_update_playbook_entries([
+                {"id": "new1", "content": "content 1", "metadata": {}, "embedding": None},
+                {"id": "new2", "content": "fresh", "metadata": {}, "embedding": None},
+                {"id": "new3", "content": "fresh", "metadata": {}, "embedding": None},
+            ])
+            self.assertEqual(sorted(replaced), ["id1", "new2"])
+            self.assertEqual(len(await database.get_all_playbook_entries()), 51)
+
+        asyncio.run(_test())
+
+    def test_contents_exist_uses_normalized_hash(self):
+        """
+        Tests that exact-duplicate checks match on normalized content and
+        that content rejected by the Bloom filter never reaches the database.
+        """
+        async def _test():
+            await database.initialize_database()
+            await database.add_or_update_playbook_entry("id1", "Cats are  independent.", {}, None)
+
+            result = await database.contents_exist(["cats are independent.", "Dogs are loyal.", ""])
+            self.assertEqual(result, [True, False, False])
+            self.assertTrue(await database.content_exists("Cats are  independent."))
+
+            with patch("ace.database._read_connection") as mock_connection:
+                self.assertEqual(await database.contents_exist(["Something new"]), [False])
+                mock_connection.assert_not_called()
+
+        asyncio.run(_test())
+
+    def test_content_hash_migration(self):
+        """
+        Tests that a database created before the content hash column existed
+        is migrated and backfilled by `initialize_database`.
+        """
+        async def _test():
+            async with aiosqlite.connect(database.DATABASE_PATH) as db:
+                await db.execute(
+                    "CREATE TABLE playbook_entries (id TEXT PRIMARY KEY, content TEXT NOT NULL UNIQUE, "
+                    "metadata TEXT, embedding BLOB, cluster_id INTEGER)"
+                )
+                await db.execute("INSERT INTO playbook_entries (id, content, metadata) VALUES ('a', 'Old entry', '{}')")
+                await db.commit()
+
+            await database.initialize_database()
+            self.assertEqual(await database.contents_exist(["old entry"]), [True])
+
+        asyncio.run(_test())
+
+    def test_iter_playbook_entries(self):
+        """
+        Tests that iterating over the playbook streams every entry in order,
+        reads only the requested columns, and decodes metadata lazily.
+        """
+        async def _test():
+            await database.initialize_database()
+            await database.add_or_update_playbook_entries([
+                {"id": f"id{i}", "content": f"content {i}", "metadata": {"n": i}, "embedding": b"vector"}
+                for i in range(7)
+            ])
+
+            with patch("ace.database.json.loads") as mock_loads:
+                rows = [row async for row in database.iter_playbook_entries(("id", "content", "metadata"), batch_size=3)]
+                self.assertEqual(database.metadata_json(rows[0]), '{"n": 0}')
+                mock_loads.assert_not_called()
+            self.assertEqual([row["id"] for row in rows], [f"id{i}" for i in range(7)])
+            self.assertNotIn("embedding", rows[0])
+            self.assertEqual(rows[4]["metadata"], {"n": 4})
+
+            with self.assertRaises(ValueError):
+                [row async for row in database.iter_playbook_entries(("id", "secret"))]
+
+        asyncio.run(_test())
+
+    def test_point_lookups(self):
+        """
+        Tests lookups by ID, by a list of IDs, and by content hash.
+        """
+        async def _test():
+            await database.initialize_database()
+            await database.add_or_update_playbook_entries([
+                {"id": f"id{i}", "content": f"Content {i}", "metadata": {"n": i}, "embedding": None}
+                for i in range(5)
+            ])
+
+            entry = await database.get_playbook_entry("id3")
+            self.assertEqual(entry["content"], "Content 3")
+            self.assertEqual(entry["metadata"], {"n": 3})
+            self.assertIsNone(await database.get_playbook_entry("missing"))
+
+            entries = await database.get_playbook_entries_by_ids(["id4", "missing", "id1"])
+            self.assertEqual([e["id"] for e in entries], ["id4", "id1"])
+
+            entry = await database.get_playbook_entry_by_content_hash(database.content_hash("  content 2 "))
+            self.assertEqual(entry["id"], "id2")
+
+        asyncio.run(_test())
+
+    def test_entry_cache(self):
+        """
+        Tests that hot entries are served from the entry cache and that the
+        cache is invalidated when an entry is updated.
+        """
+        async def _test():
+            await database.initialize_database()
+            database.configure_entry_cache(10)
+            try:
+                await database.add_or_update_playbook_entry("id1", "Original", {}, None)
+                await database.get_playbook_entry("id1")
+
+                with patch("ace.database._read_connection") as mock_connection:
+                    entry = await database.get_playbook_entry("id1")
+                    mock_connection.assert_not_called()
+                entry["metadata"]["mutated"] = True
+
+                await database.add_or_update_playbook_entry("id1", "Updated", {}, None)
+                entry = await database.get_playbook_entry("id1")
+                self.assertEqual(entry["content"], "Updated")
+                self.assertEqual(entry["metadata"], {})
+
+                # A write that invalidates the entry while it is being read
+                # keeps the row that was read out of the cache.
+                database.clear_entry_cache()
+                entry_from_row = database._entry_from_row
+
+                def read_during_write(row):
+                    database._invalidate_cached_entries(database.DATABASE_PATH, [row["id"]])
+                    return entry_from_row(row)
+
+                with patch("ace.database._entry_from_row", side_effect=read_during_write):
+                    await database.get_playbook_entry("id1")
+                self.assertNotIn((database.DATABASE_PATH, "id1"), database._entry_cache)
+            finally:
+                database.configure_entry_cache(0)
+
+        asyncio.run(_test())
+
 if __name__ == '__main__':
     unittest.main()
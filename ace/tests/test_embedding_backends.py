@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+import numpy as np
+from ace.embeddings import HashingBackend, SentenceTransformerBackend, create_embedding_backend
+from ace.similarity import SimilarityService
+from ace.storage import InMemoryPlaybookStore
+
+class TestEmbeddingBackends(unittest.TestCase):
+    """
+    Tests for the pluggable embedding backends.
+    """
+
+    def test_factory(self):
+        """
+        Tests that the backend is selected by the configuration.
+        """
+        self.assertIsInstance(create_embedding_backend({}), SentenceTransformerBackend)
+        backend = create_embedding_backend({'similarity': {'backend': 'hashing', 'hashing': {'dim': 64}}})
+        self.assertIsInstance(backend, HashingBackend)
+        self.assertEqual(backend.dim, 64)
+        with self.assertRaises(ValueError):
+            create_embedding_backend({'similarity': {'backend': 'unknown'}})
+
+    def test_hashing_backend(self):
+        """
+        Tests that hashing embeddings are deterministic, normalized, and lexical.
+        """
+        backend = HashingBackend(dim=256)
+        embeddings = backend.encode([
+            "Always install dependencies first.",
+            "always install the dependencies first",
+            "Cats are independent animals.",
+            "",
+        ])
+        self.assertEqual(embeddings.shape, (4, 256))
+        self.assertEqual(embeddings.dtype, backend.dtype)
+        np.testing.assert_array_equal(embeddings, HashingBackend(dim=256).encode([
+            "Always install dependencies first.",
+            "always install the dependencies first",
+            "Cats are independent animals.",
+            "",
+        ]))
+        np.testing.assert_allclose(np.linalg.norm(embeddings[:3], axis=1), 1.0, rtol=1e-5)
+        self.assertFalse(embeddings[3].any())
+        self.assertGreater(embeddings[0] @ embeddings[1], embeddings[0] @ embeddings[2])
+        self.assertNotEqual(backend.name, HashingBackend(dim=256, char_ngram=0).name)
+
+    def test_similarity_service_uses_backend(self):
+        """
+        Tests that the SimilarityService encodes and caches through the configured backend.
+        """
+        async def _test():
+            service = SimilarityService({'similarity': {'backend': 'hashing', 'hashing': {'dim': 128}}})
+            self.assertEqual(service.model_name, service.backend.name)
+            await service.warmup()
+            self.assertTrue(service.ready)
+            embeddings = await service.embed(["Deploy on Fridays.", "deploy on fridays"])
+            self.assertEqual(embeddings.shape, (2, 128))
+            self.assertTrue(service.is_similar(embeddings[0], [embeddings[1]]))
+            again = await service.embed(["DEPLOY on Fridays."])
+            np.testing.assert_array_equal(again[0], embeddings[0])
+            self.assertEqual(service.embedding_cache.stats()["hits"], 1)
+            await service.batcher.close()
+
+        asyncio.run(_test())
+
+    def test_switching_backends_is_detected(self):
+        """
+        Tests that a playbook embedded by another backend is refused by the
+        resident index, and that an embedding of the wrong dimension is
+        rejected before it is written.
+        """
+        async def _test():
+            store = InMemoryPlaybookStore()
+            await store.upsert_entries([
+                {"id": "old", "content": "Embedded by a 384-dim model", "metadata": {},
+                 "embedding": np.ones(384, dtype=np.float32).tobytes()}
+            ])
+            service = SimilarityService({'similarity': {'backend': 'hashing', 'hashing': {'dim': 128}}})
+            with self.assertRaisesRegex(ValueError, "dimension 384"):
+                await service.load_index(store)
+
+            # With the index following the store, a write of the wrong
+            # dimension is rejected and nothing is stored.
+            store.add_listener(service.index)
+            service.index.load(["old"], np.ones((1, 384), dtype=np.float32))
+            embedding = service.serialize_embedding((await service.embed(["A new insight"]))[0])
+            with self.assertRaisesRegex(ValueError, "Expected embeddings of dimension 384, got 128"):
+                await store.upsert_entries([
+                    {"id": "new", "content": "A new insight", "metadata": {}, "embedding": embedding}
+                ])
+            self.assertEqual([e["id"] for e in await store.get_all_entries()], ["old"])
+            self.assertEqual(service.index.ids, ["old"])
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
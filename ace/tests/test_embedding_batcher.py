@@ -0,0 +1,56 @@
+import unittest
+import asyncio
+import numpy as np
+from ace.embedding_batcher import EmbeddingBatcher
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    """
+    Tests for the micro-batching embedding worker.
+    """
+
+    def setUp(self):
+        self.calls = []
+
+        def encode(texts):
+            self.calls.append(list(texts))
+            if "fail" in texts:
+                raise RuntimeError("encoder failed")
+            return np.array([[float(len(text)), 1.0] for text in texts])
+
+        self.batcher = EmbeddingBatcher(encode, max_batch_size=4, max_wait=0.05)
+
+    def test_concurrent_requests_are_batched(self):
+        """
+        Tests that concurrent requests share model calls and get their own rows back.
+        """
+        async def _test():
+            results = await asyncio.gather(
+                self.batcher.embed(["a"]),
+                self.batcher.embed(["bb", "ccc"]),
+                self.batcher.embed(["dddd", "eeeee"]),
+                self.batcher.embed(["ffffff"]),
+            )
+            self.assertEqual([r[:, 0].tolist() for r in results], [[1.0], [2.0, 3.0], [4.0, 5.0], [6.0]])
+            self.assertEqual(self.calls, [["a", "bb", "ccc", "dddd", "eeeee"], ["ffffff"]])
+            self.assertEqual((self.batcher.batches_encoded, self.batcher.texts_encoded), (2, 6))
+            await self.batcher.close()
+
+        asyncio.run(_test())
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        """
+        Tests that an encoder error fails the batch's callers but not later batches.
+        """
+        async def _test():
+            results = await asyncio.gather(
+                self.batcher.embed(["ok"]), self.batcher.embed(["fail"]), return_exceptions=True
+            )
+            self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+            self.assertEqual((await self.batcher.embed(["ok"]))[0, 0], 2.0)
+
+        asyncio.run(_test())
+        # The batcher keeps working when used from a new event loop.
+        self.assertEqual(asyncio.run(self.batcher.embed(["abc"]))[0, 0], 3.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import numpy as np
+from ace.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache(unittest.TestCase):
+    """
+    Tests for the two-tier, content-addressed embedding cache.
+    """
+
+    def setUp(self):
+        self.path = "test_embedding_cache.db"
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_memory_tier(self):
+        """
+        Tests that lookups are keyed by normalized text and counted.
+        """
+        cache = EmbeddingCache("model", maxsize=10)
+        cache.put_many(["Hello  World"], [np.array([1.0, 2.0])])
+        results = cache.get_many(["hello world", "other"])
+        np.testing.assert_array_equal(results[0], [1.0, 2.0])
+        self.assertIsNone(results[1])
+        self.assertFalse(results[0].flags.writeable)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["disk_hits"], stats["misses"]), (1, 0, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_persistent_tier(self):
+        """
+        Tests that evicted and restarted caches are served from disk, per model.
+        """
+        cache = EmbeddingCache("model", maxsize=1, path=self.path)
+        cache.put_many(["a", "b"], [np.array([1.0]), np.array([2.0])])
+        self.assertEqual(cache.get_many(["a"])[0][0], 1.0)
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+        cache.close()
+
+        restarted = EmbeddingCache("model", maxsize=1, path=self.path)
+        self.assertEqual([e[0] for e in restarted.get_many(["B", "a"])], [2.0, 1.0])
+        self.assertEqual(restarted.stats()["disk_hits"], 2)
+        other_model = EmbeddingCache("other-model", path=self.path)
+        self.assertEqual(other_model.get_many(["a"]), [None])
+        other_model.close()
+        restarted.close()
+
+if __name__ == '__main__':
+    unittest.main()
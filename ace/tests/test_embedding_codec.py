@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from ace.embedding_codec import (
+    HEADER, WIDEN_CHUNK_ROWS, cosine_similarities, decode_embedding, encode_embedding,
+    parse_embedding
+)
+
+class TestEmbeddingCodec(unittest.TestCase):
+    """
+    Tests for the versioned embedding encoding.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.standard_normal((20, 64)).astype(np.float32)
+
+    def test_round_trip(self):
+        """
+        Tests that each dtype decodes close to the original and shrinks the payload.
+        """
+        embedding = self.embeddings[0]
+        for dtype, itemsize, tolerance in (("float32", 4, 0), ("float16", 2, 1e-2), ("int8", 1, 5e-2)):
+            blob = encode_embedding(embedding, dtype)
+            self.assertEqual(len(blob), HEADER.size + 64 * itemsize)
+            encoded = parse_embedding(blob)
+            self.assertEqual(encoded.dtype, dtype)
+            self.assertAlmostEqual(encoded.norm, float(np.linalg.norm(embedding)), places=4)
+            np.testing.assert_allclose(decode_embedding(blob), embedding, atol=tolerance)
+
+        with self.assertRaises(ValueError):
+            encode_embedding(embedding, "float64")
+
+    def test_legacy_raw_float32(self):
+        """
+        Tests that embeddings stored without a header are read as raw float32.
+        """
+        embedding = self.embeddings[1]
+        np.testing.assert_array_equal(decode_embedding(embedding.tobytes()), embedding)
+
+    def test_cosine_on_quantized_form(self):
+        """
+        Tests that cosine similarities computed on mixed, quantized blobs
+        match the exact float32 values.
+        """
+        query = self.embeddings[0]
+        dtypes = ["float32", "float16", "int8", "legacy"]
+        blobs = [
+            e.tobytes() if dtypes[i % 4] == "legacy" else encode_embedding(e, dtypes[i % 4])
+            for i, e in enumerate(self.embeddings)
+        ]
+        expected = self.embeddings @ query / (np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query))
+        np.testing.assert_allclose(cosine_similarities(query, blobs), expected, atol=1e-2)
+        self.assertAlmostEqual(float(cosine_similarities(query, blobs[:1])[0]), 1.0, places=5)
+
+    def test_cosine_across_widening_chunks(self):
+        """
+        Tests that quantized groups larger than one widening chunk are scored
+        completely, and that embeddings of another dimension score 0.
+        """
+        rng = np.random.default_rng(1)
+        embeddings = rng.standard_normal((WIDEN_CHUNK_ROWS * 2 + 3, 64)).astype(np.float32)
+        query = embeddings[0]
+        expected = embeddings @ query / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query))
+        for dtype in ("float16", "int8"):
+            blobs = [encode_embedding(e, dtype) for e in embeddings]
+            blobs.append(encode_embedding(embeddings[0][:32], dtype))
+            similarities = cosine_similarities(query, blobs)
+            np.testing.assert_allclose(similarities[:-1], expected, atol=1e-2)
+            self.assertEqual(float(similarities[-1]), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
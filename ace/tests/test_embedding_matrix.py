@@ -0,0 +1,98 @@
+import unittest
+import os
+import numpy as np
+from ace.embedding_matrix import EmbeddingMatrix
+
+class TestEmbeddingMatrix(unittest.TestCase):
+    """
+    Tests for the memory-mapped embedding matrix.
+    """
+
+    def setUp(self):
+        self.path = "test_matrix.db"
+        self.matrix = EmbeddingMatrix(self.path)
+
+    def tearDown(self):
+        self.matrix.remove_files()
+
+    def _vectors(self, *values):
+        return np.array([[v, 1.0] for v in values], dtype=np.float32)
+
+    def test_append_update_delete_and_reload(self):
+        """
+        Tests that updates and deletes leave dead rows that survive a reload.
+        """
+        self.matrix.add(["a", "b", "c"], ["ha", "hb", "hc"], self._vectors(1, 2, 3))
+        self.matrix.add(["b"], ["hb2"], self._vectors(20))
+        self.matrix.delete(["c", "missing"])
+
+        reloaded = EmbeddingMatrix(self.path)
+        for matrix in (self.matrix, reloaded):
+            entry_ids, embeddings = matrix.live()
+            self.assertEqual(entry_ids, ["a", "b"])
+            self.assertEqual(embeddings[:, 0].tolist(), [1.0, 20.0])
+            self.assertEqual(matrix.dead_rows, 2)
+            self.assertTrue(matrix.is_consistent({"a": "ha", "b": "hb2"}))
+            self.assertFalse(matrix.is_consistent({"a": "ha", "b": "hb"}))
+            self.assertEqual([b[:, 0].tolist() for b in matrix.iter_batches(2)], [[1.0], [20.0]])
+
+        with self.assertRaises(ValueError):
+            self.matrix.add(["d"], ["hd"], np.zeros((1, 3), dtype=np.float32))
+
+    def test_compaction(self):
+        """
+        Tests that compaction drops dead rows and keeps the live ones.
+        """
+        self.matrix.add(["a", "b", "c"], ["ha", "hb", "hc"], self._vectors(1, 2, 3))
+        self.matrix.delete(["a", "b"])
+        self.matrix.compact()
+
+        self.assertEqual(self.matrix.dead_rows, 0)
+        self.assertEqual(os.path.getsize(self.matrix.vectors_path), 2 * 4)
+        entry_ids, embeddings = self.matrix.live()
+        self.assertIsInstance(embeddings, np.memmap)
+        self.assertEqual((entry_ids, embeddings.tolist()), (["c"], [[3.0, 1.0]]))
+
+    def test_rebuild_rejects_mixed_dimensions(self):
+        """
+        Tests that a rebuild from embeddings of different dimensions fails
+        and keeps the existing matrix.
+        """
+        self.matrix.add(["a"], ["ha"], self._vectors(1))
+        with self.assertRaisesRegex(ValueError, "entry c"):
+            self.matrix.rebuild([("b", "hb", np.ones(2)), ("c", "hc", np.ones(3))])
+        self.assertEqual(self.matrix.live()[0], ["a"])
+        self.assertFalse(os.path.exists(self.matrix.vectors_path + ".tmp"))
+
+    def test_truncated_vectors_are_detected(self):
+        """
+        Tests that a vectors file that does not match the row log is flagged.
+        """
+        self.matrix.add(["a", "b"], ["ha", "hb"], self._vectors(1, 2))
+        with open(self.matrix.vectors_path, "r+b") as f:
+            f.truncate(4)
+        self.assertFalse(EmbeddingMatrix(self.path).is_consistent({"a": "ha", "b": "hb"}))
+
+    def test_writes_by_another_instance_are_picked_up(self):
+        """
+        Tests that an instance sharing the files with another one, as in
+        another process, reloads them before it reads or appends, so its
+        rows never point at the other instance's vectors.
+        """
+        other = EmbeddingMatrix(self.path)
+        self.matrix.add(["a"], ["ha"], self._vectors(1))
+        other.add(["b"], ["hb"], self._vectors(2))
+        self.matrix.add(["c"], ["hc"], self._vectors(3))
+        other.delete(["a"])
+
+        for matrix in (self.matrix, other):
+            entry_ids, embeddings = matrix.live()
+            self.assertEqual((entry_ids, embeddings[:, 0].tolist()), (["b", "c"], [2.0, 3.0]))
+            self.assertTrue(matrix.is_consistent({"b": "hb", "c": "hc"}))
+
+        other.compact()
+        self.assertEqual(self.matrix.dead_rows, 0)
+        self.assertEqual(self.matrix.live()[1][:, 0].tolist(), [2.0, 3.0])
+
+if __name__ == '__main__':
+    unittest.main()
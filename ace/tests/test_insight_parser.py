@@ -0,0 +1,103 @@
+import unittest
+import asyncio
+from ace.core.insight_parser import InsightStreamParser, validate_insight
+from ace.core.reflector import Reflector
+from ace.llm import LanguageModel
+
+RESPONSE = (
+    'Here are the insights:\n```json\n['
+    '{"content": "Use {braces} carefully", "metadata": {"tags": ["a", "b"]}}, '
+    '{"content": "Escape \\"quotes\\"", "metadata": {}}'
+    ']\n```'
+)
+
+class ChunkedLanguageModel(LanguageModel):
+    """
+    A language model that streams a fixed response in fixed-size chunks.
+    """
+
+    def __init__(self, response: str, chunk_size: int):
+        super().__init__({})
+        self.response = response
+        self.chunk_size = chunk_size
+
+    async def generate(self, prompt: str) -> str:
+        return self.response
+
+    async def generate_stream(self, prompt: str):
+        for start in range(0, len(self.response), self.chunk_size):
+            yield self.response[start:start + self.chunk_size]
+
+class TestInsightStreamParser(unittest.TestCase):
+    """
+    Tests for the incremental, fault-tolerant insight parser.
+    """
+
+    def test_insights_are_returned_as_their_objects_complete(self):
+        """
+        Tests that each insight is returned by the chunk that closes it,
+        regardless of where the chunks split the response.
+        """
+        for chunk_size in (1, 3, 7, len(RESPONSE)):
+            parser = InsightStreamParser()
+            insights = []
+            for start in range(0, len(RESPONSE), chunk_size):
+                insights.extend(parser.feed(RESPONSE[start:start + chunk_size]))
+            insights.extend(parser.close())
+            self.assertEqual(insights, [
+                {"content": "Use {braces} carefully", "metadata": {"tags": ["a", "b"]}},
+                {"content": 'Escape "quotes"', "metadata": {}},
+            ])
+
+        parser = InsightStreamParser()
+        self.assertEqual(parser.feed('[{"content": "First"}, {"content": "Sec'), [{"content": "First", "metadata": {}}])
+        self.assertEqual(parser.feed('ond"}'), [{"content": "Second", "metadata": {}}])
+
+    def test_truncated_and_noisy_output(self):
+        """
+        Tests that valid objects are recovered from a truncated response with
+        malformed and schema-violating objects, and a stray opening brace.
+        """
+        parser = InsightStreamParser()
+        insights = parser.feed(
+            'Note { this brace is never closed. ['
+            '{"content": "Kept"}, {"content": }, {"content": ""}, {"content": "Bad", "metadata": 3}, '
+            '{"content": "Also kept", "metadata": {"source": "reflector"}}, {"content": "Trunc'
+        )
+        insights.extend(parser.close())
+        self.assertEqual([insight["content"] for insight in insights], ["Kept", "Also kept"])
+        self.assertEqual((parser.parsed, parser.skipped), (2, 3))
+
+        self.assertIsNone(validate_insight(["not", "an", "object"]))
+        self.assertEqual(validate_insight({"content": "x", "metadata": None, "extra": 1}), {"content": "x", "metadata": {}})
+
+    def test_wrapped_insights_are_unpacked(self):
+        """
+        Tests that insights nested in a wrapper object are recovered, whether
+        the wrapper is valid JSON or not, and that an invalid insight is not
+        searched for nested insights.
+        """
+        parser = InsightStreamParser()
+        insights = parser.feed('{"insights": [{"content": "First"}, {"content": "Second", "metadata": {"n": 2}}]}')
+        self.assertEqual(insights, [{"content": "First", "metadata": {}}, {"content": "Second", "metadata": {"n": 2}}])
+
+        parser = InsightStreamParser()
+        insights = parser.feed('{"insights": [{"content": "Kept"},, {"content": "", "metadata": {"content": "Inner"}}]}')
+        self.assertEqual([insight["content"] for insight in insights], ["Kept"])
+        self.assertEqual((parser.parsed, parser.skipped), (1, 2))
+
+    def test_reflect_stream_matches_reflect(self):
+        """
+        Tests that the Reflector yields the same insights when streaming as
+        when parsing the whole response.
+        """
+        async def _test():
+            reflector = Reflector(llm=ChunkedLanguageModel(RESPONSE, chunk_size=5))
+            streamed = [insight async for insight in reflector.reflect_stream("A trajectory")]
+            self.assertEqual(len(streamed), 2)
+            self.assertEqual(streamed, await reflector.reflect("A trajectory"))
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import asyncio
+import os
+import numpy as np
+from ace.ivf_index import IVFIndex
+from ace.vector_index import VectorIndex
+
+class TestIVFIndex(unittest.TestCase):
+    """
+    Tests for the approximate inverted-file index.
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((8, 16))
+        self.embeddings = (centers[rng.integers(0, 8, 400)] + 0.3 * rng.standard_normal((400, 16))).astype(np.float32)
+        self.ids = [f"id{i}" for i in range(400)]
+        self.path = "test_index.ivf.npz"
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_exact_until_trained(self):
+        """
+        Tests that the index answers exactly until it reaches its training size.
+        """
+        index = IVFIndex(nlist=8, nprobe=1, train_size=200)
+        exact = VectorIndex()
+        index.add(self.ids[:100], self.embeddings[:100])
+        exact.add(self.ids[:100], self.embeddings[:100])
+        self.assertFalse(index.is_trained)
+        query = self.embeddings[150]
+        self.assertEqual([i for i, _ in index.search(query, k=5)], [i for i, _ in exact.search(query, k=5)])
+
+        index.add(self.ids[100:], self.embeddings[100:])
+        self.assertTrue(index.is_trained)
+        self.assertEqual(len(index), 400)
+        self.assertEqual(sorted(index.ids), sorted(self.ids))
+
+    def test_recall(self):
+        """
+        Tests that probing a few lists finds almost all exact nearest neighbors.
+        """
+        index = IVFIndex(nlist=8, nprobe=3, train_size=1)
+        index.load(self.ids, self.embeddings)
+        exact = VectorIndex()
+        exact.load(self.ids, self.embeddings)
+
+        hits = 0
+        for query in self.embeddings[:50] + 0.1:
+            expected = {i for i, _ in exact.search(query, k=10)}
+            hits += len(expected & {i for i, _ in index.search(query, k=10)})
+        self.assertGreaterEqual(hits / 500, 0.9)
+        self.assertTrue(index.any_above(self.embeddings[7], 0.999))
+        np.testing.assert_array_equal(index.any_above_batch(self.embeddings[7:9], 0.999), [True, True])
+
+    def test_save_read_and_reconcile(self):
+        """
+        Tests that a saved index is read back and reconciled with a store's entries.
+        """
+        index = IVFIndex(nlist=8, nprobe=2, train_size=1)
+        index.load(self.ids, self.embeddings)
+        index.remove(["id0"])
+        index.save(self.path)
+
+        restored = IVFIndex(nlist=8, nprobe=2)
+        restored.read(self.path)
+        np.testing.assert_array_equal(restored.centroids, index.centroids)
+        query = self.embeddings[3]
+        self.assertEqual(restored.search(query, k=5), index.search(query, k=5))
+
+        # id5 was updated while the index was not being saved.
+        embeddings = self.embeddings[:300].copy()
+        embeddings[5] = -embeddings[5]
+        restored.reconcile(self.ids[:300], embeddings)
+        self.assertEqual(sorted(restored.ids), sorted(self.ids[:300]))
+        self.assertEqual(restored.search(self.embeddings[0], k=1)[0][0], "id0")
+        entry_id, similarity = restored.search(embeddings[5], k=1)[0]
+        self.assertEqual(entry_id, "id5")
+        self.assertAlmostEqual(similarity, 1.0, places=5)
+
+    def test_training_runs_in_the_background(self):
+        """
+        Tests that reaching the training size inside an event loop trains in
+        an executor, that the index answers exactly meanwhile, and that
+        entries added during training are redistributed.
+        """
+        async def _test():
+            index = IVFIndex(nlist=8, nprobe=1, train_size=200)
+            exact = VectorIndex()
+            exact.load(self.ids[:300], self.embeddings[:300])
+            index.add(self.ids[:200], self.embeddings[:200])
+            index.add(self.ids[200:300], self.embeddings[200:300])
+            self.assertFalse(index.is_trained)
+            query = self.embeddings[250]
+            self.assertEqual([i for i, _ in index.search(query, k=5)], [i for i, _ in exact.search(query, k=5)])
+
+            await index.wait_for_training()
+            self.assertTrue(index.is_trained)
+            self.assertEqual(sorted(index.ids), sorted(self.ids[:300]))
+            self.assertEqual(index.search(query, k=1)[0][0], "id250")
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import asyncio
+from ace.core.models import Playbook
+from ace.core.prompt_cache import PlaybookSectionCache
+from ace.storage import InMemoryPlaybookStore
+
+class TestPlaybookSectionCache(unittest.TestCase):
+    """
+    Tests for the versioned cache of rendered playbook sections.
+    """
+
+    def test_section_is_cached_until_the_store_changes(self):
+        """
+        Tests that the section is rendered once per store version.
+        """
+        async def _test():
+            cache = PlaybookSectionCache()
+            playbook = Playbook(InMemoryPlaybookStore())
+            await playbook.add_entry("First")
+            self.assertEqual(await cache.render(playbook), "- First\n")
+            self.assertEqual(await cache.render(playbook), "- First\n")
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            await playbook.add_entry("Second")
+            self.assertEqual(await cache.render(playbook), "- First\n- Second\n")
+            self.assertEqual(cache.stats()["misses"], 2)
+
+            other = Playbook(InMemoryPlaybookStore())
+            self.assertEqual(await cache.render(other), "")
+            self.assertEqual(cache.stats()["sections"], 2)
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
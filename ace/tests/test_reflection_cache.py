@@ -0,0 +1,111 @@
+import unittest
+import asyncio
+import os
+import sqlite3
+from unittest.mock import patch
+from ace.core.reflection_cache import ReflectionCache
+from ace.core.reflector import Reflector
+from ace.llm import LanguageModel
+
+INSIGHTS = [{"content": "Cache reflections", "metadata": {"source": "reflector"}}]
+
+class CountingLanguageModel(LanguageModel):
+    """
+    A language model that returns fixed insights and counts its calls.
+    """
+
+    def __init__(self):
+        super().__init__({})
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return '[{"content": "Cache reflections", "metadata": {"source": "reflector"}}]'
+
+class TestReflectionCache(unittest.TestCase):
+    """
+    Tests for the cache of insights by trajectory.
+    """
+
+    def setUp(self):
+        self.path = "test_reflection_cache.db"
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_lookups_are_keyed_by_normalized_trajectory_and_version(self):
+        """
+        Tests that lookups are keyed by the normalized trajectory, return
+        copies, and are persisted per version.
+        """
+        cache = ReflectionCache("1:mock", maxsize=10, path=self.path)
+        cache.put("A  Trajectory", INSIGHTS)
+        cached = cache.get("a trajectory")
+        self.assertEqual(cached, INSIGHTS)
+        cached[0]["metadata"]["source"] = "changed"
+        self.assertEqual(cache.get("a trajectory"), INSIGHTS)
+        self.assertIsNone(cache.get("another trajectory"))
+        self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (2, 0, 1))
+        cache.close()
+
+        reopened = ReflectionCache("1:mock", maxsize=10, path=self.path)
+        self.assertEqual(reopened.get("a trajectory"), INSIGHTS)
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+        reopened.close()
+
+        other_version = ReflectionCache("2:mock", maxsize=10, path=self.path)
+        self.assertIsNone(other_version.get("a trajectory"))
+        other_version.close()
+
+    def test_expired_insights_are_misses(self):
+        """
+        Tests that insights older than the TTL are not served.
+        """
+        cache = ReflectionCache("1:mock", maxsize=10, ttl_seconds=0, path=self.path)
+        cache.put("A trajectory", INSIGHTS)
+        self.assertIsNone(cache.get("A trajectory"))
+        self.assertIsNone(cache.get("A trajectory"))
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["expired"], stats["size"]), (2, 1, 0))
+        cache.close()
+
+    def test_persistent_tier_is_bounded(self):
+        """
+        Tests that putting insights sweeps expired rows of every version from
+        the SQLite file and keeps at most `maxsize` rows.
+        """
+        with patch("ace.core.reflection_cache.time.time", return_value=1000.0):
+            old_version = ReflectionCache("0:mock", maxsize=2, ttl_seconds=60, path=self.path)
+            old_version.put("Old trajectory", INSIGHTS)
+            old_version.close()
+
+        cache = ReflectionCache("1:mock", maxsize=2, ttl_seconds=60, path=self.path)
+        for i, now in enumerate((2000.0, 2001.0, 2002.0)):
+            with patch("ace.core.reflection_cache.time.time", return_value=now):
+                cache.put(f"Trajectory {i}", INSIGHTS)
+        cache.close()
+
+        with sqlite3.connect(self.path) as db:
+            rows = db.execute("SELECT version, created_at FROM reflection_cache ORDER BY created_at").fetchall()
+        self.assertEqual(rows, [("1:mock", 2001.0), ("1:mock", 2002.0)])
+
+    def test_reflector_uses_the_cache(self):
+        """
+        Tests that a trajectory is reflected on once, whether or not the
+        Reflector streams, and that the cached insights are returned.
+        """
+        async def _test():
+            llm = CountingLanguageModel()
+            reflector = Reflector(llm=llm, cache=ReflectionCache("1:mock"))
+            self.assertEqual(await reflector.reflect("A trajectory"), INSIGHTS)
+            self.assertEqual(await reflector.reflect("a   trajectory"), INSIGHTS)
+            self.assertEqual([insight async for insight in reflector.reflect_stream("A trajectory")], INSIGHTS)
+            self.assertEqual(llm.calls, 1)
+            self.assertAlmostEqual(reflector.cache.hit_rate, 2 / 3)
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import asyncio
+from ace.core.context_packer import ContextPacker
+from ace.core.generator import Generator
+from ace.core.models import Playbook, PlaybookEntry
+from ace.core.retriever import Retriever
+from ace.llm import LanguageModel
+from ace.similarity import SimilarityService
+from ace.storage import InMemoryPlaybookStore
+
+class EchoLanguageModel(LanguageModel):
+    """A language model that returns its prompt."""
+
+    async def generate(self, prompt: str) -> str:
+        return prompt
+
+class TestRetriever(unittest.TestCase):
+    """
+    Tests for the top-k retrieval of playbook entries.
+    """
+
+    def setUp(self):
+        self.config = {
+            'similarity': {'backend': 'hashing', 'hashing': {'dim': 512}},
+            'retrieval': {'enabled': True, 'top_k': 2},
+        }
+        self.similarity_service = SimilarityService(self.config)
+        self.retriever = Retriever(self.config, self.similarity_service)
+        self.store = InMemoryPlaybookStore()
+        self.playbook = Playbook(self.store)
+        self.contents = [
+            "Run the database migrations before deploying.",
+            "Run the database migrations before deploying the service.",
+            "Roll back the deployment if database migrations fail.",
+            "Cats are independent animals.",
+        ]
+
+    def _populate(self):
+        embeddings = self.similarity_service.get_embeddings(self.contents)
+        return self.playbook.add_entries([
+            PlaybookEntry(content=content, embedding=self.similarity_service.serialize_embedding(embedding))
+            for content, embedding in zip(self.contents, embeddings)
+        ])
+
+    def test_top_k_and_similarity_floor(self):
+        """
+        Tests that the most relevant entries are retrieved, above the floor.
+        """
+        async def _test():
+            await self._populate()
+            result = await self.retriever.retrieve(self.playbook, "How do I deploy database migrations?")
+            self.assertEqual(len(result.entries), 2)
+            self.assertNotIn("Cats are independent animals.", [e.content for e in result.entries])
+            self.assertEqual(result.scores, sorted(result.scores, reverse=True))
+            self.assertGreaterEqual(result.latency_ms, 0.0)
+
+            options = self.retriever.options(top_k=10, min_similarity=0.2)
+            result = await self.retriever.retrieve(self.playbook, "How do I deploy database migrations?", options)
+            self.assertEqual(len(result.entries), 3)
+            self.assertTrue(all(score > 0.2 for score in result.scores))
+
+        asyncio.run(_test())
+
+    def test_mmr_prefers_diverse_entries(self):
+        """
+        Tests that MMR skips a near-duplicate of an entry already selected.
+        """
+        async def _test():
+            await self._populate()
+            task = "Run the database migrations before deploying."
+            plain = await self.retriever.retrieve(self.playbook, task)
+            self.assertEqual([e.content for e in plain.entries], self.contents[:2])
+
+            diverse = await self.retriever.retrieve(self.playbook, task, self.retriever.options(mmr_lambda=0.3, min_similarity=0.2))
+            self.assertEqual([e.content for e in diverse.entries], [self.contents[0], self.contents[2]])
+
+        asyncio.run(_test())
+
+    def test_resident_index_matches_store_scan(self):
+        """
+        Tests that retrieval gives the same result from the resident index
+        as from the store's embedding matrix.
+        """
+        async def _test():
+            await self._populate()
+            task = "What should happen when migrations fail?"
+            scanned = await self.retriever.retrieve(self.playbook, task)
+            await self.similarity_service.load_index(self.store)
+            try:
+                indexed = await self.retriever.retrieve(self.playbook, task)
+            finally:
+                self.similarity_service.unload_index()
+            self.assertEqual([e.id for e in indexed.entries], [e.id for e in scanned.entries])
+
+        asyncio.run(_test())
+
+    def test_generator_prompt_holds_retrieved_entries(self):
+        """
+        Tests that the Generator only puts the retrieved entries into its prompt.
+        """
+        async def _test():
+            await self._populate()
+            generator = Generator(EchoLanguageModel({}), retriever=self.retriever)
+            prompt = await generator.generate_trajectory(self.playbook, "Deploy the database migrations")
+            self.assertEqual(prompt.count("\n- "), 2)
+            self.assertNotIn("Cats", prompt)
+            self.assertEqual(len(generator.last_retrieval.entries), 2)
+
+        asyncio.run(_test())
+
+    def test_packing_without_retriever_ranks_by_task(self):
+        """
+        Tests that, without a retriever, a tight token budget keeps the
+        entries most relevant to the task rather than the oldest ones.
+        """
+        async def _test():
+            self.contents.reverse()
+            await self._populate()
+            await self.playbook.add_entry("An entry without an embedding.")
+            packer = ContextPacker({'context': {'token_budget': 30, 'cluster_summaries': False}})
+            generator = Generator(
+                EchoLanguageModel({}), packer=packer, similarity_service=self.similarity_service
+            )
+            prompt = await generator.generate_trajectory(self.playbook, "Deploy the database migrations")
+            self.assertNotIn("Cats", prompt)
+            self.assertIn("Run the database migrations before deploying.", prompt)
+            self.assertEqual(generator.last_packing.omitted, 3)
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
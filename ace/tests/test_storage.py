@@ -0,0 +1,282 @@
+import unittest
+import os
+import asyncio
+import numpy as np
+from unittest.mock import MagicMock
+from ace import database
+from ace.embedding_codec import decode_embedding
+from ace.storage import InMemoryPlaybookStore, SQLitePlaybookStore, ShardedSQLitePlaybookStore
+from ace.core.models import Playbook
+
+def _entry(i: int, embedding=None):
+    return {"id": f"id{i}", "content": f"Content {i}", "metadata": {"n": i}, "embedding": embedding}
+
+class PlaybookStoreContract:
+    """
+    Tests that every `PlaybookStore` implementation behaves the same way.
+
+    Concrete test cases mix this class into `unittest.TestCase` and provide a
+    `create_store` method.
+    """
+
+    db_paths = []
+    unique_content = True
+
+    def setUp(self):
+        self.store = self.create_store()
+        asyncio.run(self.store.initialize())
+
+    def tearDown(self):
+        for path in self.db_paths:
+            for suffix in ("", ".vectors", ".rows.jsonl", ".lock"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def test_upsert_and_lookup(self):
+        """
+        Tests inserting, updating, and looking up entries.
+        """
+        async def _test():
+            await self.store.upsert_entries([_entry(i) for i in range(6)])
+            await self.store.upsert_entries([{"id": "id2", "content": "Updated", "metadata": {}, "embedding": None}])
+
+            all_entries = await self.store.get_all_entries()
+            self.assertEqual(len(all_entries), 6)
+
+            entry = await self.store.get_entry("id2")
+            self.assertEqual(entry["content"], "Updated")
+            self.assertIsNone(await self.store.get_entry("missing"))
+
+            entries = await self.store.get_entries_by_ids(["id5", "missing", "id0"])
+            self.assertEqual([e["id"] for e in entries], ["id5", "id0"])
+
+            entry = await self.store.get_entry_by_content_hash(database.content_hash("content 4"))
+            self.assertEqual(entry["id"], "id4")
+
+            self.assertEqual(await self.store.contents_exist(["Content 1", "Content 2", "updated"]), [True, False, True])
+
+        asyncio.run(_test())
+
+    def test_delete_entries(self):
+        """
+        Tests that deleted entries are gone from lookups and the embedding matrix.
+        """
+        async def _test():
+            await self.store.upsert_entries([
+                _entry(i, np.array([float(i), 1.0], dtype=np.float32).tobytes()) for i in range(4)
+            ])
+            await self.store.delete_entries(["id1", "id3", "missing"])
+
+            self.assertEqual(sorted(e["id"] for e in await self.store.get_all_entries()), ["id0", "id2"])
+            self.assertEqual(await self.store.contents_exist(["Content 1", "Content 2"]), [False, True])
+            entry_ids, matrix = await self.store.get_embedding_matrix()
+            self.assertEqual(sorted(entry_ids), ["id0", "id2"])
+            self.assertEqual({float(row[0]) for row in matrix}, {0.0, 2.0})
+
+        asyncio.run(_test())
+
+    def test_content_collisions_are_reported_as_deletions(self):
+        """
+        Tests that an entry replaced by one with the same content under
+        another ID is reported to listeners and dropped from the matrix.
+        """
+        if not self.unique_content:
+            self.skipTest("Content is only unique within a shard.")
+
+        async def _test():
+            listener = MagicMock()
+            self.store.add_listener(listener)
+            await self.store.upsert_entries([
+                _entry(i, np.array([float(i), 1.0], dtype=np.float32).tobytes()) for i in range(3)
+            ])
+            await self.store.upsert_entries([
+                {"id": "new1", "content": "Content 1", "metadata": {}, "embedding": np.array([7.0, 1.0], dtype=np.float32).tobytes()},
+                {"id": "new2", "content": "Fresh", "metadata": {}, "embedding": None},
+                {"id": "new3", "content": "Fresh", "metadata": {}, "embedding": None},
+            ])
+
+            listener.on_entries_deleted.assert_called_once()
+            self.assertEqual(sorted(listener.on_entries_deleted.call_args[0][0]), ["id1", "new2"])
+            self.assertEqual(sorted(e["id"] for e in await self.store.get_all_entries()), ["id0", "id2", "new1", "new3"])
+            entry_ids, matrix = await self.store.get_embedding_matrix()
+            self.assertEqual(dict(zip(entry_ids, matrix[:, 0].tolist())), {"id0": 0.0, "id2": 2.0, "new1": 7.0})
+
+        asyncio.run(_test())
+
+    def test_version_counts_writes(self):
+        """
+        Tests that every write through the store increments its version.
+        """
+        async def _test():
+            versions = [self.store.version]
+            await self.store.upsert_entries([_entry(i) for i in range(2)])
+            versions.append(self.store.version)
+            await self.store.get_all_entries()
+            versions.append(self.store.version)
+            await self.store.assign_clusters({"id0": 0})
+            versions.append(self.store.version)
+            await self.store.delete_entries(["id1"])
+            versions.append(self.store.version)
+            self.assertEqual(versions, sorted(versions))
+            self.assertEqual(len(set(versions)), 4)
+
+        asyncio.run(_test())
+
+    def test_iter_entries(self):
+        """
+        Tests that iteration yields every entry with only the requested fields.
+        """
+        async def _test():
+            await self.store.upsert_entries([_entry(i, np.ones(2, dtype=np.float32).tobytes()) for i in range(5)])
+            rows = [row async for row in self.store.iter_entries(("id", "metadata"), batch_size=2)]
+            self.assertEqual(sorted(row["id"] for row in rows), [f"id{i}" for i in range(5)])
+            self.assertEqual(set(rows[0]), {"id", "metadata"})
+            self.assertEqual(rows[0]["metadata"]["n"], int(rows[0]["id"][2:]))
+
+        asyncio.run(_test())
+
+    def test_similarity_check(self):
+        """
+        Tests that the similarity check compares against every stored embedding.
+        """
+        async def _test():
+            await self.store.upsert_entries([
+                _entry(i, np.array([float(i), 1.0], dtype=np.float32).tobytes()) for i in range(5)
+            ])
+            similarity_service = MagicMock()
+            similarity_service.is_similar_encoded.side_effect = lambda new, existing: any(
+                np.allclose(new, decode_embedding(e)) for e in existing
+            )
+            similarity_service.is_similar.side_effect = lambda new, existing: any(
+                np.allclose(new, e) for e in existing
+            )
+            present = await self.store.is_similar_embedding_present(
+                similarity_service, np.array([3.0, 1.0], dtype=np.float32), batch_size=2
+            )
+            self.assertTrue(present)
+            absent = await self.store.is_similar_embedding_present(
+                similarity_service, np.array([9.0, 1.0], dtype=np.float32), batch_size=2
+            )
+            self.assertFalse(absent)
+
+        asyncio.run(_test())
+
+    def test_cluster_assignments(self):
+        """
+        Tests that cluster assignments are replaced and stale clusters removed.
+        """
+        async def _test():
+            await self.store.upsert_entries([_entry(i) for i in range(6)])
+            await self.store.assign_clusters({"id0": 5, "id1": 5}, {5: "Old cluster"})
+            await self.store.assign_clusters(
+                {f"id{i}": i % 2 for i in range(6)},
+                {0: "Even", 1: "Odd"}
+            )
+
+            clusters = await self.store.get_clusters_with_entries()
+            self.assertEqual(sorted(clusters), [0, 1])
+            self.assertEqual(clusters[0]["summary"], "Even")
+            self.assertEqual(sorted(e["id"] for e in clusters[1]["entries"]), ["id1", "id3", "id5"])
+
+            self.assertEqual(
+                await self.store.get_entry_clusters(["id0", "id3", "missing"]),
+                {"id0": 0, "id3": 1}
+            )
+            self.assertEqual(await self.store.get_cluster_summaries([1, 5]), {1: "Odd"})
+
+        asyncio.run(_test())
+
+    def test_playbook_uses_store(self):
+        """
+        Tests that a `Playbook` reads and writes through its store.
+        """
+        async def _test():
+            playbook = Playbook(self.store)
+            entry = await playbook.add_entry("Stored through the playbook", {"a": 1})
+            self.assertEqual((await playbook.get_entry(entry.id)).metadata, {"a": 1})
+            self.assertEqual(len(await playbook.get_all_entries()), 1)
+
+        asyncio.run(_test())
+
+class TestInMemoryPlaybookStore(PlaybookStoreContract, unittest.TestCase):
+    """Runs the store contract against the in-memory store."""
+
+    def create_store(self):
+        return InMemoryPlaybookStore()
+
+class TestSQLitePlaybookStore(PlaybookStoreContract, unittest.TestCase):
+    """Runs the store contract against the single-file SQLite store."""
+
+    db_paths = ["test_store_playbook.db"]
+
+    def create_store(self):
+        return SQLitePlaybookStore(self.db_paths[0])
+
+class TestSQLitePlaybookStoreWithEmbeddingMatrix(PlaybookStoreContract, unittest.TestCase):
+    """Runs the store contract against the SQLite store with an embedding matrix."""
+
+    db_paths = ["test_matrix_playbook.db"]
+
+    def create_store(self):
+        return SQLitePlaybookStore(self.db_paths[0], use_embedding_matrix=True)
+
+    def test_embeddings_of_another_dimension_are_rejected(self):
+        """
+        Tests that an embedding that does not match the matrix's dimension is
+        rejected before the database is written.
+        """
+        async def _test():
+            await self.store.upsert_entries([_entry(0, np.ones(2, dtype=np.float32).tobytes())])
+            with self.assertRaises(ValueError):
+                await self.store.upsert_entries([_entry(1, np.ones(3, dtype=np.float32).tobytes())])
+            self.assertIsNone(await self.store.get_entry("id1"))
+            self.assertFalse(await self.store.sync_embedding_matrix())
+
+        asyncio.run(_test())
+
+    def test_matrix_is_resynced_after_external_writes(self):
+        """
+        Tests that the matrix is rebuilt when the database changed behind the
+        store's back, and kept when it is consistent.
+        """
+        async def _test():
+            await self.store.upsert_entries([
+                _entry(i, np.array([float(i), 1.0], dtype=np.float32).tobytes()) for i in range(3)
+            ])
+            self.assertFalse(await self.store.sync_embedding_matrix())
+
+            await database.add_or_update_playbook_entry(
+                "id1", "Changed elsewhere", {}, np.array([9.0, 1.0], dtype=np.float32).tobytes(),
+                path=self.db_paths[0]
+            )
+            reopened = SQLitePlaybookStore(self.db_paths[0], use_embedding_matrix=True)
+            await reopened.initialize()
+            entry_ids, matrix = await reopened.get_embedding_matrix()
+            self.assertEqual(dict(zip(entry_ids, matrix[:, 0].tolist())), {"id0": 0.0, "id1": 9.0, "id2": 2.0})
+
+        asyncio.run(_test())
+
+class TestShardedSQLitePlaybookStore(PlaybookStoreContract, unittest.TestCase):
+    """Runs the store contract against the sharded SQLite store."""
+
+    db_paths = [f"test_shard{i}_playbook.db" for i in range(3)]
+    unique_content = False
+
+    def create_store(self):
+        return ShardedSQLitePlaybookStore(self.db_paths)
+
+    def test_entries_are_spread_across_shards(self):
+        """
+        Tests that entries are written to the shard selected by their ID.
+        """
+        async def _test():
+            await self.store.upsert_entries([_entry(i) for i in range(30)])
+            for path in self.db_paths:
+                shard_entries = await database.get_all_playbook_entries(path=path)
+                self.assertTrue(shard_entries)
+                self.assertTrue(all(self.store.shard_for(e["id"]) == path for e in shard_entries))
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
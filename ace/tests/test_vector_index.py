@@ -0,0 +1,74 @@
+import unittest
+import asyncio
+import numpy as np
+from ace.vector_index import VectorIndex
+from ace.storage import InMemoryPlaybookStore
+
+class TestVectorIndex(unittest.TestCase):
+    """
+    Tests for the resident, normalized embedding index.
+    """
+
+    def setUp(self):
+        self.index = VectorIndex(initial_capacity=2)
+        self.index.load(["x", "y", "xy"], np.array([[2.0, 0.0], [0.0, 3.0], [1.0, 1.0]]))
+
+    def test_search_and_threshold(self):
+        """
+        Tests that queries rank entries by cosine similarity.
+        """
+        results = self.index.search(np.array([5.0, 0.0]), k=2)
+        self.assertEqual([entry_id for entry_id, _ in results], ["x", "xy"])
+        self.assertAlmostEqual(results[0][1], 1.0, places=6)
+        self.assertAlmostEqual(results[1][1], np.sqrt(0.5), places=6)
+
+        self.assertEqual(self.index.search(np.array([1.0, 0.0]), k=3, threshold=0.5), results)
+        self.assertTrue(self.index.any_above(np.array([0.0, 1.0]), 0.99))
+        self.assertFalse(self.index.any_above(np.array([-1.0, -1.0]), 0.0))
+
+    def test_any_above_batch(self):
+        """
+        Tests that batched threshold checks agree with one check per query.
+        """
+        queries = np.array([[0.0, 1.0], [-1.0, -1.0], [1.0, 0.1]])
+        expected = [self.index.any_above(query, 0.99) for query in queries]
+        np.testing.assert_array_equal(self.index.any_above_batch(queries, 0.99, chunk_size=2), expected)
+        np.testing.assert_array_equal(self.index.any_above_batch(np.ones((2, 3)), 0.0), [False, False])
+
+    def test_update_and_remove(self):
+        """
+        Tests that replacing and removing entries keeps rows and IDs aligned.
+        """
+        self.index.add(["y", "z"], np.array([[0.0, -1.0], [-1.0, 0.0]]))
+        self.index.remove(["x", "missing"])
+
+        self.assertEqual(sorted(self.index.ids), ["xy", "y", "z"])
+        for entry_id, vector in zip(self.index.ids, self.index.vectors):
+            self.assertEqual(self.index.search(vector, k=1)[0][0], entry_id)
+        self.assertEqual(self.index.search(np.array([0.0, -2.0]), k=1)[0][0], "y")
+
+        with self.assertRaises(ValueError):
+            self.index.add(["w"], np.ones((1, 3)))
+
+    def test_follows_store_writes(self):
+        """
+        Tests that an index registered with a store follows its writes.
+        """
+        async def _test():
+            store = InMemoryPlaybookStore()
+            index = VectorIndex()
+            store.add_listener(index)
+            vector = np.array([1.0, 0.0], dtype=np.float32).tobytes()
+            await store.upsert_entries([
+                {"id": "a", "content": "A", "metadata": {}, "embedding": vector},
+                {"id": "b", "content": "B", "metadata": {}, "embedding": vector},
+            ])
+            await store.upsert_entries([{"id": "b", "content": "B", "metadata": {}, "embedding": None}])
+            await store.delete_entries(["a"])
+            await store.upsert_entries([{"id": "c", "content": "C", "metadata": {}, "embedding": vector}])
+            self.assertEqual(index.ids, ["c"])
+
+        asyncio.run(_test())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+class Tokenizer(ABC):
+    """
+    Abstract base class for a tokenizer that counts the tokens of a text.
+
+    The `ContextPacker` uses a tokenizer to keep prompts within a token
+    budget. Counts only need to match the language model's tokenizer closely
+    enough for the budget to be respected.
+    """
+
+    @property
+    def name(self) -> str:
+        """
+        Identifies the tokenizer and its settings, e.g. in cache keys.
+
+        Tokenizers that count the same text differently must have different
+        names.
+        """
+        return type(self).__name__
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """
+        Counts the tokens of a text.
+
+        Args:
+            text: The text to count.
+
+        Returns:
+            The number of tokens.
+        """
+        pass
+
+class ApproximateTokenizer(Tokenizer):
+    """
+    A tokenizer that estimates token counts from the number of characters.
+
+    English text averages about four characters per token with common BPE
+    vocabularies. The estimate needs no dependencies and no vocabulary.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0):
+        """
+        Initializes the tokenizer.
+
+        Args:
+            chars_per_token: The average number of characters per token.
+        """
+        self.chars_per_token = chars_per_token
+
+    @property
+    def name(self) -> str:
+        return f"approximate-{self.chars_per_token}"
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+class TiktokenTokenizer(Tokenizer):
+    """
+    A tokenizer that counts tokens exactly with a `tiktoken` encoding.
+
+    The optional `tiktoken` package is imported when the tokenizer is created.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        """
+        Initializes the tokenizer.
+
+        Args:
+            encoding: The name of the `tiktoken` encoding.
+
+        Raises:
+            ImportError: If `tiktoken` is not installed.
+        """
+        import tiktoken
+        self.encoding_name = encoding
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken-{self.encoding_name}"
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+def create_tokenizer(config: Dict[str, Any]) -> Tokenizer:
+    """
+    Factory function to create a tokenizer based on the configuration.
+
+    The tokenizer is selected by the `context.tokenizer` setting:
+    - `approximate` (the default): an `ApproximateTokenizer` with
+      `context.chars_per_token` characters per token.
+    - `tiktoken`: a `TiktokenTokenizer` with the `context.tiktoken_encoding`
+      encoding.
+
+    Args:
+        config: A dictionary containing the application configuration.
+
+    Returns:
+        An instance of a class that implements the `Tokenizer` interface.
+
+    Raises:
+        ValueError: If the specified tokenizer is unknown.
+    """
+    context_config = config.get('context', {})
+    tokenizer = context_config.get('tokenizer', 'approximate')
+    if tokenizer == 'approximate':
+        return ApproximateTokenizer(context_config.get('chars_per_token', 4.0))
+    elif tokenizer == 'tiktoken':
+        return TiktokenTokenizer(context_config.get('tiktoken_encoding', 'cl100k_base'))
+    else:
+        raise ValueError(f"Unknown tokenizer: {tokenizer}")
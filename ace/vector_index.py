@@ -0,0 +1,222 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ace.embedding_codec import decode_embedding
+from ace.storage.base import PlaybookStoreListener, check_embedding_dim
+
+class VectorIndex(PlaybookStoreListener):
+    """
+    An exact, resident index of L2-normalized playbook embeddings.
+
+    The index keeps every embedding in one contiguous float32 matrix, with
+    each row normalized once when it is added. A cosine similarity query is
+    then a single matrix-vector product against the normalized query,
+    instead of a database scan that renormalizes every stored embedding.
+
+    Rows are appended into spare capacity that grows geometrically, and a
+    removed row is filled with the last row, so both updates are O(dim).
+    Registered as a listener on a `PlaybookStore`, the index follows every
+    write made through that store.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initializes an empty index.
+
+        Args:
+            initial_capacity: The number of rows to allocate up front.
+        """
+        self.dim: Optional[int] = None
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._rows
+
+    @property
+    def ids(self) -> List[str]:
+        """The IDs of the indexed entries, in row order."""
+        return list(self._ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """A read-only view of the normalized embeddings, in row order."""
+        view = self._matrix[:len(self._ids)]
+        view.flags.writeable = False
+        return view
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms > 0, norms, 1.0)
+
+    def clear(self):
+        """Removes every entry from the index."""
+        self.dim = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids = []
+        self._rows = {}
+
+    def load(self, entry_ids: List[str], embeddings: np.ndarray):
+        """
+        Replaces the contents of the index.
+
+        Args:
+            entry_ids: The IDs of the entries.
+            embeddings: A matrix with one embedding per entry.
+        """
+        self.clear()
+        self.add(entry_ids, embeddings)
+
+    def _reserve(self, rows: int):
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, self._initial_capacity)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        if self._ids:
+            matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = matrix
+
+    def add(self, entry_ids: List[str], embeddings: np.ndarray):
+        """
+        Adds or replaces the embeddings of several entries.
+
+        Args:
+            entry_ids: The IDs of the entries.
+            embeddings: A matrix with one embedding per entry.
+
+        Raises:
+            ValueError: If the embeddings do not match the index's dimension.
+        """
+        if not len(entry_ids):
+            return
+        vectors = self._normalize(embeddings)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}")
+
+        self._reserve(len(self._ids) + len(entry_ids))
+        for entry_id, vector in zip(entry_ids, vectors):
+            row = self._rows.get(entry_id)
+            if row is None:
+                row = len(self._ids)
+                self._rows[entry_id] = row
+                self._ids.append(entry_id)
+            self._matrix[row] = vector
+
+    def remove(self, entry_ids: Iterable[str]):
+        """
+        Removes several entries from the index.
+
+        IDs that are not indexed are ignored.
+
+        Args:
+            entry_ids: The IDs of the entries to remove.
+        """
+        for entry_id in entry_ids:
+            row = self._rows.pop(entry_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+
+    def similarities(self, embedding: np.ndarray) -> np.ndarray:
+        """
+        Computes the cosine similarity of an embedding to every indexed entry.
+
+        Args:
+            embedding: The query embedding.
+
+        Returns:
+            An array of similarities, aligned with `ids`.
+        """
+        if not self._ids or np.size(embedding) != self.dim:
+            return np.zeros(len(self._ids), dtype=np.float32)
+        return self._matrix[:len(self._ids)] @ self._normalize(embedding)[0]
+
+    def any_above(self, embedding: np.ndarray, threshold: float) -> bool:
+        """
+        Checks if any indexed entry is more similar than a threshold.
+
+        Args:
+            embedding: The query embedding.
+            threshold: The cosine similarity to exceed.
+
+        Returns:
+            True if a similar entry is indexed, False otherwise.
+        """
+        return bool(np.any(self.similarities(embedding) > threshold))
+
+    def any_above_batch(self, embeddings: np.ndarray, threshold: float, chunk_size: int = 65536) -> np.ndarray:
+        """
+        Checks, for each of several embeddings, if any indexed entry is more similar than a threshold.
+
+        All queries are compared with the index in one matrix product per
+        chunk of rows, instead of one matrix-vector product per query.
+
+        Args:
+            embeddings: A matrix with one query embedding per row.
+            threshold: The cosine similarity to exceed.
+            chunk_size: The number of indexed rows compared at a time, which
+                        bounds the size of the intermediate similarity matrix.
+
+        Returns:
+            A boolean array with one flag per query.
+        """
+        queries = self._normalize(embeddings) if len(embeddings) else np.empty((0, 0), dtype=np.float32)
+        found = np.zeros(len(queries), dtype=bool)
+        if not self._ids or not len(queries) or queries.shape[1] != self.dim:
+            return found
+        for start in range(0, len(self._ids), chunk_size):
+            chunk = self._matrix[start:min(start + chunk_size, len(self._ids))]
+            found |= (chunk @ queries.T).max(axis=0) > threshold
+        return found
+
+    def search(self, embedding: np.ndarray, k: int = 10, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Finds the indexed entries most similar to an embedding.
+
+        Args:
+            embedding: The query embedding.
+            k: The maximum number of entries to return.
+            threshold: If given, only entries more similar than this are
+                       returned.
+
+        Returns:
+            A list of `(entry_id, similarity)` tuples, most similar first.
+        """
+        scores = self.similarities(embedding)
+        if k <= 0 or not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self._ids[row], float(scores[row]))
+            for row in top
+            if threshold is None or scores[row] > threshold
+        ]
+
+    def check_entries(self, entries: List[Dict[str, Any]]):
+        check_embedding_dim(entries, self.dim)
+
+    def on_entries_upserted(self, entries: List[Dict[str, Any]]):
+        embedded = [e for e in entries if e["embedding"] is not None]
+        self.remove(e["id"] for e in entries if e["embedding"] is None)
+        if embedded:
+            self.add([e["id"] for e in embedded], np.stack([decode_embedding(e["embedding"]) for e in embedded]))
+
+    def on_entries_deleted(self, entry_ids: List[str]):
+        self.remove(entry_ids)
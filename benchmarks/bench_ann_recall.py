@@ -0,0 +1,83 @@
+"""
+Benchmarks the recall and latency of the approximate IVF index.
+
+This script builds an exact `VectorIndex` and an `IVFIndex` over synthetic,
+clustered embeddings (real sentence embeddings are far from uniformly
+distributed, and IVF relies on that structure). It then runs the same
+queries against both and reports, for each `nprobe`:
+- recall@k, the fraction of the exact top-k neighbors that were found;
+- dedup agreement, the fraction of queries for which both indexes agree on
+  whether any entry is above the similarity threshold;
+- the mean query latency, next to the exact index's latency.
+
+About half of the queries are noisy copies of stored embeddings, so the
+dedup decisions are not trivially all negative.
+
+Usage:
+    python benchmarks/bench_ann_recall.py --entries 100000 --nlist 1024 --nprobe 1 4 16 64
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ace.ivf_index import IVFIndex
+from ace.vector_index import VectorIndex
+
+def make_embeddings(count: int, dim: int, topics: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((topics, dim))
+    labels = rng.integers(0, topics, count)
+    return (centers[labels] + 0.6 * rng.standard_normal((count, dim))).astype(np.float32)
+
+def time_queries(search, queries: np.ndarray):
+    started = time.perf_counter()
+    results = [search(query) for query in queries]
+    return results, (time.perf_counter() - started) / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF index against exact search.")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension.")
+    parser.add_argument("--topics", type=int, default=2000, help="Number of synthetic topic centers.")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.80)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = make_embeddings(args.entries, args.dim, args.topics, rng)
+    ids = [str(i) for i in range(args.entries)]
+    sources = embeddings[rng.integers(0, args.entries, args.queries)]
+    noise = rng.uniform(0.0, 0.5, (args.queries, 1)) * np.linalg.norm(sources, axis=1, keepdims=True)
+    queries = sources + noise * rng.standard_normal((args.queries, args.dim)) / np.sqrt(args.dim)
+    unrelated = rng.random(args.queries) < 0.5
+    queries[unrelated] = make_embeddings(int(unrelated.sum()), args.dim, args.topics, rng)
+
+    exact = VectorIndex()
+    exact.load(ids, embeddings)
+    exact_top, exact_latency = time_queries(lambda q: {i for i, _ in exact.search(q, args.k)}, queries)
+    exact_dedup = np.array([exact.any_above(q, args.threshold) for q in queries])
+
+    started = time.perf_counter()
+    ivf = IVFIndex(nlist=args.nlist, train_size=0)
+    ivf.load(ids, embeddings)
+    build = time.perf_counter() - started
+
+    print(f"{args.entries} entries, dim {args.dim}, nlist {args.nlist}: built in {build:.1f} s; "
+          f"exact search {exact_latency * 1000:.2f} ms/query; {int(exact_dedup.sum())}/{args.queries} duplicates")
+    print(f"{'nprobe':>7} {f'recall@{args.k}':>10} {'dedup agreement':>16} {'ms/query':>9} {'speedup':>8}")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        top, latency = time_queries(lambda q: {i for i, _ in ivf.search(q, args.k)}, queries)
+        recall = np.mean([len(a & b) / len(a) for a, b in zip(exact_top, top)])
+        agreement = np.mean(exact_dedup == np.array([ivf.any_above(q, args.threshold) for q in queries]))
+        print(f"{nprobe:>7} {recall:>10.3f} {agreement:>16.2%} {latency * 1000:>9.2f} {exact_latency / latency:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
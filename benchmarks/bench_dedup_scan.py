@@ -0,0 +1,131 @@
+"""
+Benchmarks the latency of the semantic deduplication scan.
+
+For each playbook size, this script fills a scratch database with random
+embeddings and times `database.is_similar_embedding_present` for a query
+that matches nothing, which is the worst case because every stored
+embedding has to be compared. The legacy `LIMIT ? OFFSET ?` scan, which
+reconnected for every batch, is timed alongside it for comparison.
+
+Usage:
+    python benchmarks/bench_dedup_scan.py --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from typing import List
+
+import aiosqlite
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ace import database
+from ace.embedding_codec import cosine_similarities
+
+class CosineThreshold:
+    """
+    A stand-in for `SimilarityService` that only implements the similarity
+    checks, so the benchmark does not need to load a sentence transformer
+    model.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def is_similar(self, new_embedding: np.ndarray, existing_embeddings: List[np.ndarray]) -> bool:
+        matrix = np.array(existing_embeddings)
+        scores = matrix @ new_embedding / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(new_embedding))
+        return bool(np.any(scores > self.threshold))
+
+    def is_similar_encoded(self, new_embedding: np.ndarray, encoded_embeddings: List[bytes]) -> bool:
+        return bool(np.any(cosine_similarities(new_embedding, encoded_embeddings) > self.threshold))
+
+async def legacy_offset_scan(similarity_service, embedding: np.ndarray, batch_size: int) -> bool:
+    """The original OFFSET-paginated scan, reconnecting for every batch."""
+    offset = 0
+    while True:
+        async with aiosqlite.connect(database.DATABASE_PATH) as db:
+            async with db.execute(
+                "SELECT embedding FROM playbook_entries WHERE embedding IS NOT NULL LIMIT ? OFFSET ?",
+                (batch_size, offset)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return False
+        if similarity_service.is_similar(embedding, [np.frombuffer(row[0], dtype=np.float32) for row in rows]):
+            return True
+        offset += batch_size
+
+async def fill_database(size: int, dim: int, rng: np.random.Generator):
+    await database.initialize_database()
+    async with aiosqlite.connect(database.DATABASE_PATH) as db:
+        chunk = 10000
+        for start in range(0, size, chunk):
+            count = min(chunk, size - start)
+            embeddings = rng.standard_normal((count, dim)).astype(np.float32)
+            await db.executemany(
+                "INSERT INTO playbook_entries (id, content, metadata, embedding) VALUES (?, ?, ?, ?)",
+                [(str(uuid.uuid4()), f"entry {start + i}", "{}", embeddings[i].tobytes()) for i in range(count)]
+            )
+        await db.commit()
+
+async def time_scan(scan, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await scan()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+async def run(args: argparse.Namespace):
+    rng = np.random.default_rng(0)
+    similarity_service = CosineThreshold(args.threshold)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+
+    print(f"{'entries':>10} {'streaming (ms)':>16} {'legacy offset (ms)':>20}")
+    for size in args.sizes:
+        database.DATABASE_PATH = f"bench_dedup_{size}.db"
+        if os.path.exists(database.DATABASE_PATH):
+            os.remove(database.DATABASE_PATH)
+        try:
+            await fill_database(size, args.dim, rng)
+            await database.open_pool({"database": {"pool_size": 1}})
+            try:
+                streaming = await time_scan(
+                    lambda: database.is_similar_embedding_present(similarity_service, query, args.batch_size),
+                    args.repeats
+                )
+            finally:
+                await database.close_pool()
+
+            legacy = "skipped"
+            if size <= args.legacy_max:
+                seconds = await time_scan(
+                    lambda: legacy_offset_scan(similarity_service, query, args.legacy_batch_size),
+                    args.repeats
+                )
+                legacy = f"{seconds * 1000:.1f}"
+            print(f"{size:>10} {streaming * 1000:>16.1f} {legacy:>20}")
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(database.DATABASE_PATH + suffix):
+                    os.remove(database.DATABASE_PATH + suffix)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic deduplication scan.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--legacy-batch-size", type=int, default=100)
+    parser.add_argument("--legacy-max", type=int, default=20000,
+                        help="Largest playbook size to run the quadratic legacy scan on.")
+    parser.add_argument("--threshold", type=float, default=0.80)
+    parser.add_argument("--repeats", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmarks quantized embedding storage against float32.
+
+This script builds a random playbook of unit-normalized embeddings and a set
+of queries, most of which are noisy copies of stored embeddings so that their
+similarities straddle the deduplication threshold. For each storage dtype it
+reports the encoded size, the time to compare every query against the whole
+playbook with `embedding_codec.cosine_similarities`, and how many
+deduplication decisions (is any stored embedding above the threshold?) agree
+with the exact float32 decisions.
+
+Usage:
+    python benchmarks/bench_quantized_dedup.py --entries 10000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ace.embedding_codec import cosine_similarities, encode_embedding
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+def make_queries(stored: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    # Perturb randomly chosen stored embeddings by varying amounts of noise so
+    # that the query similarities spread across the threshold, and mix in
+    # unrelated queries.
+    dim = stored.shape[1]
+    sources = stored[rng.integers(0, len(stored), count)]
+    noise_levels = rng.uniform(0.0, 1.2, (count, 1)) / np.sqrt(dim)
+    queries = sources + rng.standard_normal((count, dim)) * noise_levels
+    unrelated = rng.random(count) < 0.2
+    queries[unrelated] = rng.standard_normal((int(unrelated.sum()), dim))
+    return normalize(queries).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage.")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension.")
+    parser.add_argument("--threshold", type=float, default=0.80)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stored = normalize(rng.standard_normal((args.entries, args.dim))).astype(np.float32)
+    queries = make_queries(stored, args.queries, rng)
+    exact = (queries @ stored.T).max(axis=1) > args.threshold
+
+    print(f"{len(queries)} queries, {int(exact.sum())} duplicates at threshold {args.threshold}")
+    print(f"{'dtype':>8} {'bytes/entry':>12} {'ms/query':>10} {'agreement':>10} {'max |err|':>10}")
+    for dtype in ("float32", "float16", "int8"):
+        blobs = [encode_embedding(e, dtype) for e in stored]
+        started = time.perf_counter()
+        scores = np.stack([cosine_similarities(q, blobs) for q in queries])
+        elapsed = (time.perf_counter() - started) / len(queries)
+
+        decisions = scores.max(axis=1) > args.threshold
+        error = np.abs(scores - queries @ stored.T).max()
+        agreement = np.mean(decisions == exact)
+        print(f"{dtype:>8} {len(blobs[0]):>12} {elapsed * 1000:>10.2f} {agreement:>10.2%} {error:>10.4f}")
+
+if __name__ == "__main__":
+    main()